@@ -0,0 +1,102 @@
+"""Async list and retrieve endpoints for the API viewsets.
+
+DRF views are synchronous, so these wrap a viewset instead: its
+authentication, permission and throttle checks run through ``sync_to_async``,
+then the page or object is read with the async ORM and rendered with the
+viewset's serializer, pagination and conditional-GET validators. Responses
+match the synchronous API. Writes still go through api.views.
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.views import View
+from rest_framework.response import Response
+
+from api import views
+from catalog import reference
+
+
+class AsyncReadView(View):
+    viewset_class = None
+
+    async def get(self, request, *args, **kwargs):
+        viewset = self.viewset_class(args=args, kwargs=kwargs, headers={})
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        action = "retrieve" if lookup_url_kwarg in kwargs else "list"
+        viewset.action = action
+        viewset.action_map = {"get": action}
+        viewset.format_kwarg = viewset.get_format_suffix(**kwargs)
+        drf_request = viewset.initialize_request(request, *args, **kwargs)
+        viewset.request = drf_request
+        try:
+            await sync_to_async(viewset.initial)(drf_request, *args, **kwargs)
+            # The serializers look names up in catalog.reference, which must
+            # not query from here.
+            await reference.aload()
+            if action == "list":
+                response = await self.list(viewset, drf_request)
+            else:
+                response = await self.retrieve(viewset, drf_request, kwargs)
+        except Exception as exc:
+            response = viewset.handle_exception(exc)
+        response = viewset.finalize_response(drf_request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            response = await sync_to_async(response.render)()
+        return response
+
+    async def list(self, viewset, request):
+        # Filter backends may validate their parameters against the database.
+        queryset = await sync_to_async(viewset.filter_queryset)(viewset.get_queryset())
+        page = await viewset.paginator.apaginate_queryset(queryset, request, viewset)
+        rows = [viewset.get_validator_row(obj) for obj in page]
+        not_modified = viewset.get_not_modified(request, rows, many=True)
+        if not_modified is not None:
+            return not_modified
+        data = viewset.get_serializer(page, many=True).data
+        response = viewset.paginator.get_paginated_response(data)
+        return viewset.set_validators(request, response, rows, many=True)
+
+    async def retrieve(self, viewset, request, kwargs):
+        lookup_url_kwarg = viewset.lookup_url_kwarg or viewset.lookup_field
+        queryset = viewset.get_queryset().filter(
+            **{viewset.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        try:
+            instance = await queryset.afirst()
+        except (TypeError, ValueError, DjangoValidationError):
+            instance = None
+        if instance is None:
+            raise Http404
+        await sync_to_async(viewset.check_object_permissions)(request, instance)
+        rows = [viewset.get_validator_row(instance)]
+        not_modified = viewset.get_not_modified(request, rows)
+        if not_modified is not None:
+            return not_modified
+        response = Response(viewset.get_serializer(instance).data)
+        return viewset.set_validators(request, response, rows)
+
+
+class BookReadView(AsyncReadView):
+    viewset_class = views.BookViewSet
+
+
+class BookInstanceReadView(AsyncReadView):
+    viewset_class = views.BookInstanceViewSet
+
+
+class AuthorReadView(AsyncReadView):
+    viewset_class = views.AuthorViewSet
+
+
+def split_by_method(read_view, write_view):
+    """Serves GET and HEAD with async ``read_view``, other methods with ``write_view``."""
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await read_view(request, *args, **kwargs)
+        return await sync_to_async(write_view)(request, *args, **kwargs)
+
+    # The viewsets enforce CSRF themselves for session-authenticated writes.
+    view.csrf_exempt = True
+    return view
@@ -0,0 +1,83 @@
+"""JWT authentication backed by cached snapshots of the user.
+
+simplejwt's JWTAuthentication loads the user row on every request, and the
+first permission check of the request then loads the user's own and group
+permissions. CachedJWTAuthentication instead returns a snapshot of the user
+kept in the process-local default cache, pickled with ModelBackend's
+permission caches already filled, so an authenticated request needs no auth
+queries at all. Snapshots are keyed on version stamps in the shared cache (see
+catalog.caching): the user's own stamp, replaced whenever the user or their
+groups and permissions change, and one stamp for every group and permission,
+replaced whenever those change. The receivers in api.signals do both, and the
+stamps move when the change commits: moved before, a request still reading
+the old permissions could cache them under the new stamp.
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from catalog import caching
+
+# Snapshots expire anyway, in case a change slipped past the signals
+# (e.g. a queryset update()).
+SNAPSHOT_TIMEOUT = 5 * 60
+
+# Version stamp of every group's permissions, bumped on any change to them.
+GROUPS_VERSION = ("auth", "groups")
+
+
+def _snapshot_key(user_id):
+    return (
+        f"api:user:{user_id}:{caching.get_version('user', user_id)}"
+        f":{caching.get_version(*GROUPS_VERSION)}"
+    )
+
+
+def get_user_snapshot(user_id):
+    """Returns the user with their permissions loaded, or None if there is none."""
+    key = _snapshot_key(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = (
+            get_user_model()
+            .objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+            .first()
+        )
+        if user is None:
+            return None
+        # Fills ModelBackend's per-user permission caches, which are pickled
+        # along with the user.
+        user.get_all_permissions()
+        cache.set(key, user, SNAPSHOT_TIMEOUT)
+    return user
+
+
+def invalidate_users(user_ids):
+    """Drops the snapshots of the given users once the transaction commits."""
+    caching.bump_versions("user", user_ids)
+
+
+def invalidate_groups():
+    """Drops every snapshot once a change to groups or permissions commits."""
+    caching.bump_versions(GROUPS_VERSION[0], [GROUPS_VERSION[1]])
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = None if user_id is None else get_user_snapshot(user_id)
+        if (
+            user is None
+            or not user.is_active
+            or (
+                api_settings.CHECK_REVOKE_TOKEN
+                and validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+                != get_md5_hash_password(user.password)
+            )
+        ):
+            # Let simplejwt look the user up and raise its usual error.
+            return super().get_user(validated_token)
+        return user
@@ -0,0 +1,325 @@
+"""Bulk create and partial-update actions for model viewsets.
+
+``POST <prefix>/bulk/`` takes a list of objects to create and
+``PATCH <prefix>/bulk/`` a list of partial updates, each carrying its ``id``.
+Every item is validated first, with the related objects of all items and
+the unique values fetched in one query per field instead of one per item.
+Only if every item is valid are they written, with ``bulk_create`` or
+``bulk_update`` in a single transaction.
+
+The response lists one result per item, in request order: ``status`` is the
+HTTP status of that item and ``data`` its representation, or ``errors`` why
+it was rejected. Valid items of a rejected request report 424 (Failed
+Dependency) since nothing was written. Updates are subject to the view's
+object permissions like single updates are: an object the user may not change
+rejects the request with a 403 item, or 404 if the user may not see it.
+"""
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import models, transaction
+from django.http import Http404
+from django.utils import timezone
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import (
+    NotAuthenticated,
+    PermissionDenied,
+    ValidationError,
+)
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+from rest_framework.validators import UniqueValidator
+
+NOT_SAVED = {"detail": "Not saved because other items were invalid."}
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Looks primary keys up in ``context["related_objects"]`` when it is given.
+
+    Bulk actions fill it with every object the items refer to, fetched in one
+    query per field, so validating N items does not cost N queries.
+    """
+
+    def to_internal_value(self, data):
+        # The child of a many=True field is bound with an empty name.
+        name = self.field_name or self.parent.field_name
+        objects = self.context.get("related_objects", {}).get(name)
+        if objects is None or isinstance(data, (bool, list, dict)):
+            return super().to_internal_value(data)
+        try:
+            return objects[_pk_key(self.get_queryset().model, data)]
+        except (KeyError, TypeError, ValueError, DjangoValidationError):
+            self.fail("does_not_exist", pk_value=data)
+
+
+def _pk_key(model, value):
+    """Normalises a primary key so e.g. ``"3"`` and ``3`` match."""
+    return str(model._meta.pk.to_python(value))
+
+
+class BulkModelMixin:
+    # Largest list accepted by one bulk request.
+    bulk_max_items = 10_000
+    bulk_batch_size = 1000
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk_create(self, request):
+        items = self.get_bulk_items(request)
+        context = self.get_bulk_context(items)
+        bulk_serializers = [
+            self.get_serializer(data=item, context=context) for item in items
+        ]
+        errors = self.validate_bulk(bulk_serializers)
+        if errors:
+            return self.bulk_error_response(errors, len(items))
+
+        model = self.get_queryset().model
+        many_to_many = {field.name for field in model._meta.many_to_many}
+        instances = []
+        relations = []
+        for serializer in bulk_serializers:
+            data = serializer.validated_data
+            instances.append(
+                model(**{k: v for k, v in data.items() if k not in many_to_many})
+            )
+            relations.append({k: v for k, v in data.items() if k in many_to_many})
+        with transaction.atomic():
+            model.objects.bulk_create(instances, batch_size=self.bulk_batch_size)
+            self.set_many_to_many(instances, relations, replace=False)
+            self.bulk_created(instances)
+        return self.bulk_response(bulk_serializers, instances, status.HTTP_201_CREATED)
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request):
+        items = self.get_bulk_items(request)
+        model = self.get_queryset().model
+        ids = []
+        for item in items:
+            try:
+                ids.append(_pk_key(model, item["id"]) if item.get("id") else None)
+            except (TypeError, ValueError, DjangoValidationError):
+                ids.append(None)
+        found = {
+            _pk_key(model, obj.pk): obj
+            for obj in self.get_queryset().filter(pk__in=[pk for pk in ids if pk])
+        }
+
+        context = self.get_bulk_context(items)
+        bulk_serializers = []
+        errors = {}
+        seen = set()
+        for index, (item, pk) in enumerate(zip(items, ids)):
+            instance = found.get(pk)
+            try:
+                if instance is None:
+                    raise Http404
+                self.check_object_permissions(request, instance)
+            except Http404:
+                errors[index] = (status.HTTP_404_NOT_FOUND, {"id": ["Not found."]})
+            except (NotAuthenticated, PermissionDenied) as exc:
+                errors[index] = (exc.status_code, {"detail": exc.detail})
+            # Each row is written once, by the first item naming it.
+            if instance is not None and pk in seen:
+                errors[index] = (
+                    status.HTTP_400_BAD_REQUEST,
+                    {"id": ["Updated more than once in this request."]},
+                )
+            seen.add(pk)
+            bulk_serializers.append(
+                self.get_serializer(instance, data=item, partial=True, context=context)
+            )
+        errors.update(self.validate_bulk(bulk_serializers, skip=errors))
+        if errors:
+            return self.bulk_error_response(errors, len(items))
+
+        many_to_many = {field.name for field in model._meta.many_to_many}
+        # bulk_update does not run pre_save, which keeps auto_now fields current.
+        auto_now = [
+            field
+            for field in model._meta.concrete_fields
+            if getattr(field, "auto_now", False)
+        ]
+        now = timezone.now()
+        instances = []
+        relations = []
+        fields = set()
+        for serializer in bulk_serializers:
+            instance = serializer.instance
+            relation = {}
+            for name, value in serializer.validated_data.items():
+                if name in many_to_many:
+                    relation[name] = value
+                else:
+                    setattr(instance, name, value)
+                    fields.add(name)
+            for field in auto_now:
+                setattr(instance, field.attname, now)
+                fields.add(field.name)
+            instances.append(instance)
+            relations.append(relation)
+        with transaction.atomic():
+            if fields:
+                model.objects.bulk_update(
+                    instances, sorted(fields), batch_size=self.bulk_batch_size
+                )
+            self.set_many_to_many(instances, relations, replace=True)
+            self.bulk_updated(instances)
+        return self.bulk_response(bulk_serializers, instances, status.HTTP_200_OK)
+
+    def get_bulk_items(self, request):
+        items = request.data
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) for item in items
+        ):
+            raise ValidationError({"detail": "Expected a list of objects."})
+        if not items:
+            raise ValidationError({"detail": "Expected at least one object."})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError(
+                {"detail": f"At most {self.bulk_max_items} objects per request."}
+            )
+        return items
+
+    def get_bulk_context(self, items):
+        """Adds the objects referenced by ``items`` to the serializer context."""
+        context = self.get_serializer_context()
+        related_objects = {}
+        for name, field in self.get_serializer().fields.items():
+            if field.read_only:
+                continue
+            many = isinstance(field, ManyRelatedField)
+            relation = field.child_relation if many else field
+            if not isinstance(relation, PrefetchedPrimaryKeyRelatedField):
+                continue
+            model = relation.get_queryset().model
+            keys = set()
+            for item in items:
+                values = item.get(name)
+                for value in (
+                    values if many and isinstance(values, list) else [values]
+                ):
+                    try:
+                        if value is not None:
+                            keys.add(_pk_key(model, value))
+                    except (TypeError, ValueError, DjangoValidationError):
+                        pass
+            related_objects[name] = {
+                _pk_key(model, obj.pk): obj
+                for obj in relation.get_queryset().filter(pk__in=keys)
+            }
+        context["related_objects"] = related_objects
+        return context
+
+    def validate_bulk(self, bulk_serializers, skip=()):
+        """Validates every serializer and returns ``{index: (status, errors)}``."""
+        errors = {}
+        unique_fields = self.strip_unique_validators(bulk_serializers)
+        for index, serializer in enumerate(bulk_serializers):
+            if index not in skip and not serializer.is_valid():
+                errors[index] = (status.HTTP_400_BAD_REQUEST, serializer.errors)
+
+        # Unique values are checked for the whole list at once, including
+        # duplicates within the list itself. A value may only be kept by the
+        # row already holding it: rows of the request are checked against
+        # their stored values too, since one statement writes them all.
+        model = self.get_queryset().model
+        for name, message in unique_fields.items():
+            values = {}
+            for index, serializer in enumerate(bulk_serializers):
+                if (
+                    index in errors
+                    or index in skip
+                    or name not in serializer.validated_data
+                ):
+                    continue
+                values.setdefault(serializer.validated_data[name], []).append(index)
+            holders = {}
+            for pk, value in model.objects.filter(
+                **{f"{name}__in": list(values)}
+            ).values_list("pk", name):
+                holders.setdefault(value, set()).add(pk)
+            for value, indexes in values.items():
+                instance = bulk_serializers[indexes[0]].instance
+                if holders.get(value, set()) <= {getattr(instance, "pk", None)}:
+                    # The first item may keep the value, later ones duplicate it.
+                    indexes = indexes[1:]
+                for index in indexes:
+                    errors[index] = (status.HTTP_400_BAD_REQUEST, {name: [message]})
+        return errors
+
+    def strip_unique_validators(self, bulk_serializers):
+        """Removes the per-item unique queries and returns ``{field: message}``."""
+        unique_fields = {}
+        for serializer in bulk_serializers:
+            for name, field in serializer.fields.items():
+                validators = [
+                    v for v in field.validators if isinstance(v, UniqueValidator)
+                ]
+                if validators:
+                    unique_fields[name] = str(validators[0].message)
+                    field.validators = [
+                        v for v in field.validators if v not in validators
+                    ]
+        return unique_fields
+
+    def set_many_to_many(self, instances, relations, replace):
+        model = self.get_queryset().model
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source = field.m2m_field_name()
+            target = field.m2m_reverse_field_name()
+            changed = [
+                (instance, relation[field.name])
+                for instance, relation in zip(instances, relations)
+                if field.name in relation
+            ]
+            if not changed:
+                continue
+            if replace:
+                through.objects.filter(
+                    **{f"{source}__in": [instance.pk for instance, _ in changed]}
+                ).delete()
+            through.objects.bulk_create(
+                (
+                    through(**{f"{source}_id": instance.pk, f"{target}_id": obj.pk})
+                    for instance, objects in changed
+                    for obj in dict.fromkeys(objects)
+                ),
+                batch_size=self.bulk_batch_size,
+            )
+            # Cache the new relations for the response.
+            for instance, _ in changed:
+                getattr(instance, "_prefetched_objects_cache", {}).pop(field.name, None)
+            models.prefetch_related_objects(
+                [instance for instance, _ in changed], field.name
+            )
+
+    def bulk_created(self, instances):
+        """Hook run in the transaction after ``instances`` were created."""
+
+    def bulk_updated(self, instances):
+        """Hook run in the transaction after ``instances`` were updated."""
+
+    def bulk_response(self, bulk_serializers, instances, item_status):
+        results = [
+            {
+                "index": index,
+                "status": item_status,
+                "data": serializer.to_representation(instance),
+            }
+            for index, (serializer, instance) in enumerate(
+                zip(bulk_serializers, instances)
+            )
+        ]
+        return Response({"results": results}, status=item_status)
+
+    def bulk_error_response(self, errors, count):
+        results = []
+        for index in range(count):
+            item_status, item_errors = errors.get(
+                index, (status.HTTP_424_FAILED_DEPENDENCY, NOT_SAVED)
+            )
+            results.append(
+                {"index": index, "status": item_status, "errors": item_errors}
+            )
+        return Response({"results": results}, status=status.HTTP_400_BAD_REQUEST)
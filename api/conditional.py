@@ -0,0 +1,119 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from catalog.conditional import is_conditional, make_etag
+
+
+class ConditionalGetMixin:
+    """Answers conditional list and retrieve requests with 304 Not Modified.
+
+    A request carrying If-None-Match or If-Modified-Since is first checked
+    with a query for just the primary keys and ``updated_at_fields`` of the
+    rows it would return, without the joins and prefetches of the full
+    response. Other responses get their ETag and Last-Modified from the
+    objects they serialized, at no extra query.
+
+    Lists carry only the ETag: deleting a row leaves the newest timestamp of
+    the rest unchanged, so a Last-Modified date would not notice it.
+    """
+
+    # Timestamps that date an object's representation, as lookups from the model.
+    updated_at_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        if is_conditional(request):
+            rows = queryset.prefetch_related(None).values_list(
+                "pk", *self.updated_at_fields
+            )
+            page = self.paginate_queryset(rows)
+            not_modified = self.get_not_modified(
+                request, page if page is not None else rows, many=True
+            )
+            if not_modified is not None:
+                return not_modified
+
+        page = self.paginate_queryset(queryset)
+        objects = page if page is not None else queryset
+        serializer = self.get_serializer(objects, many=True)
+        if page is not None:
+            response = self.get_paginated_response(serializer.data)
+        else:
+            response = Response(serializer.data)
+        return self.set_validators(
+            request,
+            response,
+            [self.get_validator_row(obj) for obj in objects],
+            many=True,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        if is_conditional(request):
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+            try:
+                row = (
+                    queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+                    .values_list("pk", *self.updated_at_fields)
+                    .first()
+                )
+            except (TypeError, ValueError, DjangoValidationError):
+                row = None
+            if row is not None:
+                self.check_object_permissions(request, queryset.model(pk=row[0]))
+                not_modified = self.get_not_modified(request, [row])
+                if not_modified is not None:
+                    return not_modified
+
+        instance = self.get_object()
+        response = Response(self.get_serializer(instance).data)
+        return self.set_validators(
+            request, response, [self.get_validator_row(instance)]
+        )
+
+    def get_validator_row(self, obj):
+        """Returns ``(pk, *timestamps)`` of ``obj`` like the pre-check query does."""
+        row = [obj.pk]
+        for lookup in self.updated_at_fields:
+            value = obj
+            for name in lookup.split("__"):
+                value = getattr(value, name, None)
+            row.append(value)
+        return tuple(row)
+
+    def get_validators(self, request, rows, many=False):
+        """Returns the ETag and Last-Modified epoch of a response made of ``rows``."""
+        rows = [tuple(row) for row in rows]
+        last_modified = None
+        if not many:
+            timestamps = [
+                value for row in rows for value in row[1:] if value is not None
+            ]
+            last_modified = max(timestamps, default=None)
+        parts = [request.get_full_path()]
+        page = getattr(self.paginator, "page", None)
+        if page is not None:
+            # The next/previous links depend on rows outside the page.
+            parts += [page.has_next(), page.has_previous()]
+        parts += [",".join(str(value) for value in row) for row in rows]
+        etag = quote_etag(make_etag(request, *parts))
+        return etag, last_modified and int(last_modified.timestamp())
+
+    def get_not_modified(self, request, rows, many=False):
+        etag, last_modified = self.get_validators(request, rows, many)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return self.set_headers(response, etag, last_modified)
+
+    def set_validators(self, request, response, rows, many=False):
+        return self.set_headers(response, *self.get_validators(request, rows, many))
+
+    def set_headers(self, response, etag, last_modified):
+        response.headers["ETag"] = etag
+        if last_modified is not None:
+            response.headers["Last-Modified"] = http_date(last_modified)
+        return response
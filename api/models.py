@@ -1,3 +1,59 @@
-from django.db import models
+import itertools
 
-# Create your models here.
+from django.db import connection, models
+
+# Idle buckets are deleted on every PRUNE_EVERY-th request of a process.
+PRUNE_EVERY = 1000
+
+_requests = itertools.count(1)
+
+
+class ThrottleBucket(models.Model):
+    """Token bucket of one client and throttle scope, shared by every worker.
+
+    A bucket holds up to ``capacity`` tokens and refills at ``rate`` tokens a
+    second; each request takes one. Taking a token is a single upsert that only
+    writes while a token is left, so concurrent workers can never hand out the
+    same token twice.
+    """
+
+    key = models.CharField(max_length=255, primary_key=True)
+    tokens = models.FloatField()
+    # Unix time of the last request.
+    updated_at = models.FloatField()
+    # Unix time the bucket is full again, after which it can be deleted.
+    full_at = models.FloatField(db_index=True)
+
+    def __str__(self):
+        """String for representing the Model object."""
+        return self.key
+
+    @classmethod
+    def take(cls, key, capacity, rate, now):
+        """Takes a token, returning None or the seconds until one is available."""
+        quote = connection.ops.quote_name
+        table, key_column = quote(cls._meta.db_table), quote("key")
+        refilled = f"{table}.tokens + (%(now)s - {table}.updated_at) * %(rate)s"
+        available = (
+            f"CASE WHEN {refilled} < %(capacity)s THEN {refilled} ELSE %(capacity)s END"
+        )
+        params = {"key": key, "capacity": capacity, "rate": rate, "now": now}
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({key_column}, tokens, updated_at, full_at) "
+                "VALUES (%(key)s, %(capacity)s - 1, %(now)s, %(now)s + 1 / %(rate)s) "
+                f"ON CONFLICT ({key_column}) DO UPDATE SET "
+                f"tokens = {available} - 1, updated_at = %(now)s, "
+                f"full_at = %(now)s + (%(capacity)s + 1 - ({available})) / %(rate)s "
+                f"WHERE {available} >= 1",
+                params,
+            )
+            taken = cursor.rowcount
+        if next(_requests) % PRUNE_EVERY == 0:
+            cls.objects.filter(full_at__lt=now).delete()
+        if taken:
+            return None
+        tokens, updated_at = cls.objects.values_list("tokens", "updated_at").get(
+            key=key
+        )
+        return (1 - min(capacity, tokens + (now - updated_at) * rate)) / rate
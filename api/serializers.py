@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
-from catalog.models import Author, Book, BookInstance
+from api.bulk import PrefetchedPrimaryKeyRelatedField
+from catalog import reference
+from catalog.models import Author, Book, BookInstance, Genre, Language
 
 
 class AuthorSerializer(serializers.ModelSerializer):
@@ -10,19 +12,29 @@ class AuthorSerializer(serializers.ModelSerializer):
 
 
 class BookSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
+
     class Meta:
         model = Book
         fields = ["id", "title", "author", "summary", "isbn", "language", "genre"]
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data["language"] = instance.language.name
-        data["author"] = instance.author.first_name + " " + instance.author.last_name
-        data["genre"] = [genre.name for genre in instance.genre.all()]
+        # The language and genres are looked up by primary key in
+        # catalog.reference rather than loaded with each book.
+        language = reference.get(Language, data["language"])
+        data["language"] = language.name if language else None
+        data["author"] = (
+            instance.author.first_name + " " + instance.author.last_name
+            if instance.author
+            else None
+        )
+        data["genre"] = [reference.get(Genre, pk).name for pk in data["genre"]]
         return data
 
 
 class BookInstanceSerializer(serializers.ModelSerializer):
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
     status = serializers.SerializerMethodField()
 
     class Meta:
@@ -35,6 +47,6 @@ class BookInstanceSerializer(serializers.ModelSerializer):
 
     def to_representation(self, instance):
         data = super().to_representation(instance)
-        data["book"] = instance.book.title
+        data["book"] = instance.book.title if instance.book else None
         data["borrower"] = instance.borrower.username if instance.borrower else None
         return data
@@ -1,3 +1,502 @@
-from django.test import TestCase
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api import authentication
+from api.models import ThrottleBucket
+from catalog import reference, search
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class APIQueryCountTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="1X<ISRUkw+tuK"
+        )
+        cls.borrower = User.objects.create_user(
+            username="borrower", password="2HJ1vRV0Z&3iD"
+        )
+        cls.language = Language.objects.create(name="English")
+        cls.genres = [Genre.objects.create(name=name) for name in ("Fantasy", "Horror")]
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        # Language and genre names come from catalog.reference once loaded.
+        reference.clear()
+        reference.load()
+
+    def create_books(self, count):
+        start = Book.objects.count()
+        for number in range(start, start + count):
+            author = Author.objects.create(
+                first_name=f"First {number}", last_name=f"Last {number}"
+            )
+            book = Book.objects.create(
+                title=f"Title {number}",
+                summary="Summary",
+                isbn=f"ISBN{number:09d}",
+                author=author,
+                language=self.language,
+            )
+            book.genre.set(self.genres)
+            BookInstance.objects.create(
+                book=book, imprint="Imprint", status="o", borrower=self.borrower
+            )
+
+    def test_book_list_query_count(self):
+        # The throttle's token, the page of books joined to author, and the
+        # genre ids.
+        self.create_books(3)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("book-list"))
+        self.assertEqual(len(response.data["results"]), 3)
+
+        self.create_books(10)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("book-list"))
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["genre"], ["Fantasy", "Horror"])
+
+    def test_book_retrieve_query_count(self):
+        self.create_books(1)
+        book = Book.objects.get()
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("book-detail", args=[book.pk]))
+        self.assertEqual(response.data["author"], "First 0 Last 0")
+        self.assertEqual(response.data["language"], "English")
+
+    def test_bookinstance_list_query_count(self):
+        # The throttle's token and the page of copies joined to book and borrower.
+        self.create_books(3)
+        with self.assertNumQueries(2):
+            self.client.get(reverse("bookinstance-list"))
+
+        self.create_books(10)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("bookinstance-list"))
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertEqual(response.data["results"][0]["borrower"], "borrower")
+
+    def test_cursor_pages_cover_every_book_once(self):
+        self.create_books(25)
+        titles = []
+        url = reverse("book-list")
+        while url:
+            response = self.client.get(url)
+            self.assertNotIn("count", response.data)
+            titles += [book["title"] for book in response.data["results"]]
+            url = response.data["next"]
+        self.assertEqual(titles, sorted(f"Title {number}" for number in range(25)))
+
+    def test_previous_link_returns_to_earlier_page(self):
+        self.create_books(15)
+        first = self.client.get(reverse("book-list"))
+        second = self.client.get(first.data["next"])
+        self.assertIsNone(second.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+        self.assertIsNone(back.data["previous"])
+
+    def test_invalid_cursor_is_not_found(self):
+        response = self.client.get(reverse("book-list"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class BulkWriteTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="1X<ISRUkw+tuK"
+        )
+        cls.language = Language.objects.create(name="English")
+        cls.genres = [Genre.objects.create(name=name) for name in ("Fantasy", "Horror")]
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.book = Book.objects.create(
+            title="Existing", summary="Summary", isbn="ISBN000000000", author=cls.author
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        self.url = reverse("bookinstance-bulk-create")
+
+    def copies(self, count):
+        return [
+            {"book": self.book.pk, "imprint": f"Imprint {number}"}
+            for number in range(count)
+        ]
+
+    def test_bulk_create_copies(self):
+        response = self.client.post(self.url, self.copies(3), format="json")
+        self.assertEqual(response.status_code, 201)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], [201] * 3)
+        self.assertEqual(results[2]["data"]["imprint"], "Imprint 2")
+        self.assertEqual(results[2]["data"]["book"], "Existing")
+        self.assertEqual(BookInstance.objects.count(), 3)
+        self.assertEqual(CatalogStatistics.load().num_instances, 3)
+
+    def test_bulk_create_query_count_does_not_grow_with_items(self):
+        with CaptureQueriesContext(connection) as few:
+            self.client.post(self.url, self.copies(2), format="json")
+        with CaptureQueriesContext(connection) as many:
+            self.client.post(self.url, self.copies(40), format="json")
+        self.assertEqual(len(many), len(few))
+        self.assertEqual(BookInstance.objects.count(), 42)
+
+    def test_invalid_item_rejects_whole_request(self):
+        items = self.copies(3)
+        items[1]["book"] = 999
+        response = self.client.post(self.url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 400, 424]
+        )
+        self.assertIn("book", response.data["results"][1]["errors"])
+        self.assertFalse(BookInstance.objects.exists())
+
+    def test_rejects_non_list_payload(self):
+        response = self.client.post(self.url, {"book": self.book.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_books_checks_unique_isbn(self):
+        item = {
+            "title": "New",
+            "summary": "Summary",
+            "author": self.author.pk,
+            "language": self.language.pk,
+            "genre": [genre.pk for genre in self.genres],
+        }
+        items = [
+            dict(item, isbn="ISBN000000000"),
+            dict(item, isbn="ISBN000000001"),
+            dict(item, isbn="ISBN000000001"),
+        ]
+        response = self.client.post(reverse("book-bulk-create"), items, format="json")
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [400, 424, 400]
+        )
+
+        response = self.client.post(
+            reverse("book-bulk-create"), items[1:2], format="json"
+        )
+        self.assertEqual(response.status_code, 201)
+        data = response.data["results"][0]["data"]
+        self.assertEqual(data["genre"], ["Fantasy", "Horror"])
+        self.assertEqual(data["author"], "John Smith")
+        self.assertEqual(
+            list(search.search_books("new")), [Book.objects.get(title="New")]
+        )
+        self.assertEqual(CatalogStatistics.load().num_books, 2)
+
+    def test_bulk_partial_update(self):
+        copies = [
+            BookInstance.objects.create(book=self.book, imprint="Old", status="a")
+            for _ in range(2)
+        ]
+        other = Book.objects.create(title="Other", summary="Summary", isbn="ISBN9")
+        items = [
+            {"id": str(copies[0].pk), "imprint": "New"},
+            {"id": copies[1].pk.hex, "book": other.pk},
+        ]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][1]["data"]["book"], "Other")
+        copies[0].refresh_from_db()
+        copies[1].refresh_from_db()
+        self.assertEqual(copies[0].imprint, "New")
+        self.assertEqual(copies[1].book, other)
+        self.assertEqual([copy.version for copy in copies], [0, 0])
+
+        # A change to the loan moves the version, as single saves do.
+        items = [{"id": str(copies[0].pk), "due_back": "2030-01-01"}]
+        self.assertEqual(
+            self.client.patch(self.url, items, format="json").status_code, 200
+        )
+        copies[0].refresh_from_db()
+        self.assertEqual(copies[0].version, 1)
+
+    def test_bulk_partial_update_unknown_id(self):
+        copy = BookInstance.objects.create(book=self.book, imprint="Old")
+        items = [{"id": str(copy.pk), "imprint": "New"}, {"id": "missing"}]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 404]
+        )
+        copy.refresh_from_db()
+        self.assertEqual(copy.imprint, "Old")
+
+    def test_bulk_partial_update_checks_object_permissions(self):
+        clerk = User.objects.create_user(username="clerk", password="1X<ISRUkw+tuK")
+        clerk.user_permissions.add(
+            Permission.objects.get(codename="change_bookinstance")
+        )
+        copy = BookInstance.objects.create(book=self.book, imprint="Old")
+        self.client.force_authenticate(clerk)
+        # The model permission is not the object permission the view requires.
+        response = self.client.patch(
+            reverse("bookinstance-detail", args=[copy.pk]),
+            {"imprint": "single"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 403)
+
+        items = [{"id": str(copy.pk), "imprint": "bulk"}]
+        response = self.client.patch(self.url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["results"][0]["status"], 403)
+        copy.refresh_from_db()
+        self.assertEqual(copy.imprint, "Old")
+
+    def test_bulk_update_books_replaces_genres(self):
+        self.book.genre.set(self.genres)
+        items = [{"id": self.book.pk, "title": "Renamed", "genre": [self.genres[1].pk]}]
+        response = self.client.patch(reverse("book-bulk-create"), items, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["data"]["genre"], ["Horror"])
+        self.assertEqual(list(search.search_books("renamed")), [self.book])
+
+    def test_bulk_update_books_checks_unique_isbn_of_unchanged_rows(self):
+        other = Book.objects.create(title="Other", summary="Summary", isbn="ISBN9")
+        url = reverse("book-bulk-create")
+        # The second item keeps its isbn, so the first may not take it.
+        items = [
+            {"id": self.book.pk, "isbn": "ISBN9"},
+            {"id": other.pk, "title": "Renamed"},
+        ]
+        response = self.client.patch(url, items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [400, 424]
+        )
+
+        items = [
+            {"id": self.book.pk, "isbn": "ISBN8"},
+            {"id": other.pk, "isbn": "ISBN8"},
+        ]
+        response = self.client.patch(url, items, format="json")
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 400]
+        )
+
+        items = [{"id": self.book.pk, "isbn": "ISBN000000000", "title": "Same"}]
+        response = self.client.patch(url, items, format="json")
+        self.assertEqual(response.status_code, 200)
+
+    def test_bulk_update_rejects_duplicate_ids(self):
+        items = [
+            {"id": self.book.pk, "title": "First"},
+            {"id": self.book.pk, "title": "Second"},
+        ]
+        response = self.client.patch(reverse("book-bulk-create"), items, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]], [424, 400]
+        )
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Existing")
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class ConditionalGetTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="1X<ISRUkw+tuK"
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.book = Book.objects.create(
+            title="Title", summary="Summary", isbn="ISBN000000000", author=cls.author
+        )
+        cls.copy = BookInstance.objects.create(book=cls.book, imprint="Imprint")
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+
+    def test_retrieve_not_modified(self):
+        url = reverse("bookinstance-detail", args=[self.copy.pk])
+        etag = self.client.get(url)["ETag"]
+        # The throttle's token, then just the pk and timestamps, without the
+        # book and borrower joins.
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.book.title = "Renamed"
+        self.book.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["book"], "Renamed")
+
+    def test_list_not_modified(self):
+        url = reverse("book-list")
+        response = self.client.get(url)
+        etag = response["ETag"]
+        with self.assertNumQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        Book.objects.create(title="Another", summary="Summary", isbn="ISBN1")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_if_modified_since(self):
+        url = reverse("author-detail", args=[self.author.pk])
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_list_has_no_last_modified(self):
+        other = Book.objects.create(title="Other", summary="Summary", isbn="ISBN1")
+        url = reverse("book-list")
+        self.assertNotIn("Last-Modified", self.client.get(url))
+
+        # The newest remaining timestamp does not move when a row goes.
+        other.delete()
+        response = self.client.get(
+            url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class SharedThrottleTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="1X<ISRUkw+tuK"
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.admin)
+        self.url = reverse("author-list")
+
+    def test_limit_holds_across_workers(self):
+        # "basic" allows 10 requests an hour.
+        for _ in range(10):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            # What a request landing on another worker would see of DRF's
+            # default per-process history.
+            cache.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "360")
+        # Other scopes have buckets of their own.
+        response = self.client.get(reverse("bookinstance-list"))
+        self.assertEqual(response.status_code, 200)
+
+    def test_tokens_come_back_over_time(self):
+        now = time.time()
+        with mock.patch("api.throttling.SharedScopedRateThrottle.timer") as timer:
+            timer.return_value = now
+            for _ in range(10):
+                self.client.get(self.url)
+            self.assertEqual(self.client.get(self.url).status_code, 429)
+            timer.return_value = now + 360
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+            self.assertEqual(self.client.get(self.url).status_code, 429)
+
+    def test_idle_buckets_are_pruned(self):
+        ThrottleBucket.objects.create(key="idle", tokens=0, updated_at=0, full_at=1)
+        with mock.patch("api.models.PRUNE_EVERY", 1):
+            self.client.get(self.url)
+        self.assertEqual(
+            list(ThrottleBucket.objects.values_list("key", flat=True)),
+            [f"throttle_basic_{self.admin.pk}"],
+        )
+
+
+@override_settings(ROOT_URLCONF="api.urls")
+class CachedAuthenticationTest(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="librarian", password="2HJ1vRV0Z&3iD"
+        )
+        cls.group = Group.objects.create(name="Librarians")
+        cls.group.permissions.add(Permission.objects.get(codename="add_bookinstance"))
+        cls.user.groups.add(cls.group)
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.book = Book.objects.create(
+            title="Title", summary="Summary", isbn="ISBN000000000", author=author
+        )
+
+    def setUp(self):
+        # Snapshots outlive the changes each test rolls back.
+        cache.clear()
+        token = AccessToken.for_user(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.url = reverse("bookinstance-list")
+
+    def create_copy(self):
+        return self.client.post(self.url, {"book": self.book.pk, "imprint": "Imprint"})
+
+    def assertNoAuthQueries(self, queries):
+        for query in queries:
+            self.assertNotIn('FROM "auth_', query["sql"])
+
+    def test_steady_state_makes_no_auth_queries(self):
+        self.assertEqual(self.create_copy().status_code, 201)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.create_copy().status_code, 201)
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertNoAuthQueries(queries)
+
+    def test_permission_changes_invalidate_snapshot(self):
+        self.assertEqual(self.create_copy().status_code, 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.clear()
+        self.assertEqual(self.create_copy().status_code, 403)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(
+                Permission.objects.get(codename="add_bookinstance")
+            )
+        self.assertEqual(self.create_copy().status_code, 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.user_set.clear()
+            self.user.user_permissions.clear()
+        self.assertEqual(self.create_copy().status_code, 403)
+
+    def test_snapshot_is_replaced_once_committed(self):
+        self.assertEqual(self.create_copy().status_code, 201)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.permissions.clear()
+            self.assertEqual(
+                cache.get(authentication._snapshot_key(self.user.pk)), self.user
+            )
+        self.assertIsNone(cache.get(authentication._snapshot_key(self.user.pk)))
+        self.assertEqual(self.create_copy().status_code, 403)
+
+    def test_deactivated_user_is_refused(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["code"], "user_inactive")
@@ -0,0 +1,36 @@
+from rest_framework.throttling import ScopedRateThrottle
+
+from api.models import ThrottleBucket
+
+
+class SharedScopedRateThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle enforced across every worker process.
+
+    DRF's throttles keep each client's request history in the default cache,
+    which is local to a process, so every worker grants the full rate. This
+    one keeps a token bucket per client and scope in the database instead
+    (see ThrottleBucket): the rate's request count is the burst size, and
+    tokens come back evenly over its period. One UPDATE per request, however
+    high the rate.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+        self.wait_seconds = ThrottleBucket.take(
+            self.key,
+            capacity=self.num_requests,
+            rate=self.num_requests / self.duration,
+            now=self.timer(),
+        )
+        return self.wait_seconds is None
+
+    def wait(self):
+        return self.wait_seconds
@@ -1,27 +1,101 @@
+from django.db.models import F
 from rest_framework import viewsets
 from rest_framework.permissions import DjangoObjectPermissions, IsAdminUser
 
+from api.bulk import BulkModelMixin
+from api.conditional import ConditionalGetMixin
 from api.serializers import AuthorSerializer, BookInstanceSerializer, BookSerializer
-from catalog.models import Author, Book, BookInstance
+from catalog import caching, search
+from catalog.models import Author, Book, BookInstance, CatalogStatistics
+from catalog.routing import ReplicaReadMixin
+from catalog.signals import loan_changed, mark_books_changed, mark_changed
 
+# Actions whose responses are rendered through the serializers' to_representation.
+READ_ACTIONS = (
+    "list",
+    "retrieve",
+    "create",
+    "update",
+    "partial_update",
+    "bulk_create",
+    "bulk_update",
+)
 
-class AuthorViewSet(viewsets.ModelViewSet):
+
+class AuthorViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     permission_classes = [IsAdminUser]
     throttle_scope = "basic"
 
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, BulkModelMixin, viewsets.ModelViewSet
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAdminUser]
     throttle_scope = "basic"
     filterset_fields = ["genre"]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in READ_ACTIONS:
+            # BookSerializer renders the author's name, and the language and
+            # genre names from catalog.reference.
+            queryset = queryset.select_related("author").prefetch_related("genre")
+        return queryset
+
+    # bulk_create and bulk_update bypass the signals keeping these in sync.
+    def bulk_created(self, books):
+        search.index_books(books)
+        mark_changed("author", {book.author_id for book in books})
+        CatalogStatistics.adjust(num_books=len(books))
+
+    def bulk_updated(self, books):
+        search.index_books(books)
+        caching.bump_versions("book", [book.pk for book in books])
+        mark_changed(
+            "author",
+            {book.author_id for book in books}
+            | {book._loaded_author_id for book in books},
+        )
+
 
-class BookInstanceViewSet(viewsets.ModelViewSet):
+class BookInstanceViewSet(
+    ReplicaReadMixin, ConditionalGetMixin, BulkModelMixin, viewsets.ModelViewSet
+):
     queryset = BookInstance.objects.all()
     serializer_class = BookInstanceSerializer
     permission_classes = [DjangoObjectPermissions]
     throttle_scope = "premium"
+    # Copies are rendered with their book's title.
+    updated_at_fields = ("updated_at", "book__updated_at")
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in READ_ACTIONS:
+            # BookInstanceSerializer renders the book title and borrower username.
+            queryset = queryset.select_related("book", "borrower")
+        return queryset
+
+    # bulk_create and bulk_update bypass the signals keeping these in sync.
+    def bulk_created(self, copies):
+        CatalogStatistics.adjust(
+            num_instances=len(copies),
+            num_instances_available=sum(copy.status == "a" for copy in copies),
+        )
+        mark_books_changed({copy.book_id for copy in copies})
+
+    def bulk_updated(self, copies):
+        changed = [copy.pk for copy in copies if loan_changed(copy)]
+        if changed:
+            BookInstance.objects.filter(pk__in=changed).update(version=F("version") + 1)
+        CatalogStatistics.adjust(
+            num_instances_available=sum(copy.status == "a" for copy in copies)
+            - sum(copy._loaded_status == "a" for copy in copies)
+        )
+        mark_books_changed(
+            {copy.book_id for copy in copies}
+            | {copy._loaded_book_id for copy in copies}
+        )
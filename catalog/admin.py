@@ -1,41 +1,151 @@
+import datetime
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
 
-from .models import Author, Book, BookInstance, Genre, Language
+from .models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+    OverdueNotice,
+)
+from .signals import COUNTED_MODELS
 
 # Register your models here.
 admin.site.register(Genre)
 admin.site.register(Language)
 
 
-class BooksInstanceInline(admin.TabularInline):
-    model = BookInstance
+class EstimatedCountPaginator(Paginator):
+    """Paginator for changelists over tables too large to count on every load.
+
+    An unfiltered list takes its size from the counters on CatalogStatistics;
+    a filtered one counts at most ``max_count`` rows, so only the first
+    ``max_count // per_page`` pages of a broad filter are reachable.
+    """
+
+    max_count = 10_000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        field = COUNTED_MODELS.get(queryset.model)
+        if field and not queryset.query.where:
+            return getattr(CatalogStatistics.load(), field)
+        return queryset[: self.max_count].count()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Skips the second, unfiltered COUNT(*) behind "N results (M total)".
+    show_full_result_count = False
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset showing one page of the related objects at a time."""
+
+    per_page = 20
+    page_number = 1
+
+    def get_queryset(self):
+        if not hasattr(self, "page"):
+            queryset = super().get_queryset()
+            ordering = queryset.query.order_by or self.model._meta.ordering
+            # The primary key keeps a page's rows stable between GET and POST.
+            paginator = Paginator(queryset.order_by(*ordering, "pk"), self.per_page)
+            self.page = paginator.get_page(self.page_number)
+        return self.page.object_list
+
+
+class PaginatedInline(admin.TabularInline):
+    formset = PaginatedInlineFormSet
+    template = "admin/catalog/paginated_tabular.html"
     extra = 0
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.page_param = f"{self.model._meta.model_name}_page"
+        formset.page_number = request.GET.get(formset.page_param)
+        return formset
+
 
-class BookInline(admin.TabularInline):
+class BooksInstanceInline(PaginatedInline):
+    model = BookInstance
+    raw_id_fields = ("borrower",)
+
+
+class BookInline(PaginatedInline):
     model = Book
-    extra = 0
 
 
 @admin.register(Author)
-class AuthorAdmin(admin.ModelAdmin):
+class AuthorAdmin(LargeTableAdmin):
     list_display = ("last_name", "first_name", "date_of_birth", "date_of_death")
     fields = ["first_name", "last_name", ("date_of_birth", "date_of_death")]
     inlines = [BookInline]
+    # Prefix searches, also used by the author autocomplete on BookAdmin.
+    search_fields = ("^last_name", "^first_name")
 
 
 @admin.register(Book)
-class BookAdmin(admin.ModelAdmin):
+class BookAdmin(LargeTableAdmin):
     list_display = ("title", "author", "display_genre")
+    list_select_related = ("author",)
     inlines = [BooksInstanceInline]
+    search_fields = ("^title", "=isbn")
+    autocomplete_fields = ("author",)
+
+    def get_queryset(self, request):
+        # display_genre slices genre.all(), which reads the prefetched genres.
+        return super().get_queryset(request).prefetch_related("genre")
+
+
+class DueListFilter(admin.SimpleListFilter):
+    """Filters copies on loan by due date.
+
+    Replaces a plain ``due_back`` filter: both choices are limited to copies
+    on loan, so they read the partial ``bookinstance_on_loan_idx`` index.
+    """
+
+    title = "due back"
+    parameter_name = "due"
+
+    def lookups(self, request, model_admin):
+        return (("overdue", "Overdue"), ("week", "Due within a week"))
+
+    def queryset(self, request, queryset):
+        today = datetime.date.today()
+        if self.value() == "overdue":
+            return queryset.filter(status="o", due_back__lt=today)
+        if self.value() == "week":
+            return queryset.filter(
+                status="o",
+                due_back__range=(today, today + datetime.timedelta(days=7)),
+            )
+        return queryset
 
 
 @admin.register(BookInstance)
-class BookInstanceAdmin(admin.ModelAdmin):
+class BookInstanceAdmin(LargeTableAdmin):
     list_display = ("book", "status", "borrower", "due_back", "id")
-    list_filter = ("status", "due_back")
+    list_filter = ("status", DueListFilter)
+    list_select_related = ("book", "borrower")
+    autocomplete_fields = ("book", "borrower")
 
     fieldsets = (
         (None, {"fields": ("book", "imprint", "id")}),
         ("Availability", {"fields": ("status", "due_back", "borrower")}),
     )
+
+
+@admin.register(OverdueNotice)
+class OverdueNoticeAdmin(LargeTableAdmin):
+    list_display = ("book_instance", "borrower", "due_back", "sent_at")
+    list_filter = ("sent_at",)
+    list_select_related = ("book_instance__book", "borrower")
+    raw_id_fields = ("book_instance", "borrower")
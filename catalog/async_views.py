@@ -0,0 +1,93 @@
+"""Async versions of the read-heavy catalog views, served by config.asgi_urls.
+
+Under an ASGI server the views in catalog.views each hold a worker thread for
+the whole request. These read their data with Django's async ORM instead, and
+start independent queries (a page and its count, the statistics row and the
+visit counter) together with ``asyncio.gather``. Django still executes the ORM
+calls of one request one at a time on a thread of its own, so the gain is in
+how many requests can wait on the database at once, not in the latency of
+each. Templates are rendered through ``sync_to_async`` because the base
+template checks the user's permissions, which only the sync ORM can do.
+Where they can, they build their queries and context with the same helpers as
+the sync views.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import render
+from django.utils.translation import gettext_lazy as _
+from django.views import View
+
+from catalog import search, views, visits
+from catalog.models import Book, CatalogStatistics
+from catalog.pagination import InvalidCursor, KeysetPaginator, apaginate
+
+
+async def _load_statistics():
+    stats = await CatalogStatistics.objects.filter(pk=1).afirst()
+    return stats or await sync_to_async(CatalogStatistics.recount)()
+
+
+async def index(request):
+    """Async version of catalog.views.index."""
+    num_visits = visits.get_visit_count(request)
+    stats, _ = await asyncio.gather(
+        _load_statistics(), sync_to_async(visits.home_page_views.add)()
+    )
+    context = views.index_context(stats, num_visits)
+    response = await sync_to_async(render)(request, "catalog/index.html", context)
+    visits.set_visit_count(response, num_visits + 1)
+    return response
+
+
+async def available_book(request):
+    """Async version of catalog.views.available_book."""
+    user = await request.auser()
+    can_change = await sync_to_async(user.has_perm)("catalog.change_bookinstance")
+    statuses, status, instances = views.available_book_query(request, can_change)
+    page_obj = await apaginate(
+        instances, views.AVAILABLE_BOOKS_PER_PAGE, request.GET.get("page")
+    )
+    context = views.available_book_context(statuses, status, page_obj)
+    return await sync_to_async(render)(request, "catalog/available_book.html", context)
+
+
+async def search_results(request):
+    """Async version of catalog.views.SearchResultListView."""
+    query = request.GET.get("q", "")
+    page_obj = await apaginate(search.search_books(query), 10, request.GET.get("page"))
+    context = {
+        "query": query,
+        "paginator": page_obj.paginator,
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "object_list": page_obj.object_list,
+        "book_list": page_obj.object_list,
+    }
+    return await sync_to_async(render)(request, "catalog/search_result.html", context)
+
+
+class BookListView(View):
+    """Async version of catalog.views.BookListView."""
+
+    paginate_by = 10
+
+    async def get(self, request):
+        # The template shows each book's author.
+        paginator = KeysetPaginator(
+            Book.objects.select_related("author"), self.paginate_by
+        )
+        try:
+            page = await paginator.apage(request.GET.get("cursor"))
+        except InvalidCursor:
+            raise Http404(_("Invalid cursor."))
+        context = {
+            "paginator": paginator,
+            "page_obj": page,
+            "is_paginated": page.has_other_pages(),
+            "object_list": page.object_list,
+            "book_list": page.object_list,
+        }
+        return await sync_to_async(render)(request, "catalog/book_list.html", context)
@@ -0,0 +1,49 @@
+"""Version stamps for cached fragments of catalog pages.
+
+Every cached fragment of a book or author page is keyed on a version stamp of
+that object. The stamps live in the ``shared`` cache, which all workers see,
+and are replaced by the signal handlers in catalog.signals whenever the object,
+its copies, its author or its genres change. Fragments themselves can then be
+stored in the process-local default cache: a changed object gets a new stamp,
+so stale fragments are simply never looked up again.
+"""
+
+import uuid
+
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_CACHE = "shared"
+
+# How long rendered fragments are kept, in seconds.
+FRAGMENT_TIMEOUT = 60 * 60
+
+
+def _key(kind, pk):
+    return f"catalog:version:{kind}:{pk}"
+
+
+def get_version(kind, pk):
+    """Returns the current version stamp of an object, e.g. a ``book`` or ``author``."""
+    cache = caches[VERSION_CACHE]
+    key = _key(kind, pk)
+    version = cache.get(key)
+    if version is None:
+        # Another worker may be racing to create it: keep whichever got stored.
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_versions(kind, pks):
+    """Gives the objects new version stamps, invalidating their fragments.
+
+    The stamps move once the current transaction commits. Moved any earlier, a
+    request reading the old rows meanwhile would cache its fragments under the
+    new stamps, where they would outlive the change.
+    """
+    stamps = {_key(kind, pk): uuid.uuid4().hex for pk in pks if pk is not None}
+    if stamps:
+        transaction.on_commit(
+            lambda: caches[VERSION_CACHE].set_many(stamps, timeout=None)
+        )
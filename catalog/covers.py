@@ -0,0 +1,120 @@
+"""Resized and WebP derivatives of uploaded book covers.
+
+For a cover stored as ``images/name.jpg`` the derivatives are saved next to
+it, under names such as ``images/name.thumb.jpg`` and ``images/name.medium.jpg``
+in the original format and a ``.webp`` encoding of each size including the
+full one (``images/name.webp``). They go through the storage like uploads do,
+so a name already taken, by another upload say, gets a free variant instead of
+being overwritten. The names actually saved are recorded on
+``Book.cover_derivatives`` and the widths produced on ``Book.cover_widths``,
+so templates can build ``srcset`` attributes without touching the filesystem.
+"""
+
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Maximum width in pixels of each derivative. Covers narrower than a size
+# do not get that derivative; the full-size image is used instead.
+COVER_SIZES = {"thumb": 150, "medium": 400}
+
+FULL_SIZE = "full"
+
+JPEG_OPTIONS = {"quality": 85, "optimize": True, "progressive": True}
+WEBP_OPTIONS = {"quality": 80, "method": 6}
+
+
+def derivative_name(name, size, webp=False):
+    """Returns the name proposed to the storage for a cover derivative."""
+    stem, extension = os.path.splitext(name)
+    if webp:
+        extension = ".webp"
+    if size == FULL_SIZE:
+        return stem + extension
+    return f"{stem}.{size}{extension}"
+
+
+def render_derivatives(path):
+    """Encodes every derivative of the image at ``path``.
+
+    Returns ``(widths, images)``: the width of each size produced, and the
+    encoded bytes of each derivative keyed by ``(size, webp)``. Only Pillow is
+    used, so this can run in a worker process.
+    """
+    with Image.open(path) as original:
+        image_format = original.format
+        image = ImageOps.exif_transpose(original)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+    widths = {FULL_SIZE: image.width}
+    images = {(FULL_SIZE, True): _encode(image, "WEBP", WEBP_OPTIONS)}
+
+    for size, width in COVER_SIZES.items():
+        if image.width <= width:
+            continue
+        height = max(round(image.height * width / image.width), 1)
+        resized = image.resize((width, height), Image.Resampling.LANCZOS)
+        options = JPEG_OPTIONS if image_format == "JPEG" else {}
+        if image_format == "JPEG" and resized.mode == "RGBA":
+            resized = resized.convert("RGB")
+        images[size, False] = _encode(resized, image_format, options)
+        images[size, True] = _encode(resized, "WEBP", WEBP_OPTIONS)
+        widths[size] = width
+    return widths, images
+
+
+def _encode(image, image_format, options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def save_derivatives(storage, name, images):
+    """Saves the ``images`` of render_derivatives() for the cover ``name``.
+
+    Returns the storage names they were saved under, as
+    ``{size: {"original": name, "webp": name}}``; the full size has no
+    "original", which is the cover itself.
+    """
+    names = {}
+    for (size, webp), data in images.items():
+        saved = storage.save(derivative_name(name, size, webp), ContentFile(data))
+        names.setdefault(size, {})["webp" if webp else "original"] = saved
+    return names
+
+
+def generate_derivatives(storage, name):
+    """Renders and saves every derivative of the cover ``name``.
+
+    Returns ``(widths, names)`` as recorded on ``Book.cover_widths`` and
+    ``Book.cover_derivatives``.
+    """
+    widths, images = render_derivatives(storage.path(name))
+    return widths, save_derivatives(storage, name, images)
+
+
+def delete_derivatives(storage, names):
+    """Deletes the derivatives listed in ``names``, as save_derivatives() returns."""
+    for files in names.values():
+        for derivative in files.values():
+            storage.delete(derivative)
+
+
+def render_in_pool(paths, workers=None):
+    """Renders the derivatives of many covers in parallel worker processes.
+
+    Yields ``(path, result)`` pairs, where ``result`` is what
+    render_derivatives() returns, or the exception raised if that cover could
+    not be processed. Saving the images is left to the caller's storage.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [(path, pool.submit(render_derivatives, path)) for path in paths]
+        for path, future in futures:
+            try:
+                yield path, future.result()
+            except Exception as e:
+                yield path, e
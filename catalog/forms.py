@@ -2,12 +2,23 @@ import datetime
 
 from django import forms
 from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+from django.forms.utils import flatatt
+from django.urls import reverse_lazy
+from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
-from catalog.models import Author, BookInstance
+from catalog import reference
+from catalog.models import Author, Book, BookInstance
 
 
-class RenewBookForm(forms.Form):
+class LoanVersionForm(forms.Form):
+    # The copy's version when the page was rendered; see catalog.loans.
+    # Without it only the copy's status is checked.
+    version = forms.IntegerField(widget=forms.HiddenInput, required=False)
+
+
+class RenewBookForm(LoanVersionForm):
     renewal_date = forms.DateField(
         help_text="Enter a date between now and 4 weeks (default 3).",
         widget=forms.DateInput(format="%m-%d-%Y", attrs={"type": "date"}),
@@ -55,16 +66,134 @@ class AuthorForm(forms.ModelForm):
         return clean_date_of_death
 
 
+class ReferenceChoiceIterator(ModelChoiceIterator):
+    """Lists the choices from catalog.reference instead of querying."""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in reference.get_table(self.queryset.model).values():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(reference.get_table(self.queryset.model)) + (
+            self.field.empty_label is not None
+        )
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(
+            reference.get_table(self.queryset.model)
+        )
+
+
+def _reference_object(field, value):
+    model = field.queryset.model
+    try:
+        obj = reference.get(model, model._meta.pk.to_python(value))
+    except ValidationError:
+        obj = None
+    if obj is None:
+        raise ValidationError(
+            field.error_messages["invalid_choice"],
+            code="invalid_choice",
+            params={"value": value},
+        )
+    return obj
+
+
+class ReferenceChoiceField(forms.ModelChoiceField):
+    """A ModelChoiceField for a table cached by catalog.reference."""
+
+    iterator = ReferenceChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            return value
+        return _reference_object(self, value)
+
+
+class ReferenceMultipleChoiceField(forms.ModelMultipleChoiceField):
+    """A ModelMultipleChoiceField for a table cached by catalog.reference."""
+
+    iterator = ReferenceChoiceIterator
+
+    def _check_values(self, value):
+        # Returns a list rather than a queryset; saving the form only needs
+        # the objects' primary keys.
+        return [_reference_object(self, pk) for pk in dict.fromkeys(value)]
+
+
+class AutocompleteWidget(forms.Widget):
+    """Search box for a ModelChoiceField over a table too large for a select.
+
+    As the user types, static/js/autocomplete.js fetches a few matches from
+    the JSON endpoint named ``url_name`` (see views.author_autocomplete) and
+    puts the chosen match's primary key in a hidden input. The field then
+    validates that single key, so the full choice list is never loaded.
+    """
+
+    class Media:
+        js = ["js/autocomplete.js"]
+
+    def __init__(self, url_name, attrs=None):
+        super().__init__(attrs)
+        self.url = reverse_lazy(url_name)
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        id_ = attrs.pop("id", f"id_{name}")
+        label = ""
+        if value not in (None, ""):
+            # Set on the widget by ModelChoiceField, which also looks up a
+            # submitted key and rejects a malformed or unknown one.
+            field = self.choices.field
+            try:
+                label = field.label_from_instance(field.to_python(value))
+            except ValidationError:
+                pass
+        return format_html(
+            '<input type="hidden" name="{}" id="{}_value" value="{}">'
+            '<input type="search" id="{}" list="{}_options" value="{}" '
+            'autocomplete="off" data-autocomplete="{}" '
+            'data-autocomplete-target="{}_value"{}>'
+            '<datalist id="{}_options"></datalist>',
+            name,
+            id_,
+            "" if value is None else value,
+            id_,
+            id_,
+            label,
+            self.url,
+            id_,
+            flatatt(attrs),
+            id_,
+        )
+
+
+class BookForm(forms.ModelForm):
+    class Meta:
+        model = Book
+        fields = ["title", "author", "summary", "isbn", "language", "genre", "cover"]
+        field_classes = {
+            "language": ReferenceChoiceField,
+            "genre": ReferenceMultipleChoiceField,
+        }
+        widgets = {"author": AutocompleteWidget("author-autocomplete")}
+
+
 class BookInstanceForm(forms.ModelForm):
     class Meta:
         model = BookInstance
         fields = ["book", "imprint", "due_back", "borrower", "status"]
         widgets = {
+            "book": AutocompleteWidget("book-autocomplete"),
             "due_back": forms.DateInput(attrs={"type": "date"}),
         }
 
 
-class BookInstanceUpdateForm_for_user(forms.ModelForm):
+class BookInstanceUpdateForm_for_user(LoanVersionForm, forms.ModelForm):
     class Meta:
         model = BookInstance
         fields = ["due_back"]
@@ -72,6 +201,10 @@ class BookInstanceUpdateForm_for_user(forms.ModelForm):
             "due_back": forms.DateInput(attrs={"type": "date"}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields["version"].initial = self.instance.version
+
     def clean_due_back(self):
         clean_due_back = self.cleaned_data.get("due_back")
 
@@ -0,0 +1,102 @@
+"""Checkout, return and renewal of book copies.
+
+Each is a single conditional ``UPDATE`` whose ``WHERE`` clause holds the
+state the action expects, e.g. ``status = 'a'`` for a checkout, so of two
+patrons booking the same copy at once exactly one updates a row and the other
+gets LoanConflict. Nothing is locked beyond the write itself, which keeps
+concurrent checkouts of different copies from queueing behind each other.
+
+Every action also moves the copy's ``version`` forward, as does any other
+save changing the loan (see catalog.signals). Callers that pass the version a
+user saw have the action refused if the copy changed since, even if it is back
+in the expected state (say returned and lent again in between).
+
+The updates bypass the model signals, so the availability counter and the
+page caches they maintain are updated here.
+"""
+
+import datetime
+
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from catalog.models import BookInstance, CatalogStatistics
+from catalog.signals import mark_books_changed, remember_copy_fields
+
+# Loan period of a checkout without a due date.
+LOAN_PERIOD = datetime.timedelta(weeks=3)
+
+
+class LoanConflict(Exception):
+    """The copy is no longer in the state the action expects."""
+
+
+def _transition(copy, expected, version, message, **changes):
+    copy_rows = BookInstance.objects.using(copy._state.db or DEFAULT_DB_ALIAS).filter(
+        pk=copy.pk
+    )
+    copies = copy_rows.filter(**expected)
+    if version is not None:
+        copies = copies.filter(version=version)
+    was_available = expected.get("status") == "a"
+    is_available = changes.get("status", expected.get("status")) == "a"
+    with transaction.atomic(using=copies.db):
+        if not copies.update(
+            version=F("version") + 1, updated_at=timezone.now(), **changes
+        ):
+            raise LoanConflict(message)
+        CatalogStatistics.adjust(
+            num_instances_available=int(is_available) - int(was_available)
+        )
+        if version is None:
+            # Still holding the write, so this is the version just written.
+            new_version = copy_rows.values_list("version", flat=True).get()
+        else:
+            new_version = version + 1
+        # Inside the transaction so a failure here leaves the copy untouched.
+        # The version stamps themselves only move once it commits.
+        mark_books_changed([copy.book_id])
+
+    for field, value in changes.items():
+        setattr(copy, field, value)
+    copy.version = new_version
+    # As if the copy had been loaded in this state.
+    remember_copy_fields(BookInstance, copy)
+
+
+def checkout(copy, borrower, due_back=None, version=None):
+    """Lends an available copy to ``borrower``."""
+    _transition(
+        copy,
+        {"status": "a"},
+        version,
+        "Sorry, this copy has just been booked by someone else.",
+        status="o",
+        borrower=borrower,
+        due_back=due_back or datetime.date.today() + LOAN_PERIOD,
+    )
+
+
+def return_copy(copy, version=None):
+    """Marks a copy on loan as returned and available again."""
+    _transition(
+        copy,
+        {"status": "o"},
+        version,
+        "This copy is no longer on loan, or its loan changed meanwhile.",
+        status="a",
+        borrower=None,
+        due_back=None,
+    )
+
+
+def renew(copy, due_back, version=None):
+    """Moves the due date of a copy on loan."""
+    _transition(
+        copy,
+        {"status": "o"},
+        version,
+        "This copy is no longer on loan, or its loan changed meanwhile.",
+        due_back=due_back,
+    )
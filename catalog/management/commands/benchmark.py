@@ -0,0 +1,248 @@
+import json
+import math
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework.views import APIView
+
+import api.urls
+import catalog.urls
+from catalog.models import BookInstance
+
+BENCHMARK_URLCONF = "config.benchmark_urls"
+
+# Routes that change the client's state rather than render a page.
+SKIPPED_ROUTES = {"rest_framework:logout"}
+
+# Query strings that make a route do its real work, with words the seeded titles use.
+QUERY_STRINGS = {"search-results": "?q=shadow"}
+
+
+@contextmanager
+def api_throttling_disabled():
+    """
+    Lets the API answer every timed request instead of 429 after a few.
+
+    The viewsets read their throttle classes from APIView when DRF is
+    imported, so override_settings cannot turn them off.
+    """
+    throttle_classes = APIView.throttle_classes
+    APIView.throttle_classes = ()
+    try:
+        yield
+    finally:
+        APIView.throttle_classes = throttle_classes
+
+
+def percentile(samples, percent):
+    """Returns the nearest-rank percentile of ``samples``."""
+    ordered = sorted(samples)
+    rank = max(math.ceil(percent / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every route in catalog/urls.py and api/urls.py with the test client "
+        "and report latency percentiles and query counts per route, logged in as a "
+        "scratch superuser removed afterwards. Use --save to store the results as a "
+        "baseline and --compare to diff against one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=20,
+            help="Timed requests per route (default 20).",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=2,
+            help="Untimed requests per route before measuring (default 2).",
+        )
+        parser.add_argument(
+            "--route", action="append", help="Only benchmark this route name."
+        )
+        parser.add_argument(
+            "--save", metavar="PATH", help="Write the results to a JSON file."
+        )
+        parser.add_argument(
+            "--compare", metavar="PATH", help="Compare against a saved JSON baseline."
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percent slowdown of p50 reported as a regression (default 10).",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if any route regressed against the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        # A scratch account, so no superuser is left in the database.
+        user = User.objects.create_superuser(
+            username=f"benchmark-{uuid.uuid4().hex[:8]}", email="", password=None
+        )
+        client = Client()
+        try:
+            client.force_login(user)
+            routes = self.routes(options["route"])
+            results = {}
+            with override_settings(
+                ROOT_URLCONF=BENCHMARK_URLCONF, ALLOWED_HOSTS=["*"]
+            ), api_throttling_disabled():
+                for name, path in routes:
+                    results[name] = self.measure(client, path, options)
+                    self.report_route(name, path, results[name])
+        finally:
+            # Also deletes the session force_login stored.
+            client.logout()
+            user.delete()
+
+        errors = [name for name, result in results.items() if result["status"] >= 500]
+        if options["save"]:
+            with open(options["save"], "w") as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+            self.stdout.write(f"Saved results to {options['save']}.")
+        regressions = []
+        if options["compare"]:
+            regressions = self.compare(
+                results, options["compare"], options["threshold"]
+            )
+
+        if errors:
+            raise CommandError(f"Server errors on: {', '.join(errors)}")
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"Regressions on: {', '.join(regressions)}")
+
+    def routes(self, only=None):
+        """Returns ``(name, path)`` for every named route, with sample objects as arguments."""
+        routes = []
+        # The API reuses names such as book-detail, so each module is reversed
+        # on its own and mounted where config.benchmark_urls includes it.
+        for module, prefix, label in (
+            (catalog.urls, "", ""),
+            (api.urls, "/api/v1", "api:"),
+        ):
+            for name, pattern in self.walk(module.urlpatterns):
+                if name in SKIPPED_ROUTES or (only and name not in only):
+                    continue
+                kwargs = self.sample_kwargs(pattern)
+                if kwargs is None:
+                    continue
+                path = prefix + reverse(name, kwargs=kwargs, urlconf=module)
+                path += QUERY_STRINGS.get(name, "")
+                if (label + name, path) not in routes:
+                    routes.append((label + name, path))
+        return routes
+
+    def walk(self, patterns, namespace=None):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                yield from self.walk(
+                    pattern.url_patterns, pattern.namespace or namespace
+                )
+            elif isinstance(pattern, URLPattern) and pattern.name:
+                name = f"{namespace}:{pattern.name}" if namespace else pattern.name
+                yield name, pattern
+
+    def sample_kwargs(self, pattern):
+        """Picks an existing object for each URL argument, or None to skip the route."""
+        converters = getattr(pattern.pattern, "converters", {})
+        arguments = set(converters) or set(pattern.pattern.regex.groupindex)
+        if not arguments:
+            return {}
+        if arguments != {"pk"}:
+            # Format-suffix variants of the API routes.
+            return None
+        callback = pattern.callback
+        model = getattr(getattr(callback, "view_class", None), "model", None)
+        if model is None and hasattr(callback, "cls"):
+            model = callback.cls.queryset.model
+        if model is None:
+            # renew-book-librarian takes a copy on loan.
+            model = BookInstance
+        queryset = model.objects.order_by("pk")
+        if model is BookInstance:
+            queryset = queryset.filter(status="o")
+        obj = queryset.first()
+        if obj is None:
+            raise CommandError(
+                f"No {model.__name__} to request {pattern.name} with; "
+                "run seed_benchmark_data first."
+            )
+        return {"pk": obj.pk}
+
+    def measure(self, client, path, options):
+        for _ in range(options["warmup"]):
+            client.get(path)
+        timings = []
+        query_counts = []
+        status = None
+        for _ in range(options["requests"]):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = client.get(path)
+                if response.streaming:
+                    # Time the whole body, not just the first chunk.
+                    b"".join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            query_counts.append(len(queries))
+            status = response.status_code
+        return {
+            "path": path,
+            "status": status,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": max(query_counts),
+        }
+
+    def report_route(self, name, path, result):
+        self.stdout.write(
+            f"{name:<32} {result['status']:>3}  p50 {result['p50_ms']:>8.2f}ms  "
+            f"p95 {result['p95_ms']:>8.2f}ms  p99 {result['p99_ms']:>8.2f}ms  "
+            f"{result['queries']:>3} queries  {path}"
+        )
+
+    def compare(self, results, baseline_path, threshold):
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        self.stdout.write(f"\nCompared with {baseline_path}:")
+        regressions = []
+        for name, result in results.items():
+            before = baseline.get(name)
+            if before is None:
+                self.stdout.write(f"{name:<32} new route")
+                continue
+            change = (
+                (result["p50_ms"] - before["p50_ms"])
+                / max(before["p50_ms"], 1e-9)
+                * 100
+            )
+            queries = result["queries"] - before["queries"]
+            line = (
+                f"{name:<32} p50 {before['p50_ms']:.2f} -> {result['p50_ms']:.2f}ms "
+                f"({change:+.1f}%)  queries {before['queries']} -> {result['queries']} "
+                f"({queries:+d})"
+            )
+            if change > threshold or queries > 0:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+        return regressions
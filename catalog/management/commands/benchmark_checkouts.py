@@ -0,0 +1,176 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+
+from catalog import loans
+from catalog.management.commands.benchmark import percentile
+from catalog.models import Author, Book, BookInstance
+
+
+class Command(BaseCommand):
+    help = (
+        "Check copies out and return them from many threads at once through "
+        "catalog.loans, then verify that no copy was ever lent twice and report "
+        "the checkouts per second. Works on a scratch book and scratch users, "
+        "removed afterwards; run with --settings to compare database settings."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=16,
+            help="Worker threads, each a patron booking copies (default 16).",
+        )
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=5.0,
+            help="Duration of the run (default 5).",
+        )
+        parser.add_argument(
+            "--copies",
+            type=int,
+            default=10,
+            help="Copies the patrons compete for; fewer means more conflicts "
+            "(default 10).",
+        )
+
+    def handle(self, *args, **options):
+        token = uuid.uuid4().hex[:8]
+        author = Author.objects.create(first_name="Load", last_name=f"Test {token}")
+        book = Book.objects.create(
+            title="Load test",
+            summary="Scratch book",
+            isbn=f"load-{token}",
+            author=author,
+        )
+        copies = [
+            BookInstance.objects.create(book=book, imprint="Scratch", status="a")
+            for _ in range(options["copies"])
+        ]
+        password = make_password(None)
+        users = User.objects.bulk_create(
+            User(username=f"loadtest-{token}-{n}", password=password)
+            for n in range(options["threads"])
+        )
+        try:
+            results = self.run(book, [copy.pk for copy in copies], users, options)
+            double_lends = self.verify(copies, results)
+        finally:
+            BookInstance.objects.filter(book=book).delete()
+            book.delete()
+            author.delete()
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+        self.report(results, double_lends, options["seconds"])
+        if double_lends:
+            raise CommandError(f"{double_lends} copies were lent twice.")
+
+    def run(self, book, copy_ids, users, options):
+        deadline = time.monotonic() + options["seconds"]
+        results = []
+
+        def work(user, seed):
+            rng = random.Random(seed)
+            result = {
+                "timings": [],
+                "transitions": Counter(),
+                "conflicts": 0,
+                "locked": 0,
+                "stolen": 0,
+            }
+            try:
+                while time.monotonic() < deadline:
+                    copy = BookInstance(pk=rng.choice(copy_ids), book_id=book.pk)
+                    started = time.perf_counter()
+                    try:
+                        # No version: only the status decides who gets the copy.
+                        loans.checkout(copy, user)
+                    except loans.LoanConflict:
+                        result["conflicts"] += 1
+                        continue
+                    except OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+                        result["locked"] += 1
+                        continue
+                    finally:
+                        # What request_finished does at the end of every request.
+                        connection.close_if_unusable_or_obsolete()
+                    result["timings"].append(time.perf_counter() - started)
+                    result["transitions"][copy.pk] += 1
+                    self.give_back(copy, result)
+            finally:
+                connection.close()
+            results.append(result)
+
+        threads = [
+            threading.Thread(target=work, args=(user, seed))
+            for seed, user in enumerate(users)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def give_back(self, copy, result):
+        """Returns a copy just checked out, retrying while the database is locked."""
+        while True:
+            try:
+                # With the version of our checkout: had anyone else changed
+                # the loan since, this would conflict.
+                loans.return_copy(copy, version=copy.version)
+            except loans.LoanConflict:
+                result["stolen"] += 1
+                return
+            except OperationalError as exc:
+                if "locked" not in str(exc):
+                    raise
+                result["locked"] += 1
+                time.sleep(0.001)
+                continue
+            finally:
+                connection.close_if_unusable_or_obsolete()
+            result["transitions"][copy.pk] += 1
+            return
+
+    def verify(self, copies, results):
+        """Returns the number of copies whose history shows a double lend.
+
+        Every successful checkout or return moved the copy's version forward
+        by one, so a version lower than the transitions the workers counted
+        means two of them updated the copy from the same state.
+        """
+        transitions = Counter()
+        for result in results:
+            transitions.update(result["transitions"])
+        stored = {
+            copy["pk"]: copy
+            for copy in BookInstance.objects.filter(
+                pk__in=[copy.pk for copy in copies]
+            ).values("pk", "version", "status")
+        }
+        broken = {
+            pk
+            for pk, copy in stored.items()
+            if copy["version"] != transitions[pk] or copy["status"] != "a"
+        }
+        return len(broken) + sum(result["stolen"] for result in results)
+
+    def report(self, results, double_lends, seconds):
+        timings = [t * 1000 for result in results for t in result["timings"]]
+        conflicts = sum(result["conflicts"] for result in results)
+        locked = sum(result["locked"] for result in results)
+        self.stdout.write(
+            f"{len(timings) / seconds:>9.1f} checkouts/s  "
+            f"{len(timings)} checkouts (p95 {percentile(timings or [0], 95):.2f}ms)  "
+            f"{conflicts} conflicts  {locked} locked  {double_lends} double lends"
+        )
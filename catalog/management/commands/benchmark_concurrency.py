@@ -0,0 +1,125 @@
+import asyncio
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from catalog.management.commands.benchmark import (
+    BENCHMARK_URLCONF,
+    api_throttling_disabled,
+    percentile,
+)
+from catalog.models import Book
+
+ASGI_BENCHMARK_URLCONF = "config.benchmark_asgi_urls"
+
+# The views with async versions in catalog.async_views and api.async_views.
+DEFAULT_PATHS = (
+    "/",
+    "/books/",
+    "/availablebooks/",
+    "/search/?q=shadow",
+    "/api/v1/book/",
+    "/api/v1/book/{book}/",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the read-heavy views served synchronously "
+        "(WSGI, one thread per request) and asynchronously (ASGI, one event loop) "
+        "with many requests in flight at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Requests in flight at once (default 50).",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="Requests per path and mode (default 500).",
+        )
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Path to request; may be repeated (default: every async view).",
+        )
+
+    def handle(self, *args, **options):
+        book = Book.objects.order_by("pk").first()
+        if book is None:
+            raise CommandError("No books to request; run seed_benchmark_data first.")
+        paths = [path.format(book=book.pk) for path in options["path"] or DEFAULT_PATHS]
+
+        user, _ = User.objects.get_or_create(
+            username="benchmark", defaults={"is_staff": True, "is_superuser": True}
+        )
+        login = Client()
+        login.force_login(user)
+        self.cookies = login.cookies
+
+        with override_settings(ALLOWED_HOSTS=["*"]), api_throttling_disabled():
+            for path in paths:
+                with override_settings(ROOT_URLCONF=BENCHMARK_URLCONF):
+                    wsgi = self.run_wsgi(path, options)
+                with override_settings(ROOT_URLCONF=ASGI_BENCHMARK_URLCONF):
+                    asgi = asyncio.run(self.run_asgi(path, options))
+                self.report(path, "wsgi", wsgi)
+                self.report(path, "asgi", asgi)
+
+    def client(self, client_class):
+        client = client_class()
+        client.cookies = SimpleCookie(self.cookies.output(header="", sep=";"))
+        return client
+
+    def run_wsgi(self, path, options):
+        local = threading.local()
+
+        def request(_):
+            # Test clients are not thread-safe; keep one per thread.
+            if not hasattr(local, "client"):
+                local.client = self.client(Client)
+            started = time.perf_counter()
+            response = local.client.get(path)
+            return response.status_code, time.perf_counter() - started
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(request, range(options["requests"])))
+        return results, time.perf_counter() - started
+
+    async def run_asgi(self, path, options):
+        remaining = iter(range(options["requests"]))
+        results = []
+
+        async def worker():
+            client = self.client(AsyncClient)
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path)
+                results.append((response.status_code, time.perf_counter() - started))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(options["concurrency"])))
+        return results, time.perf_counter() - started
+
+    def report(self, path, mode, measurement):
+        results, elapsed = measurement
+        timings = [seconds * 1000 for _, seconds in results]
+        errors = sum(status >= 400 for status, _ in results)
+        self.stdout.write(
+            f"{path:<28} {mode}  {len(results) / elapsed:>8.1f} req/s  "
+            f"p50 {percentile(timings, 50):>8.2f}ms  "
+            f"p95 {percentile(timings, 95):>8.2f}ms  "
+            f"mean {statistics.fmean(timings):>8.2f}ms  {errors} errors"
+        )
@@ -0,0 +1,56 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog import export
+
+
+class Command(BaseCommand):
+    help = (
+        "Write every book copy with its book, author and borrower as CSV or NDJSON, "
+        "streaming from the database in constant memory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            choices=sorted(export.FORMATS),
+            default="csv",
+            help="Output format (default csv).",
+        )
+        parser.add_argument("--gzip", action="store_true", help="Gzip the output.")
+        parser.add_argument(
+            "--output",
+            "-o",
+            default="-",
+            help="File to write to (default: standard output).",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=2000,
+            help="Rows fetched from the database at a time (default 2000).",
+        )
+
+    def handle(self, *args, **options):
+        chunks = export.export_inventory(
+            options["format"], options["gzip"], options["chunk_size"]
+        )
+        started = time.monotonic()
+        written = 0
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+                written += len(chunk)
+            out.flush()
+        else:
+            with open(options["output"], "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk)
+                    written += len(chunk)
+        self.stderr.write(
+            f"Wrote {written} bytes in {time.monotonic() - started:.1f}s.",
+            style_func=None,
+        )
@@ -0,0 +1,277 @@
+import csv
+import json
+import sys
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from catalog import search
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
+from catalog.signals import mark_changed
+
+LOAN_STATUSES = dict(BookInstance.LOAN_STATUS)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream books, authors and copies from a CSV or JSONL file into the catalog. "
+        "Each record needs title, isbn, author_first_name and author_last_name, and "
+        "may have summary, language, genres (';'-separated in CSV), copies, imprint "
+        "and status. Books whose ISBN is already in the catalog are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "path", help="Input file, or '-' to read CSV/JSONL from stdin."
+        )
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="Input format (default: guessed from the file extension).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Records written per transaction (default 1000).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="File recording the number of records committed so far "
+            "(default: <path>.checkpoint).",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Skip the records already committed according to the checkpoint.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or (
+            "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+        )
+        if path == "-" and not options["checkpoint"]:
+            checkpoint = None
+        else:
+            checkpoint = Path(options["checkpoint"] or f"{path}.checkpoint")
+
+        skip = 0
+        if options["resume"]:
+            if checkpoint is None or not checkpoint.exists():
+                raise CommandError("No checkpoint to resume from.")
+            skip = json.loads(checkpoint.read_text())["records"]
+            self.stdout.write(f"Resuming after record {skip}.")
+
+        self.load_lookups()
+        self.totals = dict.fromkeys(
+            ["records", "books", "authors", "copies", "duplicates", "invalid"], 0
+        )
+        started = time.monotonic()
+        stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8")
+        with stream:
+            records = self.read_records(stream, input_format)
+            position = 0
+            batch = []
+            for position, record in enumerate(records, start=1):
+                if position <= skip:
+                    continue
+                batch.append((position, record))
+                if len(batch) >= options["batch_size"]:
+                    self.import_batch(batch, checkpoint, started)
+                    batch = []
+            if batch:
+                self.import_batch(batch, checkpoint, started)
+
+        elapsed = time.monotonic() - started
+        totals = self.totals
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {totals['books']} books, {totals['copies']} copies and "
+                f"{totals['authors']} new authors from {totals['records']} records "
+                f"in {elapsed:.1f}s ({totals['records'] / max(elapsed, 1e-9):.0f} rows/s); "
+                f"skipped {totals['duplicates']} duplicate and {totals['invalid']} "
+                "invalid records."
+            )
+        )
+
+    def read_records(self, stream, input_format):
+        if input_format == "csv":
+            for row in csv.DictReader(stream):
+                row["genres"] = [
+                    name
+                    for name in (row.get("genres") or "").split(";")
+                    if name.strip()
+                ]
+                yield row
+        else:
+            for line in stream:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Still counts as a record, so checkpoints stay aligned.
+                        yield None
+
+    def load_lookups(self):
+        """Loads the reference rows that records are resolved against."""
+        self.authors = {
+            (author.first_name, author.last_name): author
+            for author in Author.objects.only("id", "first_name", "last_name")
+        }
+        self.languages = dict(Language.objects.values_list("name", "id"))
+        self.genres = dict(Genre.objects.values_list("name", "id"))
+
+    def clean(self, position, record):
+        """Returns the normalised record, or None if it cannot be imported."""
+        if not isinstance(record, dict):
+            self.stderr.write(f"Record {position}: not a JSON object, skipped.")
+            return None
+        fields = {
+            key: str(record.get(key) or "").strip()
+            for key in (
+                "title",
+                "isbn",
+                "summary",
+                "author_first_name",
+                "author_last_name",
+                "language",
+                "imprint",
+                "status",
+            )
+        }
+        genres = record.get("genres") or []
+        missing = [
+            key
+            for key in ("title", "isbn", "author_first_name", "author_last_name")
+            if not fields[key]
+        ]
+        if not isinstance(genres, list):
+            # A string would otherwise be imported as one genre per letter.
+            missing.append("genres")
+            genres = []
+        fields["genres"] = [str(name).strip() for name in genres]
+        try:
+            fields["copies"] = int(record.get("copies") or 0)
+        except (TypeError, ValueError):
+            missing.append("copies")
+        fields["status"] = fields["status"] or "m"
+        if fields["status"] not in LOAN_STATUSES or len(fields["isbn"]) > 13:
+            missing.append(
+                "status" if fields["status"] not in LOAN_STATUSES else "isbn"
+            )
+        if missing:
+            self.stderr.write(
+                f"Record {position}: invalid {', '.join(missing)}, skipped."
+            )
+            return None
+        return fields
+
+    def import_batch(self, batch, checkpoint, started):
+        records = []
+        seen = set()
+        for position, record in batch:
+            fields = self.clean(position, record)
+            if fields is None:
+                self.totals["invalid"] += 1
+            elif fields["isbn"] in seen:
+                self.totals["duplicates"] += 1
+            else:
+                seen.add(fields["isbn"])
+                records.append(fields)
+
+        with transaction.atomic():
+            existing = set(
+                Book.objects.filter(isbn__in=seen).values_list("isbn", flat=True)
+            )
+            self.totals["duplicates"] += len(existing)
+            records = [fields for fields in records if fields["isbn"] not in existing]
+
+            new_authors = self.resolve_authors(records)
+            new_genres = self.resolve_names(records, Genre, self.genres)
+            self.resolve_names(records, Language, self.languages)
+
+            books = Book.objects.bulk_create(
+                Book(
+                    title=fields["title"],
+                    isbn=fields["isbn"],
+                    summary=fields["summary"],
+                    author=self.authors[
+                        (fields["author_first_name"], fields["author_last_name"])
+                    ],
+                    language_id=self.languages.get(fields["language"]),
+                )
+                for fields in records
+            )
+            Book.genre.through.objects.bulk_create(
+                Book.genre.through(book_id=book.pk, genre_id=self.genres[name])
+                for book, fields in zip(books, records)
+                for name in dict.fromkeys(fields["genres"])
+            )
+            copies = BookInstance.objects.bulk_create(
+                BookInstance(
+                    book_id=book.pk, imprint=fields["imprint"], status=fields["status"]
+                )
+                for book, fields in zip(books, records)
+                for _ in range(fields["copies"])
+            )
+
+            # bulk_create bypasses the signals keeping these in sync.
+            search.index_books(books)
+            mark_changed("author", {book.author_id for book in books})
+            CatalogStatistics.adjust(
+                num_books=len(books),
+                num_authors=new_authors,
+                num_genres=new_genres,
+                num_instances=len(copies),
+                num_instances_available=sum(copy.status == "a" for copy in copies),
+            )
+
+        self.totals["records"] += len(batch)
+        self.totals["books"] += len(books)
+        self.totals["authors"] += new_authors
+        self.totals["copies"] += len(copies)
+        last_position = batch[-1][0]
+        if checkpoint is not None:
+            checkpoint.write_text(json.dumps({"records": last_position}))
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f"{last_position} records processed, "
+            f"{self.totals['records'] / max(elapsed, 1e-9):.0f} rows/s"
+        )
+
+    def resolve_authors(self, records):
+        """Creates the authors missing from the lookup map and returns how many."""
+        missing = {
+            (fields["author_first_name"], fields["author_last_name"])
+            for fields in records
+        } - self.authors.keys()
+        created = Author.objects.bulk_create(
+            Author(first_name=first_name, last_name=last_name)
+            for first_name, last_name in sorted(missing)
+        )
+        for author in created:
+            self.authors[(author.first_name, author.last_name)] = author
+        return len(created)
+
+    def resolve_names(self, records, model, lookup):
+        """Creates the Genre or Language rows missing from ``lookup`` and returns how many."""
+        if model is Genre:
+            names = {name for fields in records for name in fields["genres"]}
+        else:
+            names = {fields["language"] for fields in records if fields["language"]}
+        missing = names - lookup.keys()
+        if not missing:
+            return 0
+        model.objects.bulk_create(model(name=name) for name in sorted(missing))
+        lookup.update(model.objects.filter(name__in=missing).values_list("name", "id"))
+        return len(missing)
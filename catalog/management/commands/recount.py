@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from catalog.models import CatalogStatistics
+
+
+class Command(BaseCommand):
+    help = "Recompute the catalog statistics shown on the home page."
+
+    def handle(self, *args, **options):
+        stats = CatalogStatistics.recount()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Recounted catalog: {stats.num_books} books, "
+                f"{stats.num_instances} copies ({stats.num_instances_available} available), "
+                f"{stats.num_authors} authors, {stats.num_genres} genres."
+            )
+        )
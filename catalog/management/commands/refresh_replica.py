@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database over the replica with SQLite's online "
+        "backup API. A local stand-in for replication, see catalog.routing."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--replica",
+            default=settings.REPLICA_DATABASE or "replica",
+            help="Alias of the replica database (default REPLICA_DATABASE).",
+        )
+        parser.add_argument(
+            "--loop",
+            type=float,
+            metavar="SECONDS",
+            help="Keep running, refreshing again every SECONDS seconds.",
+        )
+
+    def handle(self, *args, **options):
+        primary = connections[DEFAULT_DB_ALIAS]
+        if options["replica"] not in connections.settings:
+            raise CommandError(f"No database named {options['replica']!r}.")
+        replica = connections[options["replica"]]
+        if primary.vendor != "sqlite" or replica.vendor != "sqlite":
+            raise CommandError("Only SQLite databases can be copied.")
+        if replica.settings_dict["NAME"] == primary.settings_dict["NAME"]:
+            raise CommandError("The replica is the primary database.")
+
+        while True:
+            self.refresh(primary, replica.settings_dict["NAME"])
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
+
+    def refresh(self, primary, name):
+        started = time.monotonic()
+        primary.ensure_connection()
+        # A plain connection, the replica's own settings make it read-only.
+        target = primary.Database.connect(name, timeout=30)
+        try:
+            # The copy is written in one transaction, so readers of the replica
+            # never see it half done. In WAL mode writers of the primary carry on.
+            primary.connection.backup(target)
+        finally:
+            target.close()
+        self.stdout.write(
+            f"Refreshed {name} in {(time.monotonic() - started) * 1000:.0f}ms."
+        )
@@ -0,0 +1,81 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from catalog import covers
+from catalog.models import Book
+from catalog.signals import mark_changed
+
+
+class Command(BaseCommand):
+    help = "Generate the resized and WebP derivatives of existing book covers."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of worker processes (default: one per CPU).",
+        )
+        parser.add_argument(
+            "--missing",
+            action="store_true",
+            help="Only process covers that have no derivatives yet.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Covers handed to the worker pool at a time (default 500).",
+        )
+
+    def handle(self, *args, **options):
+        books = Book.objects.exclude(cover="").exclude(cover__isnull=True)
+        if options["missing"]:
+            books = books.filter(cover_widths={})
+        books = books.only("id", "cover", "cover_widths", "cover_derivatives")
+        books = books.order_by("pk")
+
+        started = time.monotonic()
+        done = failed = 0
+        batch = []
+        for book in books.iterator(chunk_size=options["batch_size"]):
+            batch.append(book)
+            if len(batch) >= options["batch_size"]:
+                processed, errors = self.process(batch, options["workers"])
+                done, failed = done + processed, failed + errors
+                batch = []
+        if batch:
+            processed, errors = self.process(batch, options["workers"])
+            done, failed = done + processed, failed + errors
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Regenerated {done} covers in {elapsed:.1f}s ({failed} failed)."
+            )
+        )
+
+    def process(self, books, workers):
+        by_path = {book.cover.path: book for book in books}
+        updated = []
+        replaced = []
+        failed = 0
+        for path, result in covers.render_in_pool(by_path, workers=workers):
+            if isinstance(result, Exception):
+                self.stderr.write(f"{path}: {result}")
+                failed += 1
+                continue
+            book = by_path[path]
+            widths, images = result
+            replaced.append((book.cover.storage, book.cover_derivatives))
+            book.cover_widths = widths
+            book.cover_derivatives = covers.save_derivatives(
+                book.cover.storage, book.cover.name, images
+            )
+            updated.append(book)
+        Book.objects.bulk_update(updated, ["cover_widths", "cover_derivatives"])
+        # The pages now link the new derivatives.
+        mark_changed("book", [book.pk for book in updated])
+        for storage, names in replaced:
+            covers.delete_derivatives(storage, names)
+        return len(updated), failed
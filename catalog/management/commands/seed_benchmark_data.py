@@ -0,0 +1,214 @@
+import datetime
+import itertools
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog import search
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
+
+FIRST_NAMES = (
+    "James Mary John Patricia Robert Jennifer Michael Linda William Elizabeth David "
+    "Barbara Richard Susan Joseph Jessica Thomas Sarah Charles Karen Maria Ana Jose "
+    "Luis Carmen Wei Yan Hiroshi Yuki Olga Ivan Fatima Ahmed Priya Arjun Chen Mei"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez "
+    "Hernandez Lopez Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee "
+    "Perez Thompson White Harris Sanchez Clark Ramirez Lewis Robinson Walker Young "
+    "Allen King Wright Scott Torres Nguyen Hill Flores Green Adams Nelson Baker Hall "
+    "Rivera Campbell Mitchell Carter Roberts Santos Reyes Cruz Tanaka Sato Ivanov"
+).split()
+TITLE_WORDS = (
+    "shadow river empire garden secret night glass winter city house storm silent "
+    "last first lost golden broken hidden forgotten dark light stone fire water sea "
+    "mountain journey memory promise letter island forest dream war peace machine "
+    "code python data kingdom song star sun moon road bridge tower clock queen king"
+).split()
+SUMMARY_WORDS = (
+    TITLE_WORDS
+    + (
+        "a the of and in on with from about into young old story family love death "
+        "friend stranger world history science guide practical introduction complete"
+    ).split()
+)
+GENRES = (
+    "Fiction Mystery Romance Fantasy Science Fiction Thriller Biography History "
+    "Poetry Programming Philosophy Travel Cooking Horror Children Art Religion "
+    "Economics Politics Health"
+).split(" ")
+LANGUAGES = [
+    "English",
+    "Spanish",
+    "French",
+    "German",
+    "Japanese",
+    "Chinese",
+    "Filipino",
+]
+
+# Loan status distribution of the generated copies.
+STATUS_WEIGHTS = {"a": 60, "o": 25, "r": 5, "m": 10}
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a synthetic catalog for benchmarking. Genre "
+        "popularity and books per author follow skewed (Zipf-like) distributions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--authors", type=int, default=100_000)
+        parser.add_argument("--books", type=int, default=1_000_000)
+        parser.add_argument("--copies", type=int, default=5_000_000)
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        started = time.monotonic()
+
+        genre_ids = self.seed_reference(Genre, GENRES)
+        language_ids = self.seed_reference(Language, LANGUAGES)
+        user_ids = self.seed_users(options["users"])
+        author_ids = self.seed_authors(options["authors"])
+        book_ids = self.seed_books(
+            options["books"], author_ids, genre_ids, language_ids
+        )
+        self.seed_copies(options["copies"], book_ids, user_ids)
+
+        self.stdout.write("Rebuilding statistics and search index...")
+        CatalogStatistics.recount()
+        search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"Seeded catalog in {time.monotonic() - started:.1f}s.")
+        )
+
+    def skewed(self, population, exponent=1.1):
+        """Returns cumulative Zipf weights for ``random.choices``."""
+        weights = [1 / (rank**exponent) for rank in range(1, len(population) + 1)]
+        return list(itertools.accumulate(weights))
+
+    def insert(self, model, objects, total, label):
+        """Bulk inserts ``objects`` in batches and returns the new primary keys."""
+        pks = []
+        started = time.monotonic()
+        batch = []
+        for obj in objects:
+            batch.append(obj)
+            if len(batch) >= self.batch_size:
+                pks += self.insert_batch(model, batch)
+                batch = []
+                rate = len(pks) / max(time.monotonic() - started, 1e-9)
+                self.stdout.write(f"  {label}: {len(pks)}/{total} ({rate:.0f} rows/s)")
+        if batch:
+            pks += self.insert_batch(model, batch)
+        self.stdout.write(f"Inserted {len(pks)} {label}.")
+        return pks
+
+    def insert_batch(self, model, batch):
+        with transaction.atomic():
+            return [obj.pk for obj in model.objects.bulk_create(batch)]
+
+    def seed_reference(self, model, names):
+        model.objects.bulk_create(
+            [model(name=name) for name in names], ignore_conflicts=True
+        )
+        return list(
+            model.objects.filter(name__in=names)
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+
+    def seed_users(self, count):
+        password = make_password(None)
+        start = User.objects.count()
+        users = (
+            User(username=f"reader{start + n}", password=password) for n in range(count)
+        )
+        return self.insert(User, users, count, "users")
+
+    def seed_authors(self, count):
+        choice = self.random.choice
+        authors = (
+            Author(
+                first_name=choice(FIRST_NAMES),
+                last_name=choice(LAST_NAMES),
+                date_of_birth=datetime.date(1900, 1, 1)
+                + datetime.timedelta(days=self.random.randrange(36_500)),
+            )
+            for _ in range(count)
+        )
+        return self.insert(Author, authors, count, "authors")
+
+    def seed_books(self, count, author_ids, genre_ids, language_ids):
+        author_weights = self.skewed(author_ids, exponent=0.8)
+        language_weights = self.skewed(language_ids, exponent=2)
+        authors = self.random.choices(author_ids, cum_weights=author_weights, k=count)
+        languages = self.random.choices(
+            language_ids, cum_weights=language_weights, k=count
+        )
+        isbn_start = 9_790_000_000_000 + Book.objects.count()
+        sample = self.random.sample
+        books = (
+            Book(
+                title=" ".join(sample(TITLE_WORDS, self.random.randint(1, 4))).title(),
+                summary=" ".join(self.random.choices(SUMMARY_WORDS, k=30)),
+                isbn=str(isbn_start + n),
+                author_id=authors[n],
+                language_id=languages[n],
+            )
+            for n in range(count)
+        )
+        book_ids = self.insert(Book, books, count, "books")
+
+        genre_weights = self.skewed(genre_ids)
+        links = (
+            Book.genre.through(book_id=book_id, genre_id=genre_id)
+            for book_id in book_ids
+            for genre_id in set(
+                self.random.choices(
+                    genre_ids, cum_weights=genre_weights, k=self.random.randint(1, 3)
+                )
+            )
+        )
+        self.insert(Book.genre.through, links, "~2x books", "genre links")
+        return book_ids
+
+    def seed_copies(self, count, book_ids, user_ids):
+        statuses = list(STATUS_WEIGHTS)
+        status_weights = list(itertools.accumulate(STATUS_WEIGHTS.values()))
+        book_weights = self.skewed(book_ids, exponent=0.5)
+        today = datetime.date.today()
+
+        def copies():
+            for _ in range(count):
+                status = self.random.choices(statuses, cum_weights=status_weights)[0]
+                on_loan = status == "o" and user_ids
+                yield BookInstance(
+                    book_id=self.random.choices(book_ids, cum_weights=book_weights)[0],
+                    imprint=f"{self.random.choice(LAST_NAMES)} Press, "
+                    f"{self.random.randint(1950, today.year)}",
+                    status=status,
+                    borrower_id=self.random.choice(user_ids) if on_loan else None,
+                    due_back=(
+                        today + datetime.timedelta(days=self.random.randint(-30, 28))
+                        if on_loan
+                        else None
+                    ),
+                )
+
+        self.insert(BookInstance, copies(), count, "copies")
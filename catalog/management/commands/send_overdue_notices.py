@@ -0,0 +1,92 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from catalog import overdue
+
+
+class Command(BaseCommand):
+    help = (
+        "Email every borrower a reminder listing their overdue loans. Loans are "
+        "reminded about once per due date, so the command can run as often as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Loans read from the database per query (default 1000).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=100,
+            help="Emails sent over one backend connection (default 100).",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Number of sending threads (default 4).",
+        )
+        parser.add_argument(
+            "--loop",
+            type=int,
+            metavar="SECONDS",
+            help="Keep running, sweeping again every SECONDS seconds.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="List the reminders that would be sent without sending them.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options)
+            if not options["loop"]:
+                break
+            time.sleep(options["loop"])
+
+    def sweep(self, options):
+        today = date.today()
+        started = time.monotonic()
+        groups = overdue.overdue_loans(today, chunk_size=options["chunk_size"])
+
+        if options["dry_run"]:
+            for borrower, copies in groups:
+                self.stdout.write(f"{borrower.email}: {len(copies)} overdue")
+            return
+
+        sent = loans = failed = 0
+        for batch, result in overdue.send_in_pool(
+            self.batches(groups, today, options["batch_size"]),
+            workers=options["workers"],
+        ):
+            if isinstance(result, Exception):
+                self.stderr.write(f"Sending {len(batch)} reminders failed: {result}")
+                failed += len(batch)
+                continue
+            copies = [copy for _, group in batch for copy in group]
+            overdue.record_notices(copies)
+            sent, loans = sent + len(batch), loans + len(copies)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Sent {sent} reminders for {loans} overdue loans in {elapsed:.1f}s "
+                f"({failed} failed)."
+            )
+        )
+
+    def batches(self, groups, today, batch_size):
+        batch = []
+        for borrower, copies in groups:
+            batch.append((overdue.build_message(borrower, copies, today), copies))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -0,0 +1,154 @@
+import datetime
+import random
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from catalog.management.commands.benchmark import percentile
+from catalog.models import Book, BookInstance
+from config import production_settings
+
+# Database settings compared by the command, before NAME points at a copy.
+PROFILES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3"},
+    "production": production_settings.DATABASES["default"],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a concurrent read/write workload against copies of the SQLite "
+        "database, once with the default settings and once with the production "
+        "profile from config.production_settings, and report the throughput and "
+        "the 'database is locked' errors of each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=16,
+            help="Worker threads, each standing in for a server thread (default 16).",
+        )
+        parser.add_argument(
+            "--seconds",
+            type=float,
+            default=10.0,
+            help="Duration of each run (default 10).",
+        )
+        parser.add_argument(
+            "--writes",
+            type=int,
+            default=20,
+            help="Percent of operations that check out or return a copy (default 20).",
+        )
+        parser.add_argument(
+            "--profile",
+            action="append",
+            choices=sorted(PROFILES),
+            help="Only run this profile; may be repeated (default: all).",
+        )
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != "sqlite":
+            raise CommandError("The stress test compares SQLite settings.")
+        copy_ids = list(BookInstance.objects.values_list("pk", flat=True)[:10_000])
+        book_ids = list(Book.objects.values_list("pk", flat=True)[:10_000])
+        if not copy_ids:
+            raise CommandError("No copies to check out; run seed_benchmark_data first.")
+
+        with tempfile.TemporaryDirectory() as directory:
+            for name in options["profile"] or PROFILES:
+                path = Path(directory) / f"{name}.sqlite3"
+                self.copy_database(path)
+                alias = f"stress-{name}"
+                connections.settings[alias] = connections.configure_settings(
+                    {DEFAULT_DB_ALIAS: {**PROFILES[name], "NAME": path}}
+                )[DEFAULT_DB_ALIAS]
+                try:
+                    results = self.run(alias, copy_ids, book_ids, options)
+                finally:
+                    del connections.settings[alias]
+                self.report(name, results, options["seconds"])
+
+    def copy_database(self, path):
+        """Copies the default database to ``path`` with SQLite's backup API."""
+        connection = connections[DEFAULT_DB_ALIAS]
+        connection.ensure_connection()
+        with connection.Database.connect(path) as target:
+            connection.connection.backup(target)
+            # Start from a rollback journal even if the source uses WAL.
+            target.execute("PRAGMA journal_mode = DELETE")
+        target.close()
+
+    def run(self, alias, copy_ids, book_ids, options):
+        deadline = time.monotonic() + options["seconds"]
+        results = []
+
+        def work(seed):
+            rng = random.Random(seed)
+            timings = {"read": [], "write": []}
+            locked = 0
+            connection = connections[alias]
+            try:
+                while time.monotonic() < deadline:
+                    kind = "write" if rng.randrange(100) < options["writes"] else "read"
+                    started = time.perf_counter()
+                    try:
+                        if kind == "write":
+                            self.toggle_loan(alias, rng.choice(copy_ids))
+                        else:
+                            self.read_book(alias, rng.choice(book_ids))
+                    except OperationalError as exc:
+                        if "locked" not in str(exc):
+                            raise
+                        locked += 1
+                    else:
+                        timings[kind].append(time.perf_counter() - started)
+                    # What request_finished does at the end of every request.
+                    connection.close_if_unusable_or_obsolete()
+            finally:
+                connection.close()
+            results.append((timings, locked))
+
+        threads = [
+            threading.Thread(target=work, args=(seed,))
+            for seed in range(options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def toggle_loan(self, alias, pk):
+        """Checks a copy out, or returns it if it is already on loan."""
+        copies = BookInstance.objects.using(alias).filter(pk=pk)
+        due_back = datetime.date.today() + datetime.timedelta(weeks=3)
+        if not copies.filter(status="a").update(status="o", due_back=due_back):
+            copies.update(status="a", due_back=None)
+
+    def read_book(self, alias, pk):
+        """Runs the queries of a book's detail page."""
+        book = (
+            Book.objects.using(alias)
+            .select_related("author", "language")
+            .prefetch_related("genre")
+            .get(pk=pk)
+        )
+        list(book.bookinstance_set.all())
+
+    def report(self, name, results, seconds):
+        reads = [t * 1000 for timings, _ in results for t in timings["read"]]
+        writes = [t * 1000 for timings, _ in results for t in timings["write"]]
+        locked = sum(locked for _, locked in results)
+        self.stdout.write(
+            f"{name:<10} {(len(reads) + len(writes)) / seconds:>9.1f} ops/s  "
+            f"reads {len(reads):>7} (p95 {percentile(reads or [0], 95):>7.2f}ms)  "
+            f"writes {len(writes):>6} (p95 {percentile(writes or [0], 95):>7.2f}ms)  "
+            f"{locked} locked"
+        )
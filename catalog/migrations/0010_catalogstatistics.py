@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_alter_book_cover'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogStatistics',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_books', models.IntegerField(default=0)),
+                ('num_instances', models.IntegerField(default=0)),
+                ('num_instances_available', models.IntegerField(default=0)),
+                ('num_authors', models.IntegerField(default=0)),
+                ('num_genres', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'catalog statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute(
+        "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_book_fts USING fts5("
+        "title, author, summary, isbn, tokenize='unicode61 remove_diacritics 2', "
+        "prefix='2 3')"
+    )
+    schema_editor.execute(
+        "INSERT INTO catalog_book_fts (rowid, title, author, summary, isbn) "
+        "SELECT b.id, b.title, "
+        "COALESCE(a.first_name || ' ' || a.last_name, ''), b.summary, b.isbn "
+        "FROM catalog_book b LEFT JOIN catalog_author a ON a.id = b.author_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS catalog_book_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_catalogstatistics'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
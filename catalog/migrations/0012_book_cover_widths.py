@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_book_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_widths',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
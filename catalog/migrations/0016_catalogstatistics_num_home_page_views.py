@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='catalogstatistics',
+            name='num_home_page_views',
+            field=models.BigIntegerField(default=0),
+        ),
+    ]
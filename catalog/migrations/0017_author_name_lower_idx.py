@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-18 17:59
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_catalogstatistics_num_home_page_views'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='author',
+            index=models.Index(django.db.models.functions.text.Lower('last_name'), django.db.models.functions.text.Lower('first_name'), name='author_name_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.0.1 on 2026-10-18 18:36
+
+import os
+
+from django.db import migrations, models
+
+
+def record_existing_derivatives(apps, schema_editor):
+    # Derivatives written before their names were recorded sit next to the
+    # cover under fixed names.
+    Book = apps.get_model("catalog", "Book")
+    books = Book.objects.exclude(cover_widths={}).only("cover", "cover_widths")
+    for book in books.iterator():
+        stem, extension = os.path.splitext(book.cover.name)
+        names = {}
+        for size in book.cover_widths:
+            if size == "full":
+                names[size] = {"webp": f"{stem}.webp"}
+            else:
+                names[size] = {
+                    "original": f"{stem}.{size}{extension}",
+                    "webp": f"{stem}.{size}.webp",
+                }
+        Book.objects.filter(pk=book.pk).update(cover_derivatives=names)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0018_bookinstance_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='cover_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.RunPython(record_existing_derivatives, migrations.RunPython.noop),
+    ]
@@ -3,8 +3,11 @@ from datetime import date
 
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Lower
 from django.urls import reverse
 
+from catalog import covers
+
 
 # Create your models here.
 class Genre(models.Model):
@@ -55,6 +58,11 @@ class Book(models.Model):
         null=True,
         help_text="Submit a cover of the book",
     )
+    # Widths in pixels of the cover derivatives generated by catalog.covers,
+    # keyed by size name. Empty until the derivatives exist.
+    cover_widths = models.JSONField(default=dict, blank=True, editable=False)
+    # Storage names of those derivatives, see catalog.covers.save_derivatives.
+    cover_derivatives = models.JSONField(default=dict, blank=True, editable=False)
     # Foreign Key used because book can only have one author, but authors can have multiple books.
     # Author as a string rather than object because it hasn't been declared yet in file.
 
@@ -74,8 +82,16 @@ class Book(models.Model):
     # Genre class has already been defined so we can specify the object above.
     genre = models.ManyToManyField(Genre, help_text="Select a genre for this book")
 
+    # Also moved forward when the book's copies, author or genres change; see
+    # catalog.conditional.
+    updated_at = models.DateTimeField(auto_now=True)
+
     class Meta:
         ordering = ["title"]
+        indexes = [
+            # BookListView and the API page through books by (title, id).
+            models.Index(fields=["title", "id"], name="book_title_idx"),
+        ]
 
     def __str__(self):
         """String for representing the Model object."""
@@ -91,6 +107,28 @@ class Book(models.Model):
 
     display_genre.short_description = "Genre"
 
+    def cover_url(self, size="medium", webp=False):
+        """Returns the URL of a cover derivative, falling back to the original upload."""
+        name = self.cover_derivatives.get(size, {}).get("webp" if webp else "original")
+        if name is None:
+            return self.cover.url
+        return self.cover.storage.url(name)
+
+    def cover_srcset(self, webp=False):
+        """Returns a srcset attribute value listing every cover derivative."""
+        if not self.cover_widths:
+            return ""
+        return ", ".join(
+            f"{self.cover_url(size, webp=webp)} {width}w"
+            for size, width in sorted(
+                self.cover_widths.items(), key=lambda item: item[1]
+            )
+        )
+
+    @property
+    def cover_webp_srcset(self):
+        return self.cover_srcset(webp=True)
+
 
 class BookInstance(models.Model):
     """Model representing a specific copy of a book (i.e. that can be borrowed from the library)."""
@@ -119,9 +157,29 @@ class BookInstance(models.Model):
         default="m",
         help_text="Book availability",
     )
+    updated_at = models.DateTimeField(auto_now=True)
+    # Moved forward by every change to the loan; see catalog.loans.
+    version = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ["due_back"]
+        indexes = [
+            # available_book: one status, paged by (due_back, id).
+            models.Index(
+                fields=["status", "due_back", "id"], name="bookinstance_status_idx"
+            ),
+            # LoanedBooksByUserListView: a borrower's copies on loan.
+            models.Index(
+                fields=["borrower", "status", "due_back", "id"],
+                name="bookinstance_borrower_idx",
+            ),
+            # LoanedBooksListView: every copy on loan, soonest due first.
+            models.Index(
+                fields=["due_back", "id"],
+                condition=models.Q(status="o"),
+                name="bookinstance_on_loan_idx",
+            ),
+        ]
         permissions = (
             ("can_mark_returned", "Set book as returned"),
             ("can_renew", "Set renewed book"),
@@ -138,6 +196,33 @@ class BookInstance(models.Model):
         return bool(self.due_back and date.today() > self.due_back)
 
 
+class OverdueNotice(models.Model):
+    """Record of a reminder sent for an overdue loan.
+
+    One row per copy and due date, so the ``send_overdue_notices`` sweep never
+    reminds a borrower twice about the same loan, while a renewed loan that
+    runs late again gets a fresh reminder.
+    """
+
+    book_instance = models.ForeignKey(
+        "BookInstance", on_delete=models.CASCADE, related_name="overdue_notices"
+    )
+    borrower = models.ForeignKey(User, on_delete=models.CASCADE)
+    due_back = models.DateField()
+    sent_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["book_instance", "due_back"], name="unique_overdue_notice"
+            )
+        ]
+
+    def __str__(self):
+        """String for representing the Model object."""
+        return f"{self.book_instance_id} due {self.due_back}"
+
+
 class Author(models.Model):
     """Model representing an author."""
 
@@ -145,9 +230,21 @@ class Author(models.Model):
     last_name = models.CharField(max_length=100)
     date_of_birth = models.DateField(null=True, blank=True)
     date_of_death = models.DateField("Died", null=True, blank=True)
+    # Also moved forward when the author's books change; see catalog.conditional.
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["last_name", "first_name"]
+        indexes = [
+            # AuthorListView and the API page through authors by name.
+            models.Index(
+                fields=["last_name", "first_name", "id"], name="author_name_idx"
+            ),
+            # Case-insensitive prefix matches of catalog.search.suggest_authors.
+            models.Index(
+                Lower("last_name"), Lower("first_name"), name="author_name_lower_idx"
+            ),
+        ]
 
     def get_absolute_url(self):
         """Returns the URL to access a particular author instance."""
@@ -156,3 +253,65 @@ class Author(models.Model):
     def __str__(self):
         """String for representing the Model object."""
         return f"{self.last_name}, {self.first_name}"
+
+
+class CatalogStatistics(models.Model):
+    """Single-row table holding the record counts shown on the home page.
+
+    The counters are kept current by the signal handlers in catalog.signals, so
+    the index view reads them with one query instead of counting every table.
+    Run the ``recount`` management command to repair them after bulk writes.
+    """
+
+    num_books = models.IntegerField(default=0)
+    num_instances = models.IntegerField(default=0)
+    num_instances_available = models.IntegerField(default=0)
+    num_authors = models.IntegerField(default=0)
+    num_genres = models.IntegerField(default=0)
+    # Written in batches by catalog.visits, so it trails the live count.
+    num_home_page_views = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = "catalog statistics"
+
+    def __str__(self):
+        """String for representing the Model object."""
+        return "Catalog statistics"
+
+    @classmethod
+    def load(cls):
+        """Returns the statistics row, counting the catalog if it does not exist yet."""
+        try:
+            return cls.objects.get(pk=1)
+        except cls.DoesNotExist:
+            return cls.recount()
+
+    @classmethod
+    def recount(cls):
+        """Recomputes every counter from the catalog tables."""
+        stats, _ = cls.objects.update_or_create(
+            pk=1,
+            defaults={
+                "num_books": Book.objects.count(),
+                "num_instances": BookInstance.objects.count(),
+                "num_instances_available": BookInstance.objects.filter(
+                    status__exact="a"
+                ).count(),
+                "num_authors": Author.objects.count(),
+                "num_genres": Genre.objects.count(),
+            },
+        )
+        return stats
+
+    @classmethod
+    def adjust(cls, **deltas):
+        """Adds the given deltas to the counters, e.g. ``adjust(num_books=1)``."""
+        deltas = {field: delta for field, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        updated = cls.objects.filter(pk=1).update(
+            **{field: models.F(field) + delta for field, delta in deltas.items()}
+        )
+        if not updated:
+            # First write since the table was created: count everything instead.
+            cls.recount()
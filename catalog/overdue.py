@@ -0,0 +1,103 @@
+"""Reminders for overdue loans.
+
+``overdue_loans`` finds the loans past their due date that nobody has been
+reminded about yet with one query, ``status = 'o' AND due_back < today``
+served by ``bookinstance_status_idx``, fetched in chunks. The rows come ordered
+by borrower, so each borrower's loans arrive together and become one email. ``send_in_pool`` hands
+batches of those emails to a thread pool that sends them through the
+configured ``EMAIL_BACKEND``. Each loan is recorded as an OverdueNotice once
+its email has gone out, so a rerun only picks up what is new.
+"""
+
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date
+
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Exists, OuterRef
+from django.template.loader import render_to_string
+
+from catalog.models import BookInstance, OverdueNotice
+
+
+def overdue_loans(today=None, chunk_size=1000):
+    """Yields ``(borrower, copies)`` for every borrower with overdue loans not yet reminded about."""
+    today = today or date.today()
+    reminded = OverdueNotice.objects.filter(
+        book_instance=OuterRef("pk"), due_back=OuterRef("due_back")
+    )
+    queryset = (
+        BookInstance.objects.filter(
+            status="o", due_back__lt=today, borrower__isnull=False
+        )
+        .exclude(borrower__email="")
+        .exclude(Exists(reminded))
+        .select_related("book", "borrower")
+        .order_by("borrower", "due_back", "id")
+    )
+    borrower, copies = None, []
+    for copy in queryset.iterator(chunk_size=chunk_size):
+        if borrower is None or copy.borrower_id != borrower.pk:
+            if copies:
+                yield borrower, copies
+            borrower, copies = copy.borrower, []
+        copies.append(copy)
+    if copies:
+        yield borrower, copies
+
+
+def build_message(borrower, copies, today=None):
+    """Returns the reminder email listing a borrower's overdue ``copies``."""
+    context = {"borrower": borrower, "copies": copies, "today": today or date.today()}
+    return EmailMessage(
+        subject=render_to_string("catalog/overdue_notice_subject.txt", context).strip(),
+        body=render_to_string("catalog/overdue_notice_email.txt", context),
+        to=[borrower.email],
+    )
+
+
+def send_batch(messages):
+    """Sends ``messages`` over a single backend connection."""
+    with get_connection() as connection:
+        return connection.send_messages(messages)
+
+
+def send_in_pool(batches, workers=4):
+    """Sends batches of ``(message, copies)`` pairs from worker threads.
+
+    Yields ``(batch, sent)`` pairs as batches finish, where ``sent`` is the
+    exception raised if the batch could not be sent. At most two batches per
+    worker are queued at a time, so ``batches`` can be a lazy iterable.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {}
+        for batch in batches:
+            messages = [message for message, _ in batch]
+            pending[pool.submit(send_batch, messages)] = batch
+            if len(pending) >= 2 * workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield _result(pending.pop(future), future)
+        for future in list(pending):
+            yield _result(pending.pop(future), future)
+
+
+def _result(batch, future):
+    try:
+        return batch, future.result()
+    except Exception as e:
+        return batch, e
+
+
+def record_notices(copies):
+    """Records that the borrowers of ``copies`` were reminded about them."""
+    OverdueNotice.objects.bulk_create(
+        [
+            OverdueNotice(
+                book_instance_id=copy.pk,
+                borrower_id=copy.borrower_id,
+                due_back=copy.due_back,
+            )
+            for copy in copies
+        ],
+        ignore_conflicts=True,
+    )
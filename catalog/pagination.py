@@ -0,0 +1,224 @@
+"""Keyset (cursor) pagination for querysets.
+
+Instead of ``COUNT(*)`` plus ``OFFSET n``, each page is fetched with a WHERE
+clause on the ordering columns of the row at the edge of the previous page,
+so page N costs the same as page 1. The ordering comes from the queryset (or
+the model's ``Meta.ordering``) with the primary key appended as a tie-breaker,
+e.g. ``(due_back, id)`` for BookInstance. NULLs sort before every other value.
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+from collections.abc import Sequence
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q, QuerySet
+from django.http import Http404
+from django.utils.translation import gettext_lazy as _
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class KeysetPaginator:
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.keys = self._ordering_keys(queryset)
+
+    @staticmethod
+    def _ordering_keys(queryset):
+        """Returns ``(field, descending)`` pairs ending with the primary key."""
+        opts = queryset.model._meta
+        keys = []
+        for name in queryset.query.order_by or opts.ordering:
+            if not isinstance(name, str) or "__" in name or name == "?":
+                raise ValueError(f"Cannot paginate by ordering {name!r} with a keyset.")
+            descending = name.startswith("-")
+            name = name.lstrip("-")
+            field = opts.pk if name == "pk" else opts.get_field(name)
+            keys.append((field, descending))
+        if opts.pk not in [field for field, _ in keys]:
+            keys.append((opts.pk, False))
+        return keys
+
+    def _order_by(self, reverse):
+        order_by = []
+        for field, descending in self.keys:
+            # Only nullable columns need an explicit NULLS placement.
+            nulls = field.null or None
+            if descending != reverse:
+                order_by.append(F(field.attname).desc(nulls_last=nulls))
+            else:
+                order_by.append(F(field.attname).asc(nulls_first=nulls))
+        return order_by
+
+    def _after(self, values, reverse):
+        """Builds the condition selecting rows that follow ``values``."""
+        condition = Q()
+        for position, ((field, descending), value) in enumerate(zip(self.keys, values)):
+            if descending != reverse:
+                # NULLs come last, after every value.
+                if value is None:
+                    term = None
+                elif field.null:
+                    term = Q(**{f"{field.attname}__lt": value}) | Q(
+                        **{f"{field.attname}__isnull": True}
+                    )
+                else:
+                    term = Q(**{f"{field.attname}__lt": value})
+            else:
+                # NULLs come first, before every value.
+                if value is None:
+                    term = Q(**{f"{field.attname}__isnull": False})
+                else:
+                    term = Q(**{f"{field.attname}__gt": value})
+            if term is not None:
+                equal = Q()
+                for (prior, _), prior_value in zip(
+                    self.keys[:position], values[:position]
+                ):
+                    if prior_value is None:
+                        equal &= Q(**{f"{prior.attname}__isnull": True})
+                    else:
+                        equal &= Q(**{prior.attname: prior_value})
+                condition |= equal & term
+        if not condition:
+            # Nothing can follow: only possible when every key is a trailing NULL.
+            return Q(pk__in=[])
+        return condition
+
+    def encode_cursor(self, obj, reverse):
+        values = [getattr(obj, field.attname) for field, _ in self.keys]
+        payload = json.dumps([int(reverse), values], cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            reverse, values = json.loads(base64.urlsafe_b64decode(padded))
+            if len(values) != len(self.keys):
+                raise ValueError
+            values = [
+                None if value is None else field.to_python(value)
+                for (field, _), value in zip(self.keys, values)
+            ]
+        except (TypeError, ValueError, binascii.Error, ValidationError) as e:
+            raise InvalidCursor(cursor) from e
+        return bool(reverse), values
+
+    def _page_queryset(self, cursor):
+        reverse, values = self.decode_cursor(cursor) if cursor else (False, None)
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._after(values, reverse))
+        return reverse, values, queryset[: self.per_page + 1]
+
+    def page(self, cursor=None):
+        """Returns the page following (or, for a previous-page cursor, preceding) ``cursor``."""
+        reverse, values, queryset = self._page_queryset(cursor)
+        return self._make_page(list(queryset), reverse, values)
+
+    async def apage(self, cursor=None):
+        """Async version of page()."""
+        reverse, values, queryset = self._page_queryset(cursor)
+        return self._make_page([row async for row in queryset], reverse, values)
+
+    def _make_page(self, rows, reverse, values):
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+        if reverse:
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=has_more)
+        return KeysetPage(
+            rows, self, has_next=has_more, has_previous=values is not None
+        )
+
+
+class KeysetPage(Sequence):
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next and bool(object_list)
+        self._has_previous = has_previous and bool(object_list)
+
+    def __repr__(self):
+        return f"<KeysetPage of {len(self.object_list)} items>"
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next:
+            return self.paginator.encode_cursor(self.object_list[-1], reverse=False)
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous:
+            return self.paginator.encode_cursor(self.object_list[0], reverse=True)
+
+
+class KeysetPaginationMixin:
+    """ListView mixin paginating with a ``?cursor=`` parameter instead of ``?page=``."""
+
+    cursor_kwarg = "cursor"
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404(_("Invalid cursor."))
+        return (paginator, page, page.object_list, page.has_other_pages())
+
+
+async def apaginate(object_list, per_page, number):
+    """Async counterpart of ``Paginator(object_list, per_page).get_page(number)``.
+
+    The count and the requested page are fetched concurrently; only a page
+    number past the end costs a second fetch of the last page.
+    """
+    paginator = Paginator(object_list, per_page)
+    try:
+        number = max(int(number), 1)
+    except (TypeError, ValueError):
+        number = 1
+
+    async def count():
+        if isinstance(object_list, QuerySet):
+            return await object_list.acount()
+        return await sync_to_async(object_list.count)()
+
+    async def fetch(number):
+        bottom = (number - 1) * per_page
+        if isinstance(object_list, QuerySet):
+            return [row async for row in object_list[bottom : bottom + per_page]]
+        return await sync_to_async(
+            lambda: list(object_list[bottom : bottom + per_page])
+        )()
+
+    # Paginator.count is a cached_property; fill it with the async result.
+    paginator.count, rows = await asyncio.gather(count(), fetch(number))
+    if number > paginator.num_pages:
+        number = paginator.num_pages
+        rows = await fetch(number)
+    return paginator._get_page(rows, number, paginator)
@@ -0,0 +1,101 @@
+"""Process-local cache of the reference tables, Genre and Language.
+
+They hold a few dozen rows that hardly ever change, yet every book form and
+every book in an API response reads them. Each process keeps them in
+dictionaries keyed by primary key. When a row changes, the signal handlers in
+catalog.signals drop the table from this process and, once the transaction
+commits, replace its version stamp in the shared cache (see catalog.caching);
+other processes compare stamps at most every ``CHECK_INTERVAL`` seconds and
+reload a table whose stamp moved.
+
+The cached objects are shared by every request and thread of the process, so
+treat them as read-only.
+"""
+
+import time
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+
+from catalog import caching
+from catalog.models import Genre, Language
+
+MODELS = (Genre, Language)
+
+# Seconds a process trusts its tables before checking their version stamps.
+CHECK_INTERVAL = 5
+
+
+class _Table(NamedTuple):
+    version: str
+    rows: dict
+    checked_at: float
+
+
+_tables = {}
+
+
+def _version(model):
+    return caching.get_version("reference", model._meta.label_lower)
+
+
+def get_table(model):
+    """Returns ``{pk: object}`` for every row of ``model``, ordered by name."""
+    table = _tables.get(model)
+    now = time.monotonic()
+    if table is not None and now - table.checked_at < CHECK_INTERVAL:
+        return table.rows
+    # Read the stamp first: a change committed while the rows load moves it
+    # again, so the next check reloads.
+    version = _version(model)
+    if table is None or table.version != version:
+        rows = {obj.pk: obj for obj in model._default_manager.order_by("name")}
+    else:
+        rows = table.rows
+    _tables[model] = _Table(version, rows, now)
+    return rows
+
+
+def get(model, pk):
+    """Returns the row of ``model`` with primary key ``pk``, or None."""
+    if pk is None:
+        return None
+    rows = get_table(model)
+    if pk not in rows:
+        # Created by another process since this one last checked.
+        _tables.pop(model, None)
+        rows = get_table(model)
+    return rows.get(pk)
+
+
+def load():
+    """Makes sure every reference table is loaded and current."""
+    for model in MODELS:
+        get_table(model)
+
+
+def clear():
+    """Empties this process's tables, e.g. after a test rolled rows back."""
+    _tables.clear()
+
+
+async def aload():
+    """Like load(), but only leaves the event loop when a table needs a query."""
+    now = time.monotonic()
+    if any(
+        model not in _tables or now - _tables[model].checked_at >= CHECK_INTERVAL
+        for model in MODELS
+    ):
+        await sync_to_async(load)()
+
+
+def _publish(model):
+    caching.bump_versions("reference", [model._meta.label_lower])
+    _tables.pop(model, None)
+
+
+def invalidate(model):
+    """Drops ``model``'s table here now, and in every process once committed."""
+    _tables.pop(model, None)
+    transaction.on_commit(lambda: _publish(model))
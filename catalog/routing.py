@@ -0,0 +1,89 @@
+"""Routing of read-only views to a replica of the catalog database.
+
+When the ``REPLICA_DATABASE`` setting names a database alias, the GET, HEAD and
+OPTIONS requests of views using ReplicaReadMixin read catalog models from it. Every
+other query, including all writes and the auth and session tables, stays on
+``default``. A client that has just written is pinned to the primary for
+``REPLICA_PIN_SECONDS`` by a cookie (see PrimaryPinMiddleware), so it reads
+its own writes until the replica has caught up. On a single machine the
+``refresh_replica`` command keeps a SQLite copy of the primary as the replica.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.deprecation import MiddlewareMixin
+
+PIN_COOKIE = "primary_pin"
+
+# Methods that never write, so their requests neither pin nor need the primary.
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+_read_database = ContextVar("read_database", default=None)
+
+
+def replica_for(request):
+    """Returns the database alias the request may read from, or None for the primary."""
+    if request.method not in READ_METHODS or PIN_COOKIE in request.COOKIES:
+        return None
+    return settings.REPLICA_DATABASE
+
+
+@contextmanager
+def reading_from(alias):
+    """Routes the catalog reads made inside the block to ``alias``."""
+    token = _read_database.set(alias)
+    try:
+        yield
+    finally:
+        _read_database.reset(token)
+
+
+class ReplicaReadMixin:
+    """Serves the catalog reads of a view's read-only requests from the replica."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with reading_from(replica_for(request)):
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_database.get()
+        if alias is None or model._meta.app_label != "catalog":
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Follow relations on the database the instance came from.
+            return None
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same rows as the primary.
+        databases = {DEFAULT_DB_ALIAS, settings.REPLICA_DATABASE}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # The replica is copied from the primary, tables and all.
+        if db == settings.REPLICA_DATABASE:
+            return False
+        return None
+
+
+class PrimaryPinMiddleware(MiddlewareMixin):
+    """Pins a client to the primary database for a while after each write request."""
+
+    def process_response(self, request, response):
+        if settings.REPLICA_DATABASE and request.method not in READ_METHODS:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
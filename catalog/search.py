@@ -0,0 +1,229 @@
+"""Full-text search over the book catalog.
+
+On SQLite every book is mirrored into the ``catalog_book_fts`` FTS5 table
+(created by migration 0011 and kept in sync by catalog.signals), and searches
+are BM25-ranked prefix matches against it. On PostgreSQL the same search runs
+against a ``tsvector`` built from the book and author columns. Any other
+backend falls back to ``icontains`` lookups.
+"""
+
+import re
+import string
+
+from django.db import connection, connections, router
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from catalog.models import Author, Book
+
+FTS_TABLE = "catalog_book_fts"
+
+# bm25() weights for the title, author, summary and isbn columns.
+BM25_WEIGHTS = (10.0, 5.0, 1.0, 10.0)
+
+TOKEN_RE = re.compile(r"\w+")
+
+# SQLite's LOWER() only lower-cases ASCII letters.
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _use_fts5():
+    return connection.vendor == "sqlite"
+
+
+def _document(book):
+    author = f"{book.author.first_name} {book.author.last_name}" if book.author else ""
+    return (book.pk, book.title, author, book.summary, book.isbn)
+
+
+def index_books(books):
+    """Adds or replaces the search index rows of the given books."""
+    if not _use_fts5():
+        return
+    rows = [_document(book) for book in books]
+    if not rows:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [(row[0],) for row in rows]
+        )
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE} (rowid, title, author, summary, isbn) "
+            "VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+def unindex_book(pk):
+    """Removes a book from the search index."""
+    if not _use_fts5():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [pk])
+
+
+def rebuild_index(batch_size=2000):
+    """Re-indexes the whole catalog and returns the number of books indexed."""
+    if not _use_fts5():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    total = 0
+    batch = []
+    books = Book.objects.select_related("author").order_by("pk")
+    for book in books.iterator(chunk_size=batch_size):
+        batch.append(book)
+        if len(batch) >= batch_size:
+            index_books(batch)
+            total += len(batch)
+            batch = []
+    index_books(batch)
+    total += len(batch)
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+    return total
+
+
+def _match_expression(query, columns=None):
+    """Turns user input into an FTS5 query matching every word as a prefix.
+
+    With ``columns``, the words must be found in those columns.
+    """
+    expression = " ".join(f'"{token}"*' for token in TOKEN_RE.findall(query))
+    if columns:
+        expression = f"{{{' '.join(columns)}}} : ({expression})"
+    return expression
+
+
+class BookSearchResults:
+    """Lazily evaluated, ranked FTS5 matches that can be handed to a Paginator.
+
+    Counting and slicing each run one query against the FTS5 index; only the
+    books of the requested slice are loaded from the book table.
+    """
+
+    model = Book
+
+    def __init__(self, match):
+        self.match = match
+        # Read the index from wherever the books are read from.
+        self.db = router.db_for_read(Book)
+
+    def count(self):
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT count(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s",
+                [self.match],
+            )
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key : key + 1][0]
+        start = key.start or 0
+        limit = -1 if key.stop is None else max(key.stop - start, 0)
+        weights = ", ".join(str(weight) for weight in BM25_WEIGHTS)
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s OFFSET %s",
+                [self.match, limit, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        books = Book.objects.using(self.db).select_related("author").in_bulk(ids)
+        return [books[pk] for pk in ids if pk in books]
+
+
+def search_books(query):
+    """Returns the books matching ``query``, best matches first."""
+    tokens = TOKEN_RE.findall(query or "")
+    if not tokens:
+        return Book.objects.none()
+
+    if _use_fts5():
+        return BookSearchResults(_match_expression(query))
+
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.search import (
+            SearchQuery,
+            SearchRank,
+            SearchVector,
+        )
+
+        vector = (
+            SearchVector("title", weight="A")
+            + SearchVector("isbn", weight="A")
+            + SearchVector("author__first_name", "author__last_name", weight="B")
+            + SearchVector("summary", weight="D")
+        )
+        search_query = SearchQuery(
+            " & ".join(f"{token}:*" for token in tokens), search_type="raw"
+        )
+        return (
+            Book.objects.select_related("author")
+            .annotate(search=vector, rank=SearchRank(vector, search_query))
+            .filter(search=search_query)
+            .order_by("-rank", "pk")
+        )
+
+    condition = Q()
+    for token in tokens:
+        condition &= (
+            Q(title__icontains=token)
+            | Q(author__first_name__icontains=token)
+            | Q(author__last_name__icontains=token)
+            | Q(summary__icontains=token)
+            | Q(isbn__icontains=token)
+        )
+    return Book.objects.select_related("author").filter(condition)
+
+
+def suggest_books(query, limit=10):
+    """Returns up to ``limit`` books whose title, author or ISBN match ``query``.
+
+    Meant for typeahead widgets: on SQLite the long summaries are not searched.
+    """
+    if not TOKEN_RE.search(query or ""):
+        return []
+    if _use_fts5():
+        results = BookSearchResults(
+            _match_expression(query, columns=("title", "author", "isbn"))
+        )
+    else:
+        results = search_books(query)
+    return list(results[:limit])
+
+
+def suggest_authors(query, limit=10):
+    """Returns up to ``limit`` authors whose last name starts with ``query``.
+
+    A second word, as in "Smith, J", narrows the match on the first name. Both
+    are compared as ranges over the ``LOWER()`` of the names rather than as
+    ``LIKE`` patterns, so they read the ``author_name_lower_idx`` index. The
+    query is lower-cased the way the database does it: on SQLite only ASCII
+    letters are, so "Ém" finds "Émile" but "ém" does not.
+    """
+    query = query or ""
+    if connections[router.db_for_read(Author)].vendor == "sqlite":
+        query = query.translate(_ASCII_LOWER)
+    else:
+        query = query.lower()
+    tokens = TOKEN_RE.findall(query)
+    if not tokens:
+        return []
+    authors = Author.objects.alias(
+        last_lower=Lower("last_name"), first_lower=Lower("first_name")
+    )
+    for field, prefix in zip(("last_lower", "first_lower"), tokens):
+        authors = authors.filter(
+            **{f"{field}__gte": prefix, f"{field}__lt": _prefix_end(prefix)}
+        )
+    return list(authors.order_by("last_lower", "first_lower", "pk")[:limit])
+
+
+def _prefix_end(prefix):
+    """Returns the smallest string greater than every string starting with ``prefix``."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
@@ -0,0 +1,288 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from catalog import caching, covers, reference, search
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
+
+# Counter on CatalogStatistics maintained for each model's row count.
+COUNTED_MODELS = {
+    Book: "num_books",
+    BookInstance: "num_instances",
+    Author: "num_authors",
+    Genre: "num_genres",
+}
+
+
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CatalogStatistics.adjust(**{COUNTED_MODELS[sender]: 1})
+
+
+def count_deleted(sender, instance, **kwargs):
+    CatalogStatistics.adjust(**{COUNTED_MODELS[sender]: -1})
+
+
+# Connected for these models only: a post_delete receiver without a sender
+# would also make every other model's deletes fetch each row first.
+for model in COUNTED_MODELS:
+    post_save.connect(count_created, sender=model)
+    post_delete.connect(count_deleted, sender=model)
+
+
+# Fields of a copy whose change moves its version forward, see catalog.loans.
+LOAN_FIELDS = ("status", "borrower_id", "due_back")
+
+
+def _loan_fields(copy):
+    return tuple(copy.__dict__.get(field) for field in LOAN_FIELDS)
+
+
+def _written_loan_fields(copy, update_fields):
+    """Returns the loan fields as stored once ``update_fields`` were saved."""
+    written = {BookInstance._meta.get_field(name).attname for name in update_fields}
+    return tuple(
+        current if field in written else loaded
+        for field, loaded, current in zip(
+            LOAN_FIELDS, copy._loaded_loan, _loan_fields(copy)
+        )
+    )
+
+
+@receiver(post_init, sender=BookInstance)
+def remember_copy_fields(sender, instance, **kwargs):
+    # Keep the status the copy was loaded with so saves can tell whether
+    # it moved in or out of "available", its book so a move to another
+    # book invalidates both, and its loan so a change to it moves the version.
+    # Read from __dict__ so deferred fields are not fetched.
+    instance._loaded_status = instance.__dict__.get("status")
+    instance._loaded_book_id = instance.__dict__.get("book_id")
+    instance._loaded_loan = _loan_fields(instance)
+
+
+def loan_changed(copy):
+    """Tells whether the loan fields of ``copy`` changed since it was loaded."""
+    return _loan_fields(copy) != copy._loaded_loan
+
+
+@receiver(pre_save, sender=BookInstance)
+def bump_loan_version(sender, instance, raw=False, update_fields=None, **kwargs):
+    # catalog.loans moves the version with each action it takes. Any other
+    # save of the loan, e.g. by staff or in the admin, has to move it too, or
+    # an action checked against the version from before would still pass.
+    if raw or instance._state.adding or not loan_changed(instance):
+        return
+    if update_fields is None or "version" in update_fields:
+        instance.version = F("version") + 1
+        return
+    # update_fields cannot be extended from here; refuse rather than write
+    # the loan under its old version.
+    if _written_loan_fields(instance, update_fields) != instance._loaded_loan:
+        raise ValueError(
+            'Saving the loan of a copy moves its version: add "version" to '
+            "update_fields."
+        )
+
+
+@receiver(post_save, sender=BookInstance)
+def reload_loan_version(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if not isinstance(instance.version, int):
+        # Still the F() expression bump_loan_version saved.
+        instance.refresh_from_db(fields=["version"])
+    if update_fields is None:
+        instance._loaded_loan = _loan_fields(instance)
+    else:
+        # Changes left out of the save are still to be written.
+        instance._loaded_loan = _written_loan_fields(instance, update_fields)
+
+
+@receiver(post_save, sender=BookInstance)
+def count_available_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or "status" not in instance.__dict__:
+        return
+    was_available = not created and instance._loaded_status == "a"
+    is_available = instance.status == "a"
+    CatalogStatistics.adjust(
+        num_instances_available=int(is_available) - int(was_available)
+    )
+    instance._loaded_status = instance.status
+
+
+@receiver(post_delete, sender=BookInstance)
+def count_available_deleted(sender, instance, **kwargs):
+    if instance._loaded_status == "a":
+        CatalogStatistics.adjust(num_instances_available=-1)
+
+
+@receiver(post_save, sender=Book)
+def index_book(sender, instance, raw=False, **kwargs):
+    if not raw:
+        search.index_books([instance])
+
+
+@receiver(post_delete, sender=Book)
+def unindex_book(sender, instance, **kwargs):
+    search.unindex_book(instance.pk)
+
+
+@receiver(post_save, sender=Author)
+def reindex_author_books(sender, instance, created, raw=False, **kwargs):
+    if not created and not raw:
+        search.index_books(instance.book_set.select_related("author"))
+
+
+@receiver(post_init, sender=Book)
+def remember_book_fields(sender, instance, **kwargs):
+    cover = instance.__dict__.get("cover")
+    instance._loaded_cover = getattr(cover, "name", cover)
+    instance._loaded_author_id = instance.__dict__.get("author_id")
+
+
+@receiver(post_save, sender=Book)
+def generate_cover_derivatives(sender, instance, raw=False, **kwargs):
+    if raw or "cover" not in instance.__dict__:
+        return
+    name = instance.cover.name or None
+    previous = instance._loaded_cover or None
+    if name == previous:
+        return
+    instance._loaded_cover = name
+    storage = instance.cover.storage
+    replaced = instance.cover_derivatives
+    if replaced:
+        # Only once the new cover is committed: a rollback keeps the old one.
+        transaction.on_commit(lambda: covers.delete_derivatives(storage, replaced))
+    # Generated in the saving request: there is no task queue to hand it to,
+    # and a few Pillow resizes of one upload stay well under a second.
+    # regenerate_covers uses a process pool for the whole catalog.
+    instance.cover_widths, instance.cover_derivatives = (
+        covers.generate_derivatives(storage, name) if name else ({}, {})
+    )
+    Book.objects.filter(pk=instance.pk).update(
+        cover_widths=instance.cover_widths,
+        cover_derivatives=instance.cover_derivatives,
+    )
+
+
+# Models whose pages are invalidated by mark_changed, by version-stamp kind.
+PAGE_MODELS = {"book": Book, "author": Author}
+
+
+def mark_changed(kind, pks):
+    """Invalidates the cached fragments and HTTP validators of books or authors.
+
+    Bumps their version stamps once the transaction commits (see
+    catalog.caching) and moves their ``updated_at`` forward (see
+    catalog.conditional).
+    """
+    pks = {pk for pk in pks if pk is not None}
+    if not pks:
+        return
+    caching.bump_versions(kind, pks)
+    PAGE_MODELS[kind].objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def mark_books_changed(book_ids, author_ids=()):
+    """Invalidates the pages of the books and of their authors."""
+    book_ids = {pk for pk in book_ids if pk is not None}
+    author_ids = set(author_ids) | set(
+        Book.objects.filter(pk__in=book_ids).values_list("author_id", flat=True)
+    )
+    mark_changed("book", book_ids)
+    mark_changed("author", author_ids)
+
+
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def bump_book_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Saving already set the book's own updated_at.
+    caching.bump_versions("book", [instance.pk])
+    mark_changed(
+        "author", {instance.__dict__.get("author_id"), instance._loaded_author_id}
+    )
+    instance._loaded_author_id = instance.__dict__.get("author_id")
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def bump_book_genres_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        mark_changed("book", [instance.pk])
+    elif pk_set:
+        mark_changed("book", pk_set)
+    else:
+        # genre.book_set.clear() does not say which books lost the genre.
+        mark_changed("book", instance.book_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=BookInstance)
+@receiver(post_delete, sender=BookInstance)
+def bump_copy_versions(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    book_id = instance.__dict__.get("book_id")
+    mark_books_changed({book_id, instance._loaded_book_id})
+    instance._loaded_book_id = book_id
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def bump_author_version(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    caching.bump_versions("author", [instance.pk])
+    # Book pages show the author's name.
+    mark_changed("book", instance.book_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+@receiver(post_save, sender=Language)
+@receiver(pre_delete, sender=Language)
+def bump_reference_book_versions(sender, instance, raw=False, **kwargs):
+    # Book pages show the names of their genres and language.
+    if raw or kwargs.get("created"):
+        return
+    mark_changed("book", instance.book_set.values_list("pk", flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Language)
+@receiver(post_delete, sender=Language)
+def invalidate_reference_table(sender, instance, **kwargs):
+    # Also on raw saves: loaddata changes the rows all the same.
+    reference.invalidate(sender)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    # Databases opt in by listing pragmas in their settings, see
+    # config.production_settings.
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in connection.settings_dict.get("PRAGMAS", {}).items():
+            cursor.execute(f"PRAGMA {pragma} = {value}")
@@ -0,0 +1,109 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.admin import PaginatedInlineFormSet
+from catalog.models import Author, Book, BookInstance, Genre, OverdueNotice
+
+User = get_user_model()
+
+
+class AdminChangelistTest(TestCase):
+    """The changelists run the same number of queries however many rows they show."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="1X<ISRUkw+tuK"
+        )
+        cls.genres = [Genre.objects.create(name=name) for name in ("Fantasy", "Horror")]
+        cls.add_rows(0, 2)
+
+    @classmethod
+    def add_rows(cls, start, count):
+        due_back = datetime.date.today() - datetime.timedelta(days=1)
+        for n in range(start, start + count):
+            author = Author.objects.create(first_name="John", last_name=f"Smith{n}")
+            book = Book.objects.create(
+                title=f"Book {n}", summary="Summary", isbn=f"ISBN{n}", author=author
+            )
+            book.genre.set(cls.genres)
+            reader = User.objects.create_user(username=f"reader{n}")
+            copy = BookInstance.objects.create(
+                book=book,
+                imprint="Imprint",
+                status="o",
+                borrower=reader,
+                due_back=due_back,
+            )
+            OverdueNotice.objects.create(
+                book_instance=copy, borrower=reader, due_back=due_back
+            )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def changelist_queries(self, model, query=""):
+        url = reverse(f"admin:catalog_{model._meta.model_name}_changelist") + query
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [query["sql"] for query in queries]
+
+    def test_query_count_does_not_grow_with_rows(self):
+        changelists = [
+            (Author, ""),
+            (Book, ""),
+            (BookInstance, ""),
+            (BookInstance, "?due=overdue"),
+            (BookInstance, "?status__exact=o"),
+            (OverdueNotice, ""),
+        ]
+        before = [len(self.changelist_queries(*args)) for args in changelists]
+        self.add_rows(2, 5)
+        after = [len(self.changelist_queries(*args)) for args in changelists]
+        self.assertEqual(after, before)
+
+    def test_unfiltered_changelist_is_not_counted(self):
+        queries = self.changelist_queries(BookInstance)
+        self.assertFalse(
+            [
+                sql
+                for sql in queries
+                if 'FROM "catalog_bookinstance"' in sql and "COUNT" in sql
+            ]
+        )
+
+    def test_filtered_count_is_capped(self):
+        queries = self.changelist_queries(BookInstance, "?due=week")
+        [count] = [sql for sql in queries if "COUNT" in sql]
+        self.assertIn("LIMIT 10000", count)
+
+
+class PaginatedInlineTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="1X<ISRUkw+tuK"
+        )
+        cls.book = Book.objects.create(title="Book", summary="Summary", isbn="ISBN")
+        for n in range(PaginatedInlineFormSet.per_page + 5):
+            BookInstance.objects.create(book=cls.book, imprint=f"Imprint {n}")
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse("admin:catalog_book_change", args=[self.book.pk])
+
+    def test_inline_shows_one_page(self):
+        response = self.client.get(self.url)
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), PaginatedInlineFormSet.per_page)
+        self.assertContains(response, "Page 1 of 2")
+
+        response = self.client.get(self.url + "?bookinstance_page=2")
+        formset = response.context["inline_admin_formsets"][0].formset
+        self.assertEqual(len(formset.forms), 5)
@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog import visits
+from catalog.models import Author, Book, BookInstance
+
+User = get_user_model()
+
+
+@override_settings(ROOT_URLCONF="config.asgi_urls")
+class AsyncCatalogViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="staffuser", password="2HJ1vRV0Z&3iD"
+        )
+        cls.user.user_permissions.add(
+            Permission.objects.get(codename="change_bookinstance")
+        )
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        for number in range(12):
+            book = Book.objects.create(
+                title=f"Shadow {number:02d}",
+                summary="Summary",
+                isbn=f"ISBN{number}",
+                author=author,
+            )
+            BookInstance.objects.create(
+                book=book, imprint="Imprint", status="a" if number % 2 else "m"
+            )
+
+    def setUp(self):
+        # Writes the views counted here while the test database is still there.
+        self.addCleanup(visits.home_page_views.flush)
+
+    def test_index(self):
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["num_books"], 12)
+        self.assertEqual(response.context["num_instances_available"], 6)
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["num_visits"], 1)
+
+    async def test_index_async(self):
+        response = await self.async_client.get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "12")
+
+    async def test_book_list_pages_with_cursor(self):
+        response = await self.async_client.get(reverse("books"))
+        self.assertEqual(len(response.context["book_list"]), 10)
+        self.assertContains(response, "John")
+        page = response.context["page_obj"]
+        response = await self.async_client.get(
+            reverse("books"), {"cursor": page.next_cursor}
+        )
+        self.assertEqual(
+            [book.title for book in response.context["book_list"]],
+            ["Shadow 10", "Shadow 11"],
+        )
+
+        response = await self.async_client.get(reverse("books"), {"cursor": "bad"})
+        self.assertEqual(response.status_code, 404)
+
+    async def test_available_books_tabs(self):
+        response = await self.async_client.get(
+            reverse("available-books"), {"status": "m"}
+        )
+        self.assertEqual(response.context["status"], "a")
+        self.assertEqual(len(response.context["book_instances"]), 6)
+
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(
+            reverse("available-books"), {"status": "m", "page": "9"}
+        )
+        self.assertEqual(response.context["status"], "m")
+        self.assertEqual(response.context["page_obj"].number, 1)
+        self.assertEqual(len(response.context["book_instances"]), 6)
+
+    async def test_search_results(self):
+        response = await self.async_client.get(
+            reverse("search-results"), {"q": "shadow", "page": "2"}
+        )
+        self.assertEqual(response.context["page_obj"].paginator.count, 12)
+        self.assertEqual(len(response.context["book_list"]), 2)
+
+
+@override_settings(ROOT_URLCONF="api.async_urls")
+class AsyncAPIViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", password="1X<ISRUkw+tuK"
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.books = [
+            Book.objects.create(
+                title=f"Title {number:02d}",
+                summary="Summary",
+                isbn=f"ISBN{number}",
+                author=cls.author,
+            )
+            for number in range(12)
+        ]
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(reverse("book-list"))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_list_and_retrieve(self):
+        await self.async_client.aforce_login(self.admin)
+        response = await self.async_client.get(reverse("book-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Last-Modified", response)
+        data = response.json()
+        self.assertEqual(len(data["results"]), 10)
+        self.assertEqual(data["results"][0]["author"], "John Smith")
+
+        response = await self.async_client.get(data["next"])
+        self.assertEqual(len(response.json()["results"]), 2)
+
+        url = reverse("book-detail", args=[self.books[0].pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()["title"], "Title 00")
+        response = await self.async_client.get(
+            url, headers={"if-none-match": response["ETag"]}
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = await self.async_client.get(reverse("book-detail", args=[999]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_writes_use_the_viewsets(self):
+        self.client.force_login(self.admin)
+        response = self.client.post(
+            reverse("author-list"),
+            {"first_name": "Jane", "last_name": "Doe"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(Author.objects.filter(last_name="Doe").exists())
@@ -0,0 +1,419 @@
+import datetime
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from PIL import Image
+
+from catalog import visits
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+    OverdueNotice,
+)
+from config import production_settings
+
+CSV_HEADER = "title,isbn,summary,author_first_name,author_last_name,language,genres,copies,imprint,status\n"
+
+
+class ImportCatalogCommandTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        Author.objects.create(first_name="Eric", last_name="Matthes")
+        Genre.objects.create(name="Programming")
+
+    def write(self, name, content):
+        path = Path(self.directory.name) / name
+        path.write_text(content)
+        return str(path)
+
+    def test_imports_csv(self):
+        path = self.write(
+            "books.csv",
+            CSV_HEADER
+            + "Python Crash Course,9781718502703,Intro,Eric,Matthes,English,Programming;Python,2,No Starch,a\n"
+            + "Automate,9781593279929,Scripts,Al,Sweigart,English,Python,1,No Starch,\n"
+            + "Duplicate,9781718502703,Again,Eric,Matthes,English,,1,,\n"
+            + "No isbn,,Summary,Al,Sweigart,English,,0,,\n",
+        )
+        call_command(
+            "import_catalog",
+            path,
+            "--batch-size",
+            "2",
+            stdout=StringIO(),
+            stderr=StringIO(),
+        )
+
+        self.assertEqual(Book.objects.count(), 2)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(Language.objects.get().name, "English")
+        book = Book.objects.get(isbn="9781718502703")
+        self.assertEqual(book.author.last_name, "Matthes")
+        self.assertEqual(
+            sorted(genre.name for genre in book.genre.all()), ["Programming", "Python"]
+        )
+        self.assertEqual(book.bookinstance_set.filter(status="a").count(), 2)
+        self.assertEqual(
+            BookInstance.objects.get(book__isbn="9781593279929").status, "m"
+        )
+
+        stats = CatalogStatistics.load()
+        self.assertEqual(
+            (stats.num_books, stats.num_instances, stats.num_instances_available),
+            (2, 3, 2),
+        )
+        self.assertEqual((stats.num_authors, stats.num_genres), (2, 2))
+
+    def test_imports_jsonl_and_resumes_from_checkpoint(self):
+        lines = [
+            {
+                "title": f"Book {n}",
+                "isbn": f"ISBN{n}",
+                "author_first_name": "A",
+                "author_last_name": "B",
+                "genres": ["Programming"],
+                "copies": 1,
+            }
+            for n in range(5)
+        ]
+        path = self.write(
+            "books.jsonl", "".join(json.dumps(line) + "\n" for line in lines)
+        )
+        Path(path + ".checkpoint").write_text(json.dumps({"records": 3}))
+
+        call_command("import_catalog", path, "--resume", stdout=StringIO())
+
+        self.assertEqual(
+            sorted(Book.objects.values_list("title", flat=True)), ["Book 3", "Book 4"]
+        )
+        self.assertEqual(
+            json.loads(Path(path + ".checkpoint").read_text()), {"records": 5}
+        )
+
+    def test_skips_malformed_jsonl_records(self):
+        valid = {
+            "title": "Valid",
+            "isbn": "ISBN1",
+            "author_first_name": "A",
+            "author_last_name": "B",
+        }
+        lines = [
+            "{not json",
+            "[]",
+            '"x"',
+            json.dumps({**valid, "isbn": "ISBN2", "genres": "Fantasy"}),
+            json.dumps(valid),
+        ]
+        path = self.write("books.jsonl", "".join(line + "\n" for line in lines))
+        out, err = StringIO(), StringIO()
+
+        call_command("import_catalog", path, stdout=out, stderr=err)
+
+        self.assertEqual(list(Book.objects.values_list("title", flat=True)), ["Valid"])
+        self.assertFalse(Genre.objects.filter(name="F").exists())
+        self.assertIn("skipped 0 duplicate and 4 invalid records", out.getvalue())
+        self.assertIn("Record 4: invalid genres", err.getvalue())
+        self.assertEqual(
+            json.loads(Path(path + ".checkpoint").read_text()), {"records": 5}
+        )
+
+
+class RegenerateCoversCommandTest(TestCase):
+    def test_backfills_missing_derivatives(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(
+            MEDIA_ROOT=media_root
+        ):
+            (Path(media_root) / "images").mkdir()
+            Image.new("RGB", (500, 700), "navy").save(
+                Path(media_root) / "images" / "old.jpg"
+            )
+            book = Book.objects.create(
+                title="Book Title", summary="My book summary", isbn="ABCDEFG"
+            )
+            # Simulate a cover stored before derivatives existed.
+            Book.objects.filter(pk=book.pk).update(cover="images/old.jpg")
+
+            call_command(
+                "regenerate_covers", "--missing", "--workers", "2", stdout=StringIO()
+            )
+
+            book.refresh_from_db()
+            self.assertEqual(
+                book.cover_widths, {"full": 500, "thumb": 150, "medium": 400}
+            )
+            self.assertTrue((Path(media_root) / "images" / "old.medium.webp").exists())
+
+
+class BenchmarkCommandTest(TestCase):
+    def test_seeds_and_benchmarks_every_route(self):
+        # Writes the home page views counted here while the database is there.
+        self.addCleanup(visits.home_page_views.flush)
+        call_command(
+            "seed_benchmark_data",
+            "--authors=3",
+            "--books=10",
+            "--copies=30",
+            "--users=2",
+            "--batch-size=4",
+            stdout=StringIO(),
+        )
+        self.assertEqual(Book.objects.count(), 10)
+        self.assertEqual(CatalogStatistics.load().num_instances, 30)
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = str(Path(directory) / "baseline.json")
+            call_command(
+                "benchmark",
+                "--requests=1",
+                "--warmup=0",
+                "--save",
+                baseline,
+                stdout=StringIO(),
+            )
+            with open(baseline) as f:
+                results = json.load(f)
+            out = StringIO()
+            call_command(
+                "benchmark",
+                "--requests=1",
+                "--warmup=0",
+                "--compare",
+                baseline,
+                stdout=out,
+            )
+
+        self.assertIn("books", results)
+        self.assertIn("api:book-list", results)
+        self.assertEqual(results["api:book-list"]["status"], 200)
+        self.assertIn("Compared with", out.getvalue())
+        # The scratch superuser the requests were made as is gone.
+        self.assertFalse(User.objects.filter(is_superuser=True).exists())
+
+
+class BenchmarkConcurrencyCommandTest(TransactionTestCase):
+    # The WSGI run requests from worker threads, which only see committed rows.
+
+    def test_compares_wsgi_and_asgi(self):
+        # Writes the home page views counted here while the database is there.
+        self.addCleanup(visits.home_page_views.flush)
+        call_command(
+            "seed_benchmark_data",
+            "--authors=2",
+            "--books=5",
+            "--copies=10",
+            "--users=1",
+            stdout=StringIO(),
+        )
+        out = StringIO()
+        call_command(
+            "benchmark_concurrency",
+            "--concurrency=2",
+            "--requests=4",
+            "--path=/books/",
+            "--path=/api/v1/book/{book}/",
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertIn("/books/", lines[0])
+        self.assertIn("wsgi", lines[0])
+        self.assertIn("asgi", lines[1])
+        for line in lines:
+            self.assertTrue(line.endswith(" 0 errors"), line)
+
+
+class StressDatabaseCommandTest(TransactionTestCase):
+    def test_runs_each_profile(self):
+        call_command(
+            "seed_benchmark_data",
+            "--authors=2",
+            "--books=5",
+            "--copies=10",
+            "--users=1",
+            stdout=StringIO(),
+        )
+        statuses = list(BookInstance.objects.values_list("status", flat=True))
+        out = StringIO()
+        call_command(
+            "stress_database",
+            "--threads=2",
+            "--seconds=0.2",
+            "--writes=50",
+            stdout=out,
+        )
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[0] for line in lines], ["default", "production"])
+        for line in lines:
+            self.assertTrue(line.endswith(" 0 locked"), line)
+        # The workload ran against copies.
+        self.assertEqual(
+            list(BookInstance.objects.values_list("status", flat=True)), statuses
+        )
+
+    def test_production_profile_pragmas(self):
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {
+                **production_settings.DATABASES["default"],
+                "NAME": Path(directory) / "db.sqlite3",
+            }
+            connections.settings["production"] = connections.configure_settings(
+                {"default": settings_dict}
+            )["default"]
+            try:
+                with connections["production"].cursor() as cursor:
+                    cursor.execute("PRAGMA journal_mode")
+                    self.assertEqual(cursor.fetchone()[0], "wal")
+                    cursor.execute("PRAGMA synchronous")
+                    self.assertEqual(cursor.fetchone()[0], 1)
+                    cursor.execute("PRAGMA busy_timeout")
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+            finally:
+                connections["production"].close()
+                del connections["production"]
+                del connections.settings["production"]
+
+
+class BenchmarkCheckoutsCommandTest(TransactionTestCase):
+    def test_never_lends_a_copy_twice(self):
+        stats = CatalogStatistics.recount()
+        out = StringIO()
+        call_command(
+            "benchmark_checkouts",
+            "--threads=4",
+            "--seconds=0.5",
+            "--copies=2",
+            stdout=out,
+        )
+        self.assertIn(" 0 double lends", out.getvalue())
+        self.assertNotIn(" 0 checkouts ", out.getvalue())
+        # The scratch rows are gone and the counters are back where they were.
+        self.assertFalse(BookInstance.objects.exists())
+        self.assertFalse(User.objects.exists())
+        self.assertEqual(
+            CatalogStatistics.objects.get().num_instances_available,
+            stats.num_instances_available,
+        )
+
+
+class RefreshReplicaCommandTest(TransactionTestCase):
+    def test_copies_primary(self):
+        Genre.objects.create(name="Fantasy")
+        with tempfile.TemporaryDirectory() as directory:
+            settings_dict = {
+                **settings.DATABASES["replica"],
+                "NAME": Path(directory) / "copy",
+            }
+            connections.settings["copy"] = connections.configure_settings(
+                {"default": settings_dict}
+            )["default"]
+            try:
+                call_command("refresh_replica", "--replica=copy", stdout=StringIO())
+                self.assertEqual(
+                    list(Genre.objects.using("copy").values_list("name", flat=True)),
+                    ["Fantasy"],
+                )
+                with connections["copy"].cursor() as cursor:
+                    cursor.execute("PRAGMA query_only")
+                    self.assertEqual(cursor.fetchone()[0], 1)
+            finally:
+                connections["copy"].close()
+                del connections["copy"]
+                del connections.settings["copy"]
+
+    def test_refuses_to_copy_onto_primary(self):
+        # Under test the replica mirrors the default database.
+        with self.assertRaisesMessage(CommandError, "is the primary"):
+            call_command("refresh_replica", stdout=StringIO())
+
+
+class SendOverdueNoticesCommandTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        book = Book.objects.create(title="Overdue Book", summary="Summary", isbn="123")
+        today = datetime.date.today()
+        cls.reader = User.objects.create_user(
+            username="reader", email="reader@example.com", password="1X<ISRUkw+tuK"
+        )
+        cls.other = User.objects.create_user(
+            username="other", email="other@example.com", password="1X<ISRUkw+tuK"
+        )
+        cls.loans = [
+            BookInstance.objects.create(
+                book=book,
+                imprint="Imprint",
+                status=status,
+                borrower=borrower,
+                due_back=due,
+            )
+            for status, borrower, due in [
+                ("o", cls.reader, today - datetime.timedelta(days=3)),
+                ("o", cls.reader, today - datetime.timedelta(days=1)),
+                ("o", cls.reader, today + datetime.timedelta(days=1)),
+                ("o", cls.other, today - datetime.timedelta(days=2)),
+                ("a", cls.other, today - datetime.timedelta(days=2)),
+            ]
+        ]
+
+    def send(self):
+        call_command(
+            "send_overdue_notices",
+            "--chunk-size=1",
+            "--batch-size=1",
+            stdout=StringIO(),
+        )
+
+    def test_sends_one_reminder_per_borrower_once(self):
+        self.send()
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            ["other@example.com", "reader@example.com"],
+        )
+        reader_message = next(m for m in mail.outbox if m.to == ["reader@example.com"])
+        self.assertEqual(reader_message.subject, "2 books are overdue")
+        self.assertEqual(OverdueNotice.objects.count(), 3)
+
+        self.send()
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_renewed_loan_is_reminded_again(self):
+        self.send()
+        loan = self.loans[3]
+        loan.due_back = datetime.date.today() - datetime.timedelta(days=1)
+        loan.save()
+        self.send()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(mail.outbox[-1].to, ["other@example.com"])
+
+
+class ExportInventoryCommandTest(TestCase):
+    def test_writes_gzipped_csv(self):
+        book = Book.objects.create(title="Exported", summary="Summary", isbn="123")
+        for _ in range(3):
+            BookInstance.objects.create(book=book, imprint="Imprint", status="a")
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / "inventory.csv.gz"
+            call_command(
+                "export_inventory",
+                "--gzip",
+                "--chunk-size=2",
+                "--output",
+                str(path),
+                stderr=StringIO(),
+            )
+            lines = gzip.decompress(path.read_bytes()).decode().splitlines()
+        self.assertEqual(lines[0].split(",")[:3], ["id", "status", "due_back"])
+        self.assertEqual(len(lines), 4)
@@ -0,0 +1,107 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from catalog import loans
+from catalog.models import Book, BookInstance, CatalogStatistics
+
+User = get_user_model()
+
+
+class LoansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patron = User.objects.create_user(username="patron")
+        cls.other = User.objects.create_user(username="other")
+        book = Book.objects.create(title="Book", summary="Summary", isbn="ISBN")
+        cls.copy = BookInstance.objects.create(book=book, imprint="Imprint", status="a")
+
+    def load(self):
+        return BookInstance.objects.get(pk=self.copy.pk)
+
+    def available(self):
+        return CatalogStatistics.load().num_instances_available
+
+    def test_checkout(self):
+        available = self.available()
+        copy = self.load()
+        loans.checkout(copy, self.patron)
+        self.assertEqual(copy.version, 1)
+
+        stored = self.load()
+        self.assertEqual(
+            (stored.status, stored.borrower, stored.version),
+            ("o", self.patron, 1),
+        )
+        self.assertEqual(stored.due_back, datetime.date.today() + loans.LOAN_PERIOD)
+        self.assertEqual(self.available(), available - 1)
+
+    def test_second_checkout_conflicts(self):
+        first, second = self.load(), self.load()
+        loans.checkout(first, self.patron)
+        with self.assertRaises(loans.LoanConflict):
+            loans.checkout(second, self.other)
+        self.assertEqual(self.load().borrower, self.patron)
+
+    def test_stale_version_conflicts_in_the_expected_state(self):
+        seen = self.load()
+        copy = self.load()
+        loans.checkout(copy, self.other)
+        loans.return_copy(copy, version=copy.version)
+        # Available again, but not the copy the patron was shown.
+        with self.assertRaises(loans.LoanConflict):
+            loans.checkout(seen, self.patron, version=seen.version)
+        self.assertEqual(self.load().version, 2)
+
+    def test_other_loan_changes_move_the_version(self):
+        copy = self.load()
+        loans.checkout(copy, self.patron)
+        seen = self.load()
+        # Staff move the due date in the admin.
+        copy.due_back += datetime.timedelta(days=1)
+        copy.save()
+        self.assertEqual(copy.version, 2)
+        with self.assertRaises(loans.LoanConflict):
+            loans.renew(seen, seen.due_back, version=seen.version)
+
+        copy.imprint = "Reprint"
+        copy.save()
+        self.assertEqual(self.load().version, 2)
+
+    def test_partial_loan_saves_must_write_the_version(self):
+        copy = self.load()
+        loans.checkout(copy, self.patron)
+        copy.due_back += datetime.timedelta(days=1)
+        with self.assertRaises(ValueError):
+            copy.save(update_fields=["due_back"])
+        self.assertEqual(
+            self.load().due_back, copy.due_back - datetime.timedelta(days=1)
+        )
+
+        # Fields not written do not need it.
+        copy.imprint = "Reprint"
+        copy.save(update_fields=["imprint"])
+        copy.save(update_fields=["due_back", "version"])
+        stored = self.load()
+        self.assertEqual((stored.due_back, stored.version), (copy.due_back, 2))
+
+    def test_return_and_renew(self):
+        available = self.available()
+        copy = self.load()
+        loans.checkout(copy, self.patron)
+        due_back = datetime.date.today() + datetime.timedelta(days=10)
+        loans.renew(copy, due_back, version=copy.version)
+        self.assertEqual(self.load().due_back, due_back)
+
+        loans.return_copy(copy, version=copy.version)
+        stored = self.load()
+        self.assertEqual(
+            (stored.status, stored.borrower, stored.version), ("a", None, 3)
+        )
+        self.assertEqual(self.available(), available)
+
+        with self.assertRaises(loans.LoanConflict):
+            loans.renew(copy, due_back)
+        with self.assertRaises(loans.LoanConflict):
+            loans.return_copy(copy)
@@ -1,6 +1,14 @@
-from django.test import TestCase
+import tempfile
+from io import BytesIO
+from pathlib import Path
 
-from catalog.models import Author
+from django.contrib.sessions.models import Session
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db.models.signals import post_delete
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from catalog.models import Author, Book, BookInstance, CatalogStatistics, Genre
 
 
 class AuthorModelTest(TestCase):
@@ -33,3 +41,157 @@ class AuthorModelTest(TestCase):
         author = Author.objects.get(id=1)
         # This will also fail if the urlconf is not defined.
         self.assertEqual(author.get_absolute_url(), "/catalog/author/1")
+
+
+class CatalogStatisticsModelTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(first_name="Big", last_name="Bob")
+        cls.genre = Genre.objects.create(name="Fantasy")
+        cls.book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            author=cls.author,
+        )
+        cls.book.genre.add(cls.genre)
+        cls.copy = BookInstance.objects.create(
+            book=cls.book, imprint="Unlikely Imprint, 2016", status="a"
+        )
+
+    def test_counters_follow_creates(self):
+        stats = CatalogStatistics.load()
+        self.assertEqual(stats.num_books, 1)
+        self.assertEqual(stats.num_instances, 1)
+        self.assertEqual(stats.num_instances_available, 1)
+        self.assertEqual(stats.num_authors, 1)
+        self.assertEqual(stats.num_genres, 1)
+
+    def test_available_counter_follows_status_changes(self):
+        self.copy.status = "o"
+        self.copy.save()
+        self.assertEqual(CatalogStatistics.load().num_instances_available, 0)
+
+        copy = BookInstance.objects.get(pk=self.copy.pk)
+        copy.status = "a"
+        copy.save()
+        self.assertEqual(CatalogStatistics.load().num_instances_available, 1)
+
+    def test_counters_follow_deletes(self):
+        self.copy.delete()
+        stats = CatalogStatistics.load()
+        self.assertEqual(stats.num_instances, 0)
+        self.assertEqual(stats.num_instances_available, 0)
+
+    def test_other_models_keep_fast_deletes(self):
+        # A delete receiver would make sessions be fetched one by one to delete.
+        self.assertFalse(post_delete.has_listeners(Session))
+
+    def test_recount_repairs_drift(self):
+        CatalogStatistics.objects.filter(pk=1).update(num_books=42)
+        self.assertEqual(CatalogStatistics.recount().num_books, 1)
+
+
+class BookCoverTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        self.media_root = Path(media_root.name)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, width, height, image_format="JPEG"):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), "navy").save(buffer, image_format)
+        extension = image_format.lower().replace("jpeg", "jpg")
+        return SimpleUploadedFile(
+            f"cover.{extension}", buffer.getvalue(), f"image/{image_format.lower()}"
+        )
+
+    def test_upload_generates_derivatives(self):
+        book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            cover=self.upload(600, 800),
+        )
+        self.assertEqual(book.cover_widths, {"full": 600, "thumb": 150, "medium": 400})
+        self.assertEqual(Book.objects.get(pk=book.pk).cover_widths, book.cover_widths)
+        for name in (
+            "cover.thumb.jpg",
+            "cover.medium.jpg",
+            "cover.webp",
+            "cover.thumb.webp",
+        ):
+            self.assertTrue((self.media_root / "images" / name).exists(), name)
+        with Image.open(self.media_root / "images" / "cover.medium.webp") as image:
+            self.assertEqual(image.size, (400, 533))
+
+        self.assertEqual(book.cover_url(), "/media/images/cover.medium.jpg")
+        self.assertEqual(
+            book.cover_webp_srcset,
+            "/media/images/cover.thumb.webp 150w, /media/images/cover.medium.webp 400w, "
+            "/media/images/cover.webp 600w",
+        )
+
+    def test_replaced_cover_derivatives_are_deleted(self):
+        book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            cover=self.upload(600, 800),
+        )
+        images = self.media_root / "images"
+        old_derivatives = {
+            path.name for path in images.iterdir() if path.name != "cover.jpg"
+        }
+        self.assertEqual(len(old_derivatives), 5)
+
+        book.cover = self.upload(600, 800)
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+
+        remaining = {path.name for path in images.iterdir()}
+        self.assertFalse(old_derivatives & remaining)
+        self.assertIn("cover.jpg", remaining)
+        new_stem = Path(book.cover.name).stem
+        self.assertIn(f"{new_stem}.medium.webp", remaining)
+
+    def test_derivatives_never_replace_other_files(self):
+        other = Book.objects.create(
+            title="Other",
+            summary="My book summary",
+            isbn="HIJKLMN",
+            cover=self.upload(600, 800, "WEBP"),
+        )
+        self.assertEqual(other.cover.name, "images/cover.webp")
+        # Neither its own full-size WebP nor another cover's replaces the upload.
+        self.assertNotEqual(other.cover_derivatives["full"]["webp"], other.cover.name)
+        upload = (self.media_root / other.cover.name).read_bytes()
+        book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            cover=self.upload(600, 800),
+        )
+        self.assertEqual((self.media_root / other.cover.name).read_bytes(), upload)
+
+        book.cover = None
+        with self.captureOnCommitCallbacks(execute=True):
+            book.save()
+        self.assertEqual(book.cover_derivatives, {})
+        self.assertTrue((self.media_root / other.cover.name).exists())
+        for files in other.cover_derivatives.values():
+            for name in files.values():
+                self.assertTrue((self.media_root / name).exists(), name)
+
+    def test_small_cover_is_not_upscaled(self):
+        book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            cover=self.upload(200, 300),
+        )
+        self.assertEqual(book.cover_widths, {"full": 200, "thumb": 150})
+        self.assertEqual(book.cover_url("medium"), "/media/images/cover.jpg")
@@ -0,0 +1,100 @@
+import datetime
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import overdue, visits
+from catalog.models import Author, Book, BookInstance, Genre, Language
+
+User = get_user_model()
+
+# A line of EXPLAIN QUERY PLAN output reading a whole table without an index.
+FULL_SCAN = re.compile(r"\bSCAN (\w+)\b(?! USING (COVERING )?INDEX| VIRTUAL TABLE)")
+
+
+class QueryPlanTest(TestCase):
+    """Fails if any query issued by a catalog view falls back to a full table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="1X<ISRUkw+tuK"
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        genre = Genre.objects.create(name="Fantasy")
+        language = Language.objects.create(name="English")
+        cls.book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            author=cls.author,
+            language=language,
+        )
+        cls.book.genre.add(genre)
+        today = datetime.date.today()
+        cls.copies = [
+            BookInstance.objects.create(
+                book=cls.book,
+                imprint="Imprint",
+                status=status,
+                borrower=cls.user if status == "o" else None,
+                due_back=today + datetime.timedelta(days=3) if status == "o" else None,
+            )
+            for status in ("a", "o", "r", "m")
+        ]
+
+    def assertNoFullScans(self, url):
+        self.client.force_login(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        self.assertQueriesUseIndexes(queries, url)
+
+    def assertQueriesUseIndexes(self, queries, label):
+        for query in queries:
+            if not query["sql"].startswith("SELECT"):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN QUERY PLAN " + query["sql"])
+                plan = "\n".join(row[-1] for row in cursor.fetchall())
+            for match in FULL_SCAN.finditer(plan):
+                self.fail(f"{label} scans {match.group(1)}:\n{query['sql']}\n{plan}")
+
+    @skipUnlessDBFeature("supports_explaining_query_execution")
+    def test_catalog_views_use_indexes(self):
+        self.addCleanup(visits.home_page_views.flush)
+        self.assertEqual(connection.vendor, "sqlite")
+        urls = [
+            reverse("index"),
+            reverse("books"),
+            reverse("book-detail", args=[self.book.pk]),
+            reverse("authors"),
+            reverse("author-detail", args=[self.author.pk]),
+            reverse("my-borrowed"),
+            reverse("all-borrowed"),
+            reverse("renew-book-librarian", args=[self.copies[1].pk]),
+            reverse("search-results") + "?q=book",
+            reverse("author-autocomplete") + "?q=smi",
+            reverse("author-autocomplete") + "?q=smith+jo",
+            reverse("book-autocomplete") + "?q=boo",
+        ]
+        urls += [
+            reverse("available-books") + f"?status={status}"
+            for status in ("a", "r", "m")
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertNoFullScans(url)
+
+    @skipUnlessDBFeature("supports_explaining_query_execution")
+    def test_overdue_sweep_uses_indexes(self):
+        self.user.email = "librarian@example.com"
+        self.user.save()
+        next_week = datetime.date.today() + datetime.timedelta(days=7)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(list(overdue.overdue_loans(next_week))), 1)
+        self.assertQueriesUseIndexes(queries, "overdue_loans")
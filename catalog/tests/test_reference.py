@@ -0,0 +1,113 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog import caching, reference
+from catalog.forms import BookForm
+from catalog.models import Author, Genre, Language
+
+User = get_user_model()
+
+
+class ReferenceCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.english = Language.objects.create(name="English")
+        cls.horror = Genre.objects.create(name="Horror")
+        cls.fantasy = Genre.objects.create(name="Fantasy")
+
+    def setUp(self):
+        reference.clear()
+        reference.load()
+
+    def test_lookups_do_not_query(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(reference.get(Language, self.english.pk).name, "English")
+            self.assertEqual(
+                [genre.name for genre in reference.get_table(Genre).values()],
+                ["Fantasy", "Horror"],
+            )
+
+    def test_saves_and_deletes_drop_the_table(self):
+        Genre.objects.create(name="Poetry")
+        self.assertIn("Poetry", [g.name for g in reference.get_table(Genre).values()])
+
+        self.horror.delete()
+        self.assertIsNone(reference.get(Genre, self.horror.pk))
+
+    def test_commit_publishes_a_new_version(self):
+        before = caching.get_version("reference", "catalog.language")
+        with self.captureOnCommitCallbacks(execute=True):
+            Language.objects.create(name="French")
+        self.assertNotEqual(
+            caching.get_version("reference", "catalog.language"), before
+        )
+
+    def test_changes_from_other_processes_are_picked_up(self):
+        # Another process renamed the genre and published a new version.
+        Genre.objects.filter(pk=self.horror.pk).update(name="Gothic")
+        with self.captureOnCommitCallbacks(execute=True):
+            caching.bump_versions("reference", ["catalog.genre"])
+        with self.assertNumQueries(0):
+            self.assertEqual(reference.get(Genre, self.horror.pk).name, "Horror")
+        with mock.patch.object(reference, "CHECK_INTERVAL", 0):
+            self.assertEqual(reference.get(Genre, self.horror.pk).name, "Gothic")
+
+    def test_unknown_pk_reloads_once(self):
+        # Created by another process, which has not published yet.
+        Language.objects.bulk_create([Language(name="German")])
+        german = Language.objects.get(name="German")
+        with self.assertNumQueries(1):
+            self.assertEqual(reference.get(Language, german.pk).name, "German")
+
+
+class BookFormReferenceTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="1X<ISRUkw+tuK"
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.english = Language.objects.create(name="English")
+        cls.genres = [Genre.objects.create(name=name) for name in ("Fantasy", "Horror")]
+
+    def setUp(self):
+        reference.clear()
+        reference.load()
+
+    def data(self, **overrides):
+        return {
+            "title": "Book Title",
+            "author": self.author.pk,
+            "summary": "Summary",
+            "isbn": "ABCDEFG",
+            "language": self.english.pk,
+            "genre": [genre.pk for genre in self.genres],
+            **overrides,
+        }
+
+    def test_choices_are_rendered_without_queries(self):
+        form = BookForm()
+        with self.assertNumQueries(0):
+            html = str(form["language"]) + str(form["genre"])
+        self.assertIn("English", html)
+        self.assertIn("Horror", html)
+
+    def test_valid_choices_are_saved(self):
+        form = BookForm(self.data())
+        self.assertTrue(form.is_valid(), form.errors)
+        book = form.save()
+        self.assertEqual(book.language, self.english)
+        self.assertEqual(list(book.genre.order_by("name")), self.genres)
+
+    def test_unknown_choices_are_rejected(self):
+        form = BookForm(self.data(language=0, genre=[self.genres[0].pk, 0]))
+        self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {"language", "genre"})
+
+    def test_create_view_uses_the_form(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("book-create"), self.data())
+        self.assertEqual(response.status_code, 302)
@@ -0,0 +1,92 @@
+import datetime
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from catalog.models import Author, Book, BookInstance, Language
+from catalog.routing import PIN_COOKIE
+
+User = get_user_model()
+
+
+# The replica mirrors the default test database, which other connections only
+# see committed, hence TransactionTestCase.
+@override_settings(REPLICA_DATABASE="replica")
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        self.user = User.objects.create_superuser(
+            username="librarian", password="1X<ISRUkw+tuK"
+        )
+        self.author = Author.objects.create(first_name="John", last_name="Smith")
+        self.book = Book.objects.create(
+            title="Shadow Garden",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            author=self.author,
+            language=Language.objects.create(name="English"),
+        )
+        self.copy = BookInstance.objects.create(
+            book=self.book, imprint="Imprint", status="a"
+        )
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connections["default"]) as primary:
+            with CaptureQueriesContext(connections["replica"]) as replica:
+                response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return response, primary, replica
+
+    def assertNoCatalogQueries(self, queries):
+        for query in queries:
+            self.assertNotIn('"catalog_', query["sql"])
+
+    def test_read_only_views_read_from_replica(self):
+        for url in [
+            reverse("books"),
+            reverse("authors"),
+            reverse("search-results") + "?q=shadow",
+        ]:
+            with self.subTest(url=url):
+                response, primary, replica = self.get(url)
+                self.assertGreater(len(replica), 0)
+                # Only the session and user are read from the primary.
+                self.assertNoCatalogQueries(primary)
+        self.assertContains(response, "Shadow Garden")
+
+    def test_other_views_read_from_primary(self):
+        _, _, replica = self.get(reverse("book-detail", args=[self.book.pk]))
+        self.assertEqual(len(replica), 0)
+
+    def test_checkout_pins_client_to_primary(self):
+        response = self.client.post(
+            reverse("book_instance_update_for_user", args=[self.copy.pk]),
+            {"due_back": datetime.date.today() + datetime.timedelta(weeks=2)},
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 15)
+
+        _, primary, replica = self.get(reverse("books"))
+        self.assertEqual(len(replica), 0)
+        self.assertGreater(len(primary), 0)
+
+    @override_settings(ROOT_URLCONF="api.urls")
+    def test_api_reads_from_replica(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for url in [reverse("book-list"), reverse("book-detail", args=[self.book.pk])]:
+            with self.subTest(url=url):
+                _, primary, replica = self.get(url)
+                self.assertGreater(len(replica), 0)
+                self.assertNoCatalogQueries(primary)
+
+    @override_settings(REPLICA_DATABASE=None)
+    def test_disabled_by_default(self):
+        _, _, replica = self.get(reverse("books"))
+        self.assertEqual(len(replica), 0)
@@ -1,14 +1,30 @@
+import csv
 import datetime
+import gzip
+import io
+import json
 import uuid
+from unittest import mock
 
 # Get user model from settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
-from django.test import TestCase
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
-from catalog.models import Author, Book, BookInstance, Genre, Language
+from catalog import caching, visits
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
 
 User = get_user_model()
 
@@ -286,3 +302,698 @@ class RenewBookInstancesViewTest(TestCase):
 
         # Check we used correct template
         self.assertTemplateUsed(response, "catalog/book_renew_librarian.html")
+
+
+class IndexViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        book = Book.objects.create(
+            title="Book Title", summary="My book summary", isbn="ABCDEFG", author=author
+        )
+        for status in ("a", "a", "o"):
+            BookInstance.objects.create(book=book, imprint="Imprint", status=status)
+
+    def setUp(self):
+        # Writes the views counted here while the test database is still there.
+        self.addCleanup(visits.home_page_views.flush)
+
+    def test_counts_in_context(self):
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["num_books"], 1)
+        self.assertEqual(response.context["num_instances"], 3)
+        self.assertEqual(response.context["num_instances_available"], 2)
+        self.assertEqual(response.context["num_authors"], 1)
+
+    def test_anonymous_visits_write_nothing(self):
+        self.client.get(reverse("index"))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["num_visits"], 1)
+        self.assertEqual(
+            [
+                query["sql"]
+                for query in queries
+                if not query["sql"].startswith("SELECT")
+            ],
+            [],
+        )
+        # Only the visit count is set, no session cookie.
+        self.assertEqual(set(response.cookies), {visits.COOKIE_NAME})
+
+        # A tampered count is ignored.
+        self.client.cookies[visits.COOKIE_NAME] = "1000"
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["num_visits"], 0)
+
+    def test_home_page_views_are_written_in_batches(self):
+        counter = visits.home_page_views
+        with mock.patch.multiple(counter, every=3, pending=0):
+            for _ in range(5):
+                self.client.get(reverse("index"))
+            self.assertEqual(CatalogStatistics.load().num_home_page_views, 3)
+            counter.flush()
+            response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["num_home_page_views"], 5)
+
+    def test_idle_batch_is_written(self):
+        written = []
+        counter = visits.BufferedCounter(written.append, every=3, seconds=0.05)
+        counter.add()
+        counter.add()
+        self.assertEqual(written, [])
+        # No further add() comes to write the batch.
+        counter.timer.join(5)
+        self.assertEqual(written, [2])
+        self.assertIsNone(counter.timer)
+
+    @override_settings(SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies")
+    def test_signed_cookie_sessions(self):
+        User.objects.create_user(username="reader", password="1X<ISRUkw+tuK")
+        self.client.login(username="reader", password="1X<ISRUkw+tuK")
+        response = self.client.get(reverse("index"))
+        self.assertEqual(response.context["user"].username, "reader")
+        self.assertEqual(response.context["num_visits"], 0)
+
+
+class SearchResultListViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(first_name="Eric", last_name="Matthes")
+        other_author = Author.objects.create(first_name="Jane", last_name="Doe")
+        cls.crash_course = Book.objects.create(
+            title="Python Crash Course",
+            summary="A hands-on introduction to programming.",
+            isbn="9781718502703",
+            author=cls.author,
+        )
+        cls.cookbook = Book.objects.create(
+            title="Kitchen Recipes",
+            summary="Cooking with python-shaped pasta.",
+            isbn="9780000000001",
+            author=other_author,
+        )
+
+    def search(self, query):
+        response = self.client.get(reverse("search-results"), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return list(response.context["book_list"])
+
+    def test_prefix_match_on_title(self):
+        self.assertEqual(self.search("crash cour"), [self.crash_course])
+
+    def test_matches_author_summary_and_isbn(self):
+        self.assertEqual(self.search("matthes"), [self.crash_course])
+        self.assertEqual(self.search("pasta"), [self.cookbook])
+        self.assertEqual(self.search("9780000000001"), [self.cookbook])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.search("python"), [self.crash_course, self.cookbook])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.author.last_name = "Renamed"
+        self.author.save()
+        self.assertEqual(self.search("renamed"), [self.crash_course])
+        self.assertEqual(self.search("matthes"), [])
+
+        self.cookbook.delete()
+        self.assertEqual(self.search("pasta"), [])
+
+    def test_empty_query_has_no_results(self):
+        self.assertEqual(self.search(""), [])
+
+
+class AvailableBookViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff_user = User.objects.create_user(
+            username="staffuser", password="2HJ1vRV0Z&3iD", is_staff=True
+        )
+        cls.staff_user.user_permissions.add(
+            Permission.objects.get(codename="change_bookinstance")
+        )
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        book = Book.objects.create(
+            title="Book Title", summary="My book summary", isbn="ABCDEFG", author=author
+        )
+        for number in range(25):
+            BookInstance.objects.create(
+                book=book, imprint=f"Imprint {number}", status="a"
+            )
+        for status in ("r", "m", "o"):
+            BookInstance.objects.create(book=book, imprint="Imprint", status=status)
+
+    def test_paginates_available_copies(self):
+        response = self.client.get(reverse("available-books"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context["book_instances"]), 10)
+        self.assertEqual(response.context["page_obj"].paginator.num_pages, 3)
+
+        response = self.client.get(reverse("available-books") + "?page=3")
+        self.assertEqual(len(response.context["book_instances"]), 5)
+
+    def test_query_count_is_bounded_by_page_size(self):
+        # One COUNT for the paginator plus one joined query for the page.
+        with self.assertNumQueries(2):
+            self.client.get(reverse("available-books"))
+
+    def test_other_statuses_hidden_without_permission(self):
+        response = self.client.get(reverse("available-books") + "?status=m")
+        self.assertEqual(response.context["status"], "a")
+        self.assertEqual(len(response.context["status_tabs"]), 1)
+
+    def test_staff_can_browse_maintenance_tab(self):
+        self.client.login(username="staffuser", password="2HJ1vRV0Z&3iD")
+        response = self.client.get(reverse("available-books") + "?status=m")
+        self.assertEqual(response.context["status"], "m")
+        self.assertEqual(len(response.context["book_instances"]), 1)
+        self.assertEqual(response.context["book_instances"][0].status, "m")
+
+
+class KeysetPaginationViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="testuser1", password="1X<ISRUkw+tuK"
+        )
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        book = Book.objects.create(
+            title="Book Title", summary="My book summary", isbn="ABCDEFG", author=author
+        )
+        today = datetime.date.today()
+        # Copies sharing due dates (and some without one) exercise the id tie-breaker.
+        for number in range(23):
+            BookInstance.objects.create(
+                book=book,
+                imprint="Imprint",
+                due_back=(
+                    None
+                    if number % 7 == 0
+                    else today + datetime.timedelta(days=number % 3)
+                ),
+                borrower=cls.user,
+                status="o",
+            )
+
+    def walk(self, url):
+        rows = []
+        cursor = None
+        while True:
+            response = self.client.get(url, {"cursor": cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            page = response.context["page_obj"]
+            rows += list(response.context["bookinstance_list"])
+            if not page.has_next():
+                return rows, page
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_copy_in_order(self):
+        self.client.login(username="testuser1", password="1X<ISRUkw+tuK")
+        rows, _ = self.walk(reverse("my-borrowed"))
+        expected = list(BookInstance.objects.filter(borrower=self.user))
+        self.assertEqual(len(rows), 23)
+        self.assertEqual({row.pk for row in rows}, {row.pk for row in expected})
+        keys = [(row.due_back is not None, row.due_back, str(row.pk)) for row in rows]
+        self.assertEqual(keys, sorted(keys))
+
+    def test_previous_cursor_returns_the_preceding_page(self):
+        self.client.login(username="testuser1", password="1X<ISRUkw+tuK")
+        first = self.client.get(reverse("my-borrowed"))
+        second = self.client.get(
+            reverse("my-borrowed"), {"cursor": first.context["page_obj"].next_cursor}
+        )
+        back = self.client.get(
+            reverse("my-borrowed"),
+            {"cursor": second.context["page_obj"].previous_cursor},
+        )
+        self.assertEqual(
+            list(back.context["bookinstance_list"]),
+            list(first.context["bookinstance_list"]),
+        )
+        self.assertFalse(back.context["page_obj"].has_previous())
+
+    def test_no_count_query(self):
+        self.client.login(username="testuser1", password="1X<ISRUkw+tuK")
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("my-borrowed"))
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    def test_invalid_cursor_is_not_found(self):
+        self.client.login(username="testuser1", password="1X<ISRUkw+tuK")
+        response = self.client.get(reverse("my-borrowed"), {"cursor": "garbage"})
+        self.assertEqual(response.status_code, 404)
+
+
+class DetailFragmentCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="staffuser", password="2HJ1vRV0Z&3iD", is_staff=True
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.genre = Genre.objects.create(name="Fantasy")
+        cls.book = Book.objects.create(
+            title="Book Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            author=cls.author,
+        )
+        cls.book.genre.add(cls.genre)
+        cls.copy = BookInstance.objects.create(
+            book=cls.book, imprint="Unlikely Imprint, 2016", status="a"
+        )
+
+    def setUp(self):
+        # Fragments cached by other tests under stamps this one reuses.
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(queries)
+
+    def test_book_detail_served_from_cache(self):
+        url = reverse("book-detail", args=[self.book.pk])
+        _, uncached = self.get(url)
+        content, cached = self.get(url)
+        self.assertLess(cached, uncached)
+        self.assertIn("Available", content)
+
+    def test_copy_change_invalidates_book_and_author_pages(self):
+        book_url = reverse("book-detail", args=[self.book.pk])
+        author_url = reverse("author-detail", args=[self.author.pk])
+        self.get(book_url)
+        self.get(author_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.copy.status = "m"
+            self.copy.save()
+            BookInstance.objects.create(book=self.book, imprint="Imprint", status="a")
+
+        content, _ = self.get(book_url)
+        self.assertIn("Maintenance", content)
+        content, _ = self.get(author_url)
+        self.assertIn("(2)", content)
+
+    def test_genre_and_author_changes_invalidate_book_page(self):
+        url = reverse("book-detail", args=[self.book.pk])
+        self.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.genre.name = "Horror"
+            self.genre.save()
+        content, _ = self.get(url)
+        self.assertIn("Horror", content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.genre.clear()
+        content, _ = self.get(url)
+        self.assertNotIn("Horror", content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.last_name = "Jones"
+            self.author.save()
+        content, _ = self.get(url)
+        self.assertIn("Jones", content)
+
+    def test_language_changes_invalidate_book_page(self):
+        url = reverse("book-detail", args=[self.book.pk])
+        language = Language.objects.create(name="English")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.language = language
+            self.book.save()
+        self.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            language.name = "French"
+            language.save()
+        content, _ = self.get(url)
+        self.assertIn("French", content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            language.delete()
+        content, _ = self.get(url)
+        self.assertNotIn("French", content)
+
+    def test_stamps_move_once_committed(self):
+        url = reverse("book-detail", args=[self.book.pk])
+        version = caching.get_version("book", self.book.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.title = "New Title"
+            self.book.save()
+            # A request reading the old row now caches under the old stamp.
+            self.assertEqual(caching.get_version("book", self.book.pk), version)
+            self.get(url)
+        self.assertNotEqual(caching.get_version("book", self.book.pk), version)
+        content, _ = self.get(url)
+        self.assertIn("New Title", content)
+
+
+class ExportInventoryViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = User.objects.create_user(
+            username="librarian", password="2HJ1vRV0Z&3iD"
+        )
+        cls.librarian.user_permissions.add(
+            Permission.objects.get(codename="can_mark_returned")
+        )
+        User.objects.create_user(username="reader", password="2HJ1vRV0Z&3iD")
+        author = Author.objects.create(first_name="John", last_name="Smith")
+        book = Book.objects.create(
+            title="Book, Title",
+            summary="My book summary",
+            isbn="ABCDEFG",
+            author=author,
+        )
+        for status in ("a", "o", "m"):
+            BookInstance.objects.create(
+                book=book,
+                imprint="Imprint",
+                status=status,
+                borrower=cls.librarian if status == "o" else None,
+            )
+
+    def export(self, query=""):
+        self.client.login(username="librarian", password="2HJ1vRV0Z&3iD")
+        response = self.client.get(reverse("export-inventory") + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    def test_forbidden_without_permission(self):
+        self.client.login(username="reader", password="2HJ1vRV0Z&3iD")
+        response = self.client.get(reverse("export-inventory"))
+        self.assertEqual(response.status_code, 403)
+
+    def test_exports_csv(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row["title"] for row in rows}, {"Book, Title"})
+        self.assertEqual(
+            {row["status"]: row["borrower"] for row in rows},
+            {"a": "", "o": "librarian", "m": ""},
+        )
+
+    def test_exports_gzipped_ndjson(self):
+        response, content = self.export("?format=ndjson&gzip=1")
+        self.assertIn('filename="inventory.ndjson.gz"', response["Content-Disposition"])
+        rows = [json.loads(line) for line in gzip.decompress(content).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["author_last_name"], "Smith")
+
+    async def test_streams_asynchronously_under_asgi(self):
+        await self.async_client.alogin(username="librarian", password="2HJ1vRV0Z&3iD")
+        response = await self.async_client.get(reverse("export-inventory"))
+        self.assertEqual(response.status_code, 200)
+        # A synchronous stream would be read whole before the first byte.
+        self.assertTrue(response.is_async)
+        content = b"".join([chunk async for chunk in response.streaming_content])
+        rows = list(csv.DictReader(io.StringIO(content.decode())))
+        self.assertEqual(len(rows), 3)
+
+    def test_unknown_format(self):
+        self.client.login(username="librarian", password="2HJ1vRV0Z&3iD")
+        response = self.client.get(reverse("export-inventory") + "?format=xml")
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalDetailViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="2HJ1vRV0Z&3iD")
+        cls.other = User.objects.create_user(username="other", password="2HJ1vRV0Z&3iD")
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.book = Book.objects.create(
+            title="Book Title", summary="Summary", isbn="ABCDEFG", author=cls.author
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.book_url = reverse("book-detail", args=[self.book.pk])
+        self.author_url = reverse("author-detail", args=[self.author.pk])
+
+    def test_unchanged_book_is_not_modified(self):
+        response = self.client.get(self.book_url)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        # The session, the user and the updated_at pre-check.
+        with self.assertNumQueries(3):
+            response = self.client.get(self.book_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            self.book_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_depends_on_user(self):
+        etag = self.client.get(self.book_url)["ETag"]
+        self.client.force_login(self.other)
+        response = self.client.get(self.book_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_copy_change_modifies_book_and_author(self):
+        book_etag = self.client.get(self.book_url)["ETag"]
+        author_etag = self.client.get(self.author_url)["ETag"]
+        BookInstance.objects.create(book=self.book, imprint="Imprint", status="a")
+
+        response = self.client.get(self.book_url, HTTP_IF_NONE_MATCH=book_etag)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.author_url, HTTP_IF_NONE_MATCH=author_etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_author_rename_modifies_books(self):
+        etag = self.client.get(self.book_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.author.last_name = "Smyth"
+            self.author.save()
+        response = self.client.get(self.book_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Smyth")
+
+    def test_missing_book_is_not_found(self):
+        response = self.client.get(
+            reverse("book-detail", args=[self.book.pk + 1]), HTTP_IF_NONE_MATCH="*"
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class CopyCountViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="2HJ1vRV0Z&3iD"
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Smith")
+        cls.book = cls.add_book("ABCDEFG", ("a", "a", "o"))
+
+    @classmethod
+    def add_book(cls, isbn, statuses):
+        book = Book.objects.create(
+            title=f"Book {isbn}", summary="Summary", isbn=isbn, author=cls.author
+        )
+        for status in statuses:
+            BookInstance.objects.create(book=book, imprint="Imprint", status=status)
+        return book
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(queries)
+
+    def test_author_pages_show_per_book_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_book("HIJKLMN", ("m",))
+        content, _ = self.get(reverse("author-detail", args=[self.author.pk]))
+        self.assertIn("(3)</strong> 2 available", content)
+        self.assertIn("(1)</strong> 0 available", content)
+        self.assertNotIn("Delete author", content)
+
+        content, _ = self.get(reverse("author-delete", args=[self.author.pk]))
+        self.assertIn("(3 copies, 2 available)", content)
+        self.assertIn("(1 copy, 0 available)", content)
+
+    def test_book_delete_shows_counts(self):
+        content, _ = self.get(reverse("book-delete", args=[self.book.pk]))
+        self.assertIn("(3 copies, 2 available)", content)
+        self.assertNotIn("Yes, delete.", content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            book = self.add_book("HIJKLMN", ())
+        content, _ = self.get(reverse("book-delete", args=[book.pk]))
+        self.assertIn("Yes, delete.", content)
+
+    def test_query_count_does_not_grow_with_books(self):
+        urls = [
+            reverse("author-detail", args=[self.author.pk]),
+            reverse("author-delete", args=[self.author.pk]),
+        ]
+        before = [self.get(url)[1] for url in urls]
+        with self.captureOnCommitCallbacks(execute=True):
+            for isbn in ("HIJKLMN", "OPQRSTU", "VWXYZ12"):
+                self.add_book(isbn, ("a", "o"))
+        after = [self.get(url)[1] for url in urls]
+        self.assertEqual(after, before)
+
+
+class AutocompleteViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_superuser(
+            username="librarian", password="2HJ1vRV0Z&3iD"
+        )
+        names = [("John", "Smith"), ("Jane", "smithers"), ("Anna", "Smith")]
+        names += [("Ben", "Jones"), ("Émile", "Zola")]
+        cls.authors = [
+            Author.objects.create(first_name=first, last_name=last)
+            for first, last in names
+        ]
+        cls.book = Book.objects.create(
+            title="The Hobbit",
+            summary="A dragon story",
+            isbn="9780261102217",
+            author=cls.authors[0],
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def suggest(self, name, query):
+        response = self.client.get(reverse(name), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [result["text"] for result in response.json()["results"]]
+
+    def test_authors_match_name_prefixes(self):
+        self.assertEqual(
+            self.suggest("author-autocomplete", "smi"),
+            ["Smith, Anna", "Smith, John", "smithers, Jane"],
+        )
+        self.assertEqual(
+            self.suggest("author-autocomplete", "Smith, a"), ["Smith, Anna"]
+        )
+        self.assertEqual(self.suggest("author-autocomplete", "!"), [])
+        # The query is lower-cased as the database lower-cases the names.
+        self.assertEqual(
+            self.suggest("author-autocomplete", "zola, É"), ["Zola, Émile"]
+        )
+
+    def test_books_match_title_author_and_isbn(self):
+        for query in ("hob", "smith", "97802611"):
+            self.assertEqual(self.suggest("book-autocomplete", query), ["The Hobbit"])
+        self.assertEqual(self.suggest("book-autocomplete", "dragon"), [])
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse("book-autocomplete"), {"q": "hob"})
+        self.assertEqual(response.status_code, 302)
+
+    def test_copy_form_does_not_list_books(self):
+        Book.objects.create(
+            title="Other Book", summary="Summary", isbn="ABCDEFG", author=None
+        )
+        response = self.client.get(reverse("book_instance-create"))
+        self.assertNotContains(response, "Other Book")
+        self.assertContains(response, "js/autocomplete.js")
+
+        response = self.client.post(
+            reverse("book_instance-create"),
+            {"book": self.book.pk + 100, "imprint": "Imprint", "status": "a"},
+        )
+        self.assertIn("book", response.context["form"].errors)
+
+        response = self.client.post(
+            reverse("book_instance-create"),
+            {"book": "abc", "imprint": "Imprint", "status": "a"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("book", response.context["form"].errors)
+
+    def test_book_form_shows_chosen_author(self):
+        response = self.client.get(reverse("book-update", args=[self.book.pk]))
+        self.assertContains(response, 'value="Smith, John"')
+        self.assertNotContains(response, "Jones")
+
+
+class LoanViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.patron = User.objects.create_user(
+            username="patron", password="1X<ISRUkw+tuK"
+        )
+        cls.other = User.objects.create_user(username="other", password="1X<ISRUkw+tuK")
+        cls.librarian = User.objects.create_user(
+            username="librarian", password="2HJ1vRV0Z&3iD"
+        )
+        cls.librarian.user_permissions.add(
+            Permission.objects.get(codename="can_mark_returned"),
+            Permission.objects.get(codename="can_renew"),
+        )
+        book = Book.objects.create(title="Book", summary="Summary", isbn="ISBN")
+        cls.copy = BookInstance.objects.create(book=book, imprint="Imprint", status="a")
+
+    def post(self, user, name, data):
+        self.client.force_login(user)
+        return self.client.post(reverse(name, args=[self.copy.pk]), data)
+
+    def test_only_first_of_two_checkouts_succeeds(self):
+        url = reverse("book_instance_update_for_user", args=[self.copy.pk])
+        self.client.force_login(self.patron)
+        version = self.client.get(url).context["form"]["version"].value()
+
+        data = {"due_back": "", "version": version}
+        response = self.post(self.patron, "book_instance_update_for_user", data)
+        self.assertEqual(response.status_code, 302)
+        response = self.post(self.other, "book_instance_update_for_user", data)
+        self.assertContains(response, "just been booked", status_code=409)
+
+        self.copy.refresh_from_db()
+        self.assertEqual((self.copy.status, self.copy.borrower), ("o", self.patron))
+
+    def test_renew_and_return(self):
+        self.post(self.patron, "book_instance_update_for_user", {"version": 0})
+        due_back = datetime.date.today() + datetime.timedelta(days=10)
+
+        response = self.post(
+            self.librarian,
+            "renew-book-librarian",
+            {"renewal_date": due_back, "version": 1},
+        )
+        self.assertEqual(response.status_code, 302)
+        # Submitted again from the same, now stale, page.
+        response = self.post(
+            self.librarian,
+            "renew-book-librarian",
+            {"renewal_date": due_back, "version": 1},
+        )
+        self.assertEqual(response.status_code, 409)
+
+        response = self.post(self.librarian, "return-book-librarian", {"version": 1})
+        self.assertContains(response, "Copy changed", status_code=409)
+        response = self.post(self.librarian, "return-book-librarian", {"version": 2})
+        self.assertRedirects(response, reverse("all-borrowed"))
+        self.copy.refresh_from_db()
+        self.assertEqual((self.copy.status, self.copy.version), ("a", 3))
+
+    def test_return_requires_version(self):
+        self.post(self.patron, "book_instance_update_for_user", {"version": 0})
+        for data in ({}, {"version": ""}, {"version": "stale"}):
+            response = self.post(self.librarian, "return-book-librarian", data)
+            self.assertEqual(response.status_code, 400)
+        self.copy.refresh_from_db()
+        self.assertEqual((self.copy.status, self.copy.version), ("o", 1))
+
+    def test_return_requires_permission(self):
+        response = self.post(self.patron, "return-book-librarian", {"version": 0})
+        self.assertEqual(response.status_code, 403)
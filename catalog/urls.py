@@ -10,17 +10,25 @@ urlpatterns = [
     path("author/<int:pk>", views.AuthorDetailView.as_view(), name="author-detail"),
     path("mybooks/", views.LoanedBooksByUserListView.as_view(), name="my-borrowed"),
     path("borrowed/", views.LoanedBooksListView.as_view(), name="all-borrowed"),
+    path("inventory/export/", views.export_inventory, name="export-inventory"),
     path(
         "book/<uuid:pk>/renew/", views.renew_book_librarian, name="renew-book-librarian"
     ),
+    path(
+        "book/<uuid:pk>/return/",
+        views.return_book_librarian,
+        name="return-book-librarian",
+    ),
     # author CUD
     path("author/create/", views.AuthorCreate.as_view(), name="author-create"),
     path("author/<int:pk>/update/", views.AuthorUpdate.as_view(), name="author-update"),
     path("author/<int:pk>/delete/", views.AuthorDelete.as_view(), name="author-delete"),
+    path("author/autocomplete/", views.author_autocomplete, name="author-autocomplete"),
     # book CUD
     path("book/create/", views.BookCreate.as_view(), name="book-create"),
     path("book/<int:pk>/update/", views.BookUpdate.as_view(), name="book-update"),
     path("book/<int:pk>/delete/", views.BookDelete.as_view(), name="book-delete"),
+    path("book/autocomplete/", views.book_autocomplete, name="book-autocomplete"),
     # signup
     path("signup/", views.SignUpView.as_view(), name="signup"),
     # language
@@ -3,87 +3,126 @@ import datetime
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
-from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
-from django.db.models import Q
-from django.http import HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import (
+    Http404,
+    HttpResponseRedirect,
+    JsonResponse,
+    StreamingHttpResponse,
+)
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse, reverse_lazy
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import require_POST
 from django.views.generic.edit import CreateView, DeleteView, UpdateView
 
+from catalog import caching, conditional, export, loans, search, visits
 from catalog.forms import (
     AuthorForm,
+    BookForm,
     BookInstanceForm,
     BookInstanceUpdateForm_for_staff,
     BookInstanceUpdateForm_for_user,
+    LoanVersionForm,
     RenewBookForm,
 )
-from catalog.models import Author, Book, BookInstance, Genre, Language
+from catalog.models import (
+    Author,
+    Book,
+    BookInstance,
+    CatalogStatistics,
+    Genre,
+    Language,
+)
+from catalog.pagination import KeysetPaginationMixin
+from catalog.routing import ReplicaReadMixin
 
 
 # Create your views here.
 def index(request):
     """View function for home page of site."""
 
-    # Generate counts of some of the main objects
-    num_books = Book.objects.all().count()
-    num_instances = BookInstance.objects.all().count()
-    num_genres = Genre.objects.all().count()
-
-    # Available books (status = 'a')
-    num_instances_available = BookInstance.objects.filter(status__exact="a").count()
-
-    # The 'all()' is implied by default.
-    num_authors = Author.objects.count()
+    # Record counts are maintained by signals, so this is a single-row read
+    # however large the catalog grows.
+    stats = CatalogStatistics.load()
 
-    # Number of visits to this view, as counted in the session variable.
-    num_visits = request.session.get("num_visits", 0)
-    request.session["num_visits"] = num_visits + 1
+    # Number of visits to this view, as counted in a signed cookie rather than
+    # the session so that visitors cost no database write.
+    num_visits = visits.get_visit_count(request)
+    visits.home_page_views.add()
 
-    context = {
-        "num_books": num_books,
-        "num_instances": num_instances,
-        "num_instances_available": num_instances_available,
-        "num_authors": num_authors,
-        "num_genres": num_genres,
+    # Render the HTML template index.html with the data in the context variable
+    response = render(
+        request, "catalog/index.html", context=index_context(stats, num_visits)
+    )
+    visits.set_visit_count(response, num_visits + 1)
+    return response
+
+
+def index_context(stats, num_visits):
+    """Context of the home page, also used by catalog.async_views.index."""
+    return {
+        "num_books": stats.num_books,
+        "num_instances": stats.num_instances,
+        "num_instances_available": stats.num_instances_available,
+        "num_authors": stats.num_authors,
+        "num_genres": stats.num_genres,
         "num_visits": num_visits,
+        "num_home_page_views": stats.num_home_page_views,
     }
 
-    # Render the HTML template index.html with the data in the context variable
-    return render(request, "catalog/index.html", context=context)
-
-
-def available_book(request):
-    instances_available = BookInstance.objects.filter(status__exact="a")
-    instances_reserve = BookInstance.objects.filter(status__exact="r")
-    instances_maintenance = BookInstance.objects.filter(status__exact="m")
 
-    instances_combined = instances_available | instances_reserve | instances_maintenance
+# Number of copies per page of available_book.
+AVAILABLE_BOOKS_PER_PAGE = 10
 
-    # Number of items per page
-    items_per_page = 10  # You can change this value as per your requirement
 
-    paginator = Paginator(instances_combined, items_per_page)
-    page_number = request.GET.get("page")
+def available_book(request):
+    """View function listing copies of one status per tab, one page at a time."""
+    statuses, status, instances = available_book_query(
+        request, request.user.has_perm("catalog.change_bookinstance")
+    )
+    paginator = Paginator(instances, AVAILABLE_BOOKS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get("page"))
+    context = available_book_context(statuses, status, page_obj)
+    return render(request, "catalog/available_book.html", context=context)
 
-    try:
-        instances_paginated = paginator.page(page_number)
-    except PageNotAnInteger:
-        # If page is not an integer, deliver first page.
-        instances_paginated = paginator.page(1)
-    except EmptyPage:
-        # If page is out of range (e.g. 9999), deliver last page of results.
-        instances_paginated = paginator.page(paginator.num_pages)
 
-    context = {
-        "available_books": instances_available,
-        "reserve_books": instances_reserve,
-        "maintenance_books": instances_maintenance,
-        "instances_paginated": instances_paginated,
+def available_book_query(request, can_change):
+    """Returns the statuses shown as tabs, the requested one and its copies.
+
+    Also used by catalog.async_views.available_book, which has to check the
+    ``can_change`` permission asynchronously.
+    """
+    # Reserved and maintenance copies are only shown to staff who can edit them.
+    statuses = ["a"]
+    if can_change:
+        statuses += ["r", "m"]
+
+    status = request.GET.get("status", "a")
+    if status not in statuses:
+        status = "a"
+
+    instances = (
+        BookInstance.objects.filter(status__exact=status)
+        .select_related("book")
+        .order_by("due_back", "id")
+    )
+    return statuses, status, instances
+
+
+def available_book_context(statuses, status, page_obj):
+    """Context of available_book, for one page of the ``status`` tab."""
+    status_labels = dict(BookInstance.LOAN_STATUS)
+    return {
+        "status": status,
+        "status_tabs": [(code, status_labels[code]) for code in statuses],
+        "page_obj": page_obj,
+        "book_instances": page_obj.object_list,
     }
 
-    return render(request, "catalog/available_book.html", context=context)
-
 
 class SignUpView(CreateView):
     form_class = UserCreationForm
@@ -105,39 +144,59 @@ class GenreCreateView(PermissionRequiredMixin, CreateView):
     success_url = reverse_lazy("genre-create")
 
 
-class BookListView(generic.ListView):
+def with_copy_counts(books):
+    """Annotates books with their number of copies and of available copies."""
+    return books.annotate(
+        num_copies=Count("bookinstance"),
+        num_available=Count("bookinstance", filter=Q(bookinstance__status__exact="a")),
+    )
+
+
+class BookListView(ReplicaReadMixin, KeysetPaginationMixin, generic.ListView):
     model = Book
     context_object_name = "book_list"
     template_name = "catalog/book_list.html"
     paginate_by = 10
 
 
+@method_decorator(conditional.condition_on_updated_at(Book), name="get")
 class BookDetailView(LoginRequiredMixin, generic.DetailView):
     model = Book
     template_name = "catalog/book_detail.html"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Keys the cached fragments of the page; see catalog.caching.
+        context["cache_version"] = caching.get_version("book", self.object.pk)
+        context["cache_timeout"] = caching.FRAGMENT_TIMEOUT
+        return context
+
 
-class AuthorListView(generic.ListView):
+class AuthorListView(ReplicaReadMixin, KeysetPaginationMixin, generic.ListView):
     model = Author
     context_object_name = "author_list"
     template_name = "catalog/author_list.html"
     paginate_by = 10
 
 
+@method_decorator(conditional.condition_on_updated_at(Author), name="get")
 class AuthorDetailView(LoginRequiredMixin, generic.DetailView):
     model = Author
     template_name = "catalog/author_detail.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        author = self.get_object()
-        context["book_instance_count"] = BookInstance.objects.filter(
-            book__author=author
-        ).count()
+        context["cache_version"] = caching.get_version("author", self.object.pk)
+        context["cache_timeout"] = caching.FRAGMENT_TIMEOUT
+        # Lazy, so a fully cached page runs no query for it, and shared by
+        # both fragments so a cold page runs it once.
+        context["books"] = with_copy_counts(self.object.book_set.all())
         return context
 
 
-class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
+class LoanedBooksByUserListView(
+    LoginRequiredMixin, KeysetPaginationMixin, generic.ListView
+):
     """Generic class-based view listing books on loan to current user."""
 
     model = BookInstance
@@ -152,7 +211,9 @@ class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
         )
 
 
-class LoanedBooksListView(PermissionRequiredMixin, generic.ListView):
+class LoanedBooksListView(
+    PermissionRequiredMixin, KeysetPaginationMixin, generic.ListView
+):
     permission_required = ("catalog.can_mark_returned",)
 
     model = BookInstance
@@ -163,10 +224,31 @@ class LoanedBooksListView(PermissionRequiredMixin, generic.ListView):
         return BookInstance.objects.filter(status__exact="o").order_by("due_back")
 
 
+@login_required
+@permission_required("catalog.can_mark_returned", raise_exception=True)
+def export_inventory(request):
+    """Streams every book copy as CSV or NDJSON (?format=), gzipped with ?gzip=1."""
+    export_format = request.GET.get("format", "csv")
+    if export_format not in export.FORMATS:
+        raise Http404("Unknown export format.")
+    compress = request.GET.get("gzip") == "1"
+    content_type, extension = export.FORMATS[export_format]
+    filename = f"inventory.{extension}"
+    if compress:
+        content_type, filename = "application/gzip", filename + ".gz"
+    chunks = export.export_inventory(export_format, compress)
+    if isinstance(request, ASGIRequest):
+        chunks = export.aiter_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
 @login_required
 @permission_required("catalog.can_renew", raise_exception=True)
 def renew_book_librarian(request, pk):
     book_instance = get_object_or_404(BookInstance, pk=pk)
+    status = 200
 
     # If this is a POST request then process the Form data
     if request.method == "POST":
@@ -176,24 +258,55 @@ def renew_book_librarian(request, pk):
 
         # Check if the form is valid:
         if form.is_valid():
-            # process the data in form.cleaned_data as required (here we just write it to the model due_back field)
-            book_instance.due_back = form.cleaned_data["renewal_date"]
-            book_instance.save()
-
-            # redirect to a new URL:
-            return HttpResponseRedirect(reverse("all-borrowed"))
+            # process the data in form.cleaned_data as required (here we move the due date of the loan)
+            try:
+                loans.renew(
+                    book_instance,
+                    form.cleaned_data["renewal_date"],
+                    version=form.cleaned_data["version"],
+                )
+            except loans.LoanConflict as exc:
+                form.add_error(None, str(exc))
+                status = 409
+            else:
+                # redirect to a new URL:
+                return HttpResponseRedirect(reverse("all-borrowed"))
 
     # If this is a GET (or any other method) create the default form.
     else:
         proposed_renewal_date = datetime.date.today() + datetime.timedelta(weeks=3)
-        form = RenewBookForm(initial={"renewal_date": proposed_renewal_date})
+        form = RenewBookForm(
+            initial={
+                "renewal_date": proposed_renewal_date,
+                "version": book_instance.version,
+            }
+        )
 
     context = {
         "form": form,
         "book_instance": book_instance,
     }
 
-    return render(request, "catalog/book_renew_librarian.html", context)
+    return render(request, "catalog/book_renew_librarian.html", context, status=status)
+
+
+@login_required
+@permission_required("catalog.can_mark_returned", raise_exception=True)
+@require_POST
+def return_book_librarian(request, pk):
+    book_instance = get_object_or_404(BookInstance, pk=pk)
+    form = LoanVersionForm(request.POST)
+    context = {"back_url": reverse("all-borrowed")}
+    # The list always posts the version it showed; never return unchecked.
+    if not form.is_valid() or form.cleaned_data["version"] is None:
+        context["message"] = "The copy's version is missing; reload the list."
+        return render(request, "catalog/loan_conflict.html", context, status=400)
+    try:
+        loans.return_copy(book_instance, version=form.cleaned_data["version"])
+    except loans.LoanConflict as exc:
+        context["message"] = str(exc)
+        return render(request, "catalog/loan_conflict.html", context, status=409)
+    return HttpResponseRedirect(reverse("all-borrowed"))
 
 
 class AuthorCreate(PermissionRequiredMixin, CreateView):
@@ -213,6 +326,11 @@ class AuthorDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("authors")
     permission_required = "catalog.delete_author"
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["books"] = with_copy_counts(self.object.book_set.all())
+        return context
+
     def form_valid(self, form):
         try:
             self.object.delete()
@@ -225,13 +343,13 @@ class AuthorDelete(PermissionRequiredMixin, DeleteView):
 
 class BookCreate(PermissionRequiredMixin, CreateView):
     model = Book
-    fields = ["title", "author", "summary", "isbn", "language", "genre", "cover"]
+    form_class = BookForm
     permission_required = "catalog.add_book"
 
 
 class BookUpdate(PermissionRequiredMixin, UpdateView):
     model = Book
-    fields = ["title", "author", "summary", "isbn", "language", "genre", "cover"]
+    form_class = BookForm
     permission_required = "catalog.change_book"
 
 
@@ -240,6 +358,9 @@ class BookDelete(PermissionRequiredMixin, DeleteView):
     success_url = reverse_lazy("books")
     permission_required = "catalog.delete_book"
 
+    def get_queryset(self):
+        return with_copy_counts(super().get_queryset())
+
 
 class BookInstanceCreate(PermissionRequiredMixin, CreateView):
     model = BookInstance
@@ -254,9 +375,19 @@ class BookInstance_for_user(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy("available-books")
 
     def form_valid(self, form):
-        form.instance.borrower = self.request.user
-        form.instance.status = "o"
-        return super().form_valid(form)
+        # A conditional update instead of form.save(): of two patrons booking
+        # the same copy at once, the second gets a conflict.
+        try:
+            loans.checkout(
+                self.object,
+                self.request.user,
+                form.cleaned_data["due_back"],
+                version=form.cleaned_data["version"],
+            )
+        except loans.LoanConflict as exc:
+            form.add_error(None, str(exc))
+            return self.render_to_response(self.get_context_data(form=form), status=409)
+        return HttpResponseRedirect(self.get_success_url())
 
 
 class BookInstance_for_staff(PermissionRequiredMixin, UpdateView):
@@ -266,15 +397,34 @@ class BookInstance_for_staff(PermissionRequiredMixin, UpdateView):
     success_url = reverse_lazy("available-books")
 
 
-class SearchResultListView(generic.ListView):
+def _suggestions(objects):
+    return JsonResponse(
+        {"results": [{"id": obj.pk, "text": str(obj)} for obj in objects]}
+    )
+
+
+@login_required
+def author_autocomplete(request):
+    """JSON list of authors matching ``?q=``, for AutocompleteWidget."""
+    return _suggestions(search.suggest_authors(request.GET.get("q", "")))
+
+
+@login_required
+def book_autocomplete(request):
+    """JSON list of books matching ``?q=``, for AutocompleteWidget."""
+    return _suggestions(search.suggest_books(request.GET.get("q", "")))
+
+
+class SearchResultListView(ReplicaReadMixin, generic.ListView):
     model = Book
+    context_object_name = "book_list"
     template_name = "catalog/search_result.html"
+    paginate_by = 10
 
     def get_queryset(self):
-        query = self.request.GET.get("q")
-        if query:
-            return Book.objects.filter(
-                Q(title__icontains=query)
-                | Q(author__first_name__icontains=query)
-                | Q(author__last_name__icontains=query)
-            )
+        return search.search_books(self.request.GET.get("q", ""))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "")
+        return context
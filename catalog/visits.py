@@ -0,0 +1,99 @@
+"""Home page visit counting without a database write per view.
+
+Each visitor's own count is kept in a signed cookie, so counting it needs no
+session and anonymous visitors never get a session row. The site-wide total
+is added up in process memory and written to CatalogStatistics in batches.
+A batch is also written when it gets old in a process that stopped serving
+the home page, and when the process exits; only a worker that is killed
+loses its unwritten batch.
+"""
+
+import atexit
+import threading
+import time
+
+from django.db import connections
+
+from catalog.models import CatalogStatistics
+
+COOKIE_NAME = "num_visits"
+COOKIE_SALT = "catalog.visits"
+COOKIE_MAX_AGE = 365 * 24 * 60 * 60
+
+# A batch of home page views is written once it reaches FLUSH_EVERY views or
+# is FLUSH_SECONDS old, whichever comes first.
+FLUSH_EVERY = 100
+FLUSH_SECONDS = 60
+
+
+def get_visit_count(request):
+    """Returns how many times the visitor has seen the home page before."""
+    value = request.get_signed_cookie(COOKIE_NAME, default="0", salt=COOKIE_SALT)
+    try:
+        return max(int(value), 0)
+    except ValueError:
+        return 0
+
+
+def set_visit_count(response, count):
+    response.set_signed_cookie(
+        COOKIE_NAME,
+        str(count),
+        salt=COOKIE_SALT,
+        max_age=COOKIE_MAX_AGE,
+        httponly=True,
+        samesite="Lax",
+    )
+
+
+class BufferedCounter:
+    """Adds up increments in memory and passes them to ``write`` in batches.
+
+    A batch that no further ``add()`` completes is written by a timer thread
+    once it is ``seconds`` old, and any remainder at interpreter exit.
+    """
+
+    def __init__(self, write, every=FLUSH_EVERY, seconds=FLUSH_SECONDS):
+        self.write = write
+        self.every = every
+        self.seconds = seconds
+        self.pending = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.timer = None
+        atexit.register(self.flush)
+
+    def add(self, amount=1):
+        with self.lock:
+            age = time.monotonic() - self.started
+            self.pending += amount
+            if self.pending < self.every and age < self.seconds:
+                if self.timer is None:
+                    self.timer = threading.Timer(self.seconds - age, self._flush_idle)
+                    self.timer.daemon = True
+                    self.timer.start()
+                return
+        self.flush()
+
+    def flush(self):
+        """Writes the pending increments now."""
+        with self.lock:
+            pending, self.pending = self.pending, 0
+            self.started = time.monotonic()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if pending:
+            self.write(pending)
+
+    def _flush_idle(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread's own connections, opened by ``write``.
+            connections.close_all()
+
+
+home_page_views = BufferedCounter(
+    lambda views: CatalogStatistics.adjust(num_home_page_views=views)
+)
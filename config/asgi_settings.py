@@ -0,0 +1,10 @@
+"""
+Settings for serving the site under ASGI (see config/asgi.py).
+
+Identical to config.settings except that the read-heavy views are routed to
+their async versions.
+"""
+
+from config.settings import *  # noqa: F401,F403
+
+ROOT_URLCONF = "config.asgi_urls"
@@ -0,0 +1,21 @@
+"""
+URL configuration served under ASGI, see config.asgi_settings.
+
+The read-heavy catalog pages are routed to their async versions in
+catalog.async_views; every other route is the same as in config.urls.
+"""
+
+from django.urls import path
+
+from catalog import async_views
+from config.urls import urlpatterns as site_urlpatterns
+
+urlpatterns = [
+    path("", async_views.index, name="index"),
+    path("books/", async_views.BookListView.as_view(), name="books"),
+    path("availablebooks/", async_views.available_book, name="available-books"),
+    path("search/", async_views.search_results, name="search-results"),
+    # As in config.urls, the API is not enabled; api.async_urls is the async
+    # counterpart of api.urls.
+    # path("api/v1/", include("api.async_urls")),
+] + site_urlpatterns
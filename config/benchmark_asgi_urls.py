@@ -0,0 +1,12 @@
+"""
+ASGI counterpart of config.benchmark_urls used by ``benchmark_concurrency``:
+the site as configured in config.asgi_urls plus the async API routes.
+"""
+
+from django.urls import include, path
+
+from config.asgi_urls import urlpatterns as site_urlpatterns
+
+urlpatterns = site_urlpatterns + [
+    path("api/v1/", include("api.async_urls")),
+]
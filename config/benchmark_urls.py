@@ -0,0 +1,14 @@
+"""
+URL configuration used by the ``benchmark`` management command.
+
+It serves the site as configured in config.urls plus the DRF routes, which
+config.urls leaves disabled, under ``api/v1/``.
+"""
+
+from django.urls import include, path
+
+from config.urls import urlpatterns as site_urlpatterns
+
+urlpatterns = site_urlpatterns + [
+    path("api/v1/", include("api.urls")),
+]
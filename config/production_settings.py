@@ -0,0 +1,42 @@
+"""
+Settings for serving the site in production on SQLite, e.g.
+``DJANGO_SETTINGS_MODULE=config.production_settings gunicorn config.wsgi``.
+
+Identical to config.settings except for the database profile and sessions: the
+database is switched to write-ahead logging so readers no longer block the
+writer, each worker thread keeps its connection open across requests, and
+sessions are cached. Run the ``stress_database`` management command to compare
+the database profile with the defaults.
+"""
+
+from config.settings import *  # noqa: F401,F403
+from config.settings import DATABASES
+
+DATABASES = {
+    **DATABASES,
+    "default": {
+        **DATABASES["default"],
+        "CONN_MAX_AGE": None,
+        "CONN_HEALTH_CHECKS": True,
+        # Applied in order to every new connection; see catalog.signals.
+        "PRAGMAS": {
+            # Wait up to 5s for a competing writer instead of failing at once
+            # with "database is locked". Set first, switching to WAL takes a lock.
+            "busy_timeout": 5000,
+            "journal_mode": "WAL",
+            # In WAL mode only a power loss, not an application crash, can lose
+            # the last commits, and commits no longer wait for an fsync.
+            "synchronous": "NORMAL",
+            # Read the database through a 256MiB memory map and keep up to 64MiB
+            # of pages cached per connection.
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,
+            "temp_store": "MEMORY",
+        },
+    },
+}
+
+# Sessions are read from the cache every worker shares and only written to the
+# database when they change, e.g. on login. Anonymous visitors get none.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+SESSION_CACHE_ALIAS = "shared"
@@ -0,0 +1,29 @@
+"""
+Settings for serving the read-only views from a replica of the catalog.
+
+Identical to config.production_settings except that the catalog reads of the
+book, author and search lists and of the API's list and detail endpoints go to
+the "replica" database. Keep the replica current by running
+``python manage.py refresh_replica --loop 5`` alongside the server, with
+the same settings.
+"""
+
+from config.production_settings import *  # noqa: F401,F403
+from config.production_settings import DATABASES
+
+DATABASES = {
+    **DATABASES,
+    "replica": {
+        **DATABASES["replica"],
+        "CONN_MAX_AGE": None,
+        "CONN_HEALTH_CHECKS": True,
+        "PRAGMAS": {
+            "busy_timeout": 5000,
+            "query_only": "ON",
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64 * 1024,
+        },
+    },
+}
+
+REPLICA_DATABASE = "replica"
@@ -0,0 +1,39 @@
+// Typeahead for catalog.forms.AutocompleteWidget: fetches a few matches from
+// the widget's JSON endpoint as the user types and copies the primary key of
+// the chosen match into the hidden input that is submitted.
+document.addEventListener("DOMContentLoaded", () => {
+    for (const input of document.querySelectorAll("input[data-autocomplete]")) {
+        const target = document.getElementById(input.dataset.autocompleteTarget);
+        const options = document.getElementById(input.getAttribute("list"));
+        let timer;
+        let controller;
+
+        input.addEventListener("input", () => {
+            const chosen = [...options.options].find((option) => option.value === input.value);
+            target.value = chosen ? chosen.dataset.id : "";
+            clearTimeout(timer);
+            if (chosen || !input.value.trim()) {
+                return;
+            }
+            timer = setTimeout(async () => {
+                controller?.abort();
+                controller = new AbortController();
+                const url = `${input.dataset.autocomplete}?q=${encodeURIComponent(input.value)}`;
+                try {
+                    const response = await fetch(url, { signal: controller.signal });
+                    const { results } = await response.json();
+                    options.replaceChildren(...results.map(({ id, text }) => {
+                        const option = document.createElement("option");
+                        option.value = text;
+                        option.dataset.id = id;
+                        return option;
+                    }));
+                } catch (error) {
+                    if (error.name !== "AbortError") {
+                        throw error;
+                    }
+                }
+            }, 200);
+        });
+    }
+});